@@ -112,6 +112,8 @@ def execute_rules():
         ruleset = rule_manager.get_ruleset(ruleset_id)
         if not ruleset:
             return jsonify({"success": False, "msg": "规则集不存在"})
+        # 规则集整理一次，循环内每张卡直接复用
+        prepared_ruleset = engine.prepare_ruleset(ruleset)
 
         cfg = load_config()
         slash_as_separator = bool(cfg.get('automation_slash_is_tag_separator', False))
@@ -153,7 +155,9 @@ def execute_rules():
                   context_data['token_count'] = 0
             
             # 2. 评估（手动执行时，无条件的规则也视为匹配）
-            plan_raw = engine.evaluate(context_data, ruleset, match_if_no_conditions=True)
+            plan_raw = engine.evaluate(
+                context_data, ruleset, match_if_no_conditions=True, prepared=prepared_ruleset
+            )
             normalized_plan = normalize_actions_for_context(
                 plan_raw.get('actions', []),
                 TRIGGER_CONTEXT_MANUAL_RUN,
@@ -1693,7 +1693,7 @@ def api_update_card():
         
         # ID 变更处理
         if raw_id != final_rel_path_id:
-            with ctx.cache.lock:
+            with ctx.cache.mutating():
                 if raw_id in ctx.cache.id_map: del ctx.cache.id_map[raw_id]
                 if updated_card_obj:
                     ctx.cache.id_map[final_rel_path_id] = updated_card_obj
@@ -1710,7 +1710,7 @@ def api_update_card():
                 bundle_dir = os.path.relpath(dir_path, CARDS_FOLDER).replace('\\', '/')
 
         if bundle_dir:
-            with ctx.cache.lock:
+            with ctx.cache.mutating():
                 db_path = DEFAULT_DB_PATH
                 version_list = []
                 
@@ -1807,15 +1807,7 @@ def api_update_card():
                     ctx.cache.id_map[bundle_card['id']] = bundle_card
                     
                     # 列表更新
-                    found_in_list = False
-                    for idx, c in enumerate(ctx.cache.cards):
-                        if c.get('is_bundle') and c.get('bundle_dir') == bundle_dir:
-                            ctx.cache.cards[idx] = bundle_card 
-                            found_in_list = True
-                            break
-                    
-                    if not found_in_list:
-                        ctx.cache.cards.insert(0, bundle_card)
+                    ctx.cache.set_bundle_card_locked(bundle_dir, bundle_card)
 
                     # 如果保存的是非主版本，返回该版本的备注信息而不是主版本的
                     # 这样前端在刷新详情时会显示正确的版本备注
@@ -3547,9 +3539,10 @@ def api_delete_tags():
                 # === 同步内存缓存（如果这张卡在轻量缓存里）===
                 ctx.cache.update_tags_update(card_id, new_tags)
 
-                if card_id in ctx.cache.id_map:
-                    ctx.cache.id_map[card_id]['last_modified'] = current_time
-                    ctx.cache.id_map[card_id]['tags'] = new_tags
+                with ctx.cache.mutating():
+                    if card_id in ctx.cache.id_map:
+                        ctx.cache.id_map[card_id]['last_modified'] = current_time
+                        ctx.cache.id_map[card_id]['tags'] = new_tags
 
         conn.commit()
 
@@ -3797,7 +3790,7 @@ def api_create_folder():
         if data.get('parent') and data.get('parent') != "根目录":
             new_rel_path = f"{data.get('parent')}/{new_folder_name}"
             
-        with ctx.cache.lock:
+        with ctx.cache.mutating():
             if new_rel_path not in ctx.cache.visible_folders:
                 ctx.cache.visible_folders.append(new_rel_path)
                 # 重新排序以保持美观
@@ -3956,7 +3949,7 @@ def api_delete_folder():
                 save_ui_data(ui_data)
 
             # 4) 内存增量（可见文件夹列表）
-            with ctx.cache.lock:
+            with ctx.cache.mutating():
                 desc_prefix = folder_path + '/'
                 ctx.cache.visible_folders = [
                     f for f in ctx.cache.visible_folders
@@ -4162,13 +4155,13 @@ def api_delete_folder():
         # 4. 删除原空文件夹
         try:
             os.rmdir(target_dir)
-            with ctx.cache.lock:
+            with ctx.cache.mutating():
                 if folder_path in ctx.cache.visible_folders:
                     ctx.cache.visible_folders.remove(folder_path)
         except Exception as e:
             logger.warning(f"Could not remove source dir {target_dir} (might not be empty): {e}")
             if safe_move_to_trash(target_dir, TRASH_FOLDER):
-                with ctx.cache.lock:
+                with ctx.cache.mutating():
                     if folder_path in ctx.cache.visible_folders:
                         ctx.cache.visible_folders.remove(folder_path)
 
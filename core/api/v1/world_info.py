@@ -1,21 +1,34 @@
 import os
+import errno
 import json
 import time
 import shutil
 import logging
-import sqlite3
 import hashlib
-import re
+import itertools
+import mmap
+import tempfile
 from io import BytesIO
-from flask import Blueprint, request, jsonify, send_file
+from flask import Blueprint, Response, request, jsonify, send_file
+
+try:
+    import ijson  # 可选依赖：大世界书预览时流式解析
+except ImportError:
+    ijson = None
+
+try:
+    import orjson  # 可选依赖：大世界书 mmap 直接解析
+except ImportError:
+    orjson = None
 
 # === 基础设施 ===
 from core.config import BASE_DIR, load_config, DEFAULT_DB_PATH, CARDS_FOLDER, TRASH_FOLDER 
 from core.context import ctx
-from core.data.db_session import get_db
+from core.data.db_session import get_db, get_pooled_conn
 from core.data.ui_store import (
     get_last_sent_to_st,
     load_ui_data,
+    load_ui_data_snapshot,
     save_ui_data,
     UI_DATA_FILE,
     get_resource_item_categories,
@@ -107,63 +120,6 @@ def _safe_join_under_base(base_dir: str, rel_path: str) -> str:
         return ''
     return candidate
 
-def _normalize_wi_entries(raw):
-    if raw is None:
-        return []
-    if isinstance(raw, list):
-        entries = raw
-    elif isinstance(raw, dict):
-        entries = raw.get('entries', [])
-        if isinstance(entries, dict):
-            entries = list(entries.values())
-    else:
-        return []
-
-    normalized = []
-    for entry in entries:
-        if not isinstance(entry, dict):
-            continue
-        keys = entry.get('keys')
-        if keys is None:
-            keys = entry.get('key')
-        if isinstance(keys, str):
-            keys = [keys]
-        if not isinstance(keys, list):
-            keys = []
-
-        sec = entry.get('secondary_keys')
-        if sec is None:
-            sec = entry.get('keysecondary')
-        if isinstance(sec, str):
-            sec = [sec]
-        if not isinstance(sec, list):
-            sec = []
-
-        enabled = entry.get('enabled')
-        if enabled is None:
-            enabled = not bool(entry.get('disable', False))
-
-        keys_norm = sorted({str(k).strip().lower() for k in keys if str(k).strip()})
-        sec_norm = sorted({str(k).strip().lower() for k in sec if str(k).strip()})
-
-        normalized.append({
-            "keys": keys_norm,
-            "secondary_keys": sec_norm,
-            "content": entry.get('content') or "",
-            "comment": entry.get('comment') or "",
-            "enabled": bool(enabled),
-            "constant": bool(entry.get('constant', False)),
-            "vectorized": bool(entry.get('vectorized', False)),
-            "position": entry.get('position') if entry.get('position') is not None else entry.get('pos'),
-            "order": entry.get('insertion_order') or entry.get('order') or 0,
-            "selective": bool(entry.get('selective', True)),
-            "use_regex": bool(entry.get('use_regex', False))
-        })
-
-    normalized.sort(key=lambda x: (','.join(x.get('keys', [])), x.get('content', ''), x.get('comment', '')))
-    return normalized
-
-
 def _build_st_compatible_worldbook_payload(name: str) -> dict:
     """
     构建与 SillyTavern 新建世界书兼容的最小结构。
@@ -176,8 +132,25 @@ def _build_st_compatible_worldbook_payload(name: str) -> dict:
     }
 
 
+_EXPORT_RENAMED_ENTRY_KEYS = frozenset(('enabled', 'keys', 'secondary_keys', 'insertion_order'))
+
+
+def _convert_export_entry(idx, entry):
+    """将单个条目转换为 SillyTavern 导出格式：一次构造新 dict，不再 copy 后逐个改键、pop。"""
+    renamed = _EXPORT_RENAMED_ENTRY_KEYS
+    get = entry.get
+    final_entry = {k: v for k, v in entry.items() if k not in renamed}
+    final_entry['uid'] = idx
+    final_entry['displayIndex'] = idx
+    final_entry['key'] = entry['keys'] if 'keys' in entry else get('key', [])
+    final_entry['keysecondary'] = entry['secondary_keys'] if 'secondary_keys' in entry else get('keysecondary', [])
+    final_entry['disable'] = not get('enabled', not get('disable', False))
+    if 'insertion_order' in entry:
+        final_entry['order'] = entry['insertion_order']
+    return final_entry
+
+
 def _build_export_worldbook_payload(book, fallback_name='World Info'):
-    export_entries = {}
     entries_raw = []
 
     if isinstance(book, list):
@@ -187,50 +160,63 @@ def _build_export_worldbook_payload(book, fallback_name='World Info'):
         if isinstance(entries, list):
             entries_raw = entries
         elif isinstance(entries, dict):
-            entries_raw = list(entries.values())
+            entries_raw = entries.values()
 
-    for idx, entry in enumerate(entries_raw):
-        if not isinstance(entry, dict):
-            continue
-
-        final_entry = entry.copy()
-        final_entry['uid'] = idx
-        final_entry['displayIndex'] = idx
-
-        if 'keys' in entry:
-            final_entry['key'] = entry['keys']
-        if 'key' not in final_entry:
-            final_entry['key'] = []
+    convert = _convert_export_entry
+    export_entries = {
+        str(idx): convert(idx, entry)
+        for idx, entry in enumerate(entries_raw)
+        if isinstance(entry, dict)
+    }
 
-        if 'secondary_keys' in entry:
-            final_entry['keysecondary'] = entry['secondary_keys']
-        if 'keysecondary' not in final_entry:
-            final_entry['keysecondary'] = []
+    if not isinstance(book, dict):
+        return {'entries': export_entries, 'name': fallback_name}
 
-        is_enabled = entry.get('enabled', not entry.get('disable', False))
-        final_entry['disable'] = not is_enabled
+    final_export = {'entries': export_entries, 'name': book.get('name', fallback_name)}
+    # 常见世界书只有 entries/name 两个顶层键，此时无需再遍历
+    if len(book) > 2 or 'entries' not in book or 'name' not in book:
+        for key, value in book.items():
+            if key not in ('entries', 'name'):
+                final_export[key] = value
 
-        if 'insertion_order' in entry:
-            final_entry['order'] = entry['insertion_order']
+    return final_export
 
-        final_entry.pop('enabled', None)
-        final_entry.pop('keys', None)
-        final_entry.pop('secondary_keys', None)
-        final_entry.pop('insertion_order', None)
 
-        export_entries[str(idx)] = final_entry
+WI_EXPORT_SPOOL_BYTES = 1 << 20
+_WI_EXPORT_FLUSH_BYTES = 64 * 1024
 
-    final_export = {
-        'entries': export_entries,
-        'name': book.get('name', fallback_name) if isinstance(book, dict) else fallback_name,
-    }
 
-    if isinstance(book, dict):
-        for key, value in book.items():
-            if key not in ['entries', 'name']:
-                final_export[key] = value
-
-    return final_export
+def _send_worldbook_json(payload, download_name):
+    """
+    以附件形式返回世界书 JSON，不再经过 dumps -> str -> bytes -> BytesIO 的多份整体拷贝。
+    有 orjson 时直接得到 bytes；否则分块编码写入 SpooledTemporaryFile（超过 1MB 落盘）。
+    """
+    body = None
+    if orjson is not None:
+        try:
+            body = BytesIO(orjson.dumps(payload, option=orjson.OPT_INDENT_2 | orjson.OPT_NON_STR_KEYS))
+        except (TypeError, orjson.JSONEncodeError):
+            body = None
+    if body is None:
+        body = tempfile.SpooledTemporaryFile(max_size=WI_EXPORT_SPOOL_BYTES)
+        pending = []
+        pending_len = 0
+        for chunk in json.JSONEncoder(ensure_ascii=False, indent=2).iterencode(payload):
+            pending.append(chunk)
+            pending_len += len(chunk)
+            if pending_len >= _WI_EXPORT_FLUSH_BYTES:
+                body.write(''.join(pending).encode('utf-8'))
+                pending = []
+                pending_len = 0
+        if pending:
+            body.write(''.join(pending).encode('utf-8'))
+    body.seek(0)
+    return send_file(
+        body,
+        mimetype='application/json; charset=utf-8',
+        as_attachment=True,
+        download_name=download_name,
+    )
 
 
 def _serialize_worldbook_json_bytes(book, fallback_name='World Info') -> bytes:
@@ -244,28 +230,39 @@ def _build_send_worldbook_json_bytes(book, raw_bytes: bytes) -> bytes:
     return raw_bytes
 
 def _compute_wi_signature(raw):
+    """
+    世界书内容签名：只取各条目 content/comment（空白折叠）并排序，与条目顺序和其它字段无关。
+    签名仅在单次扫描内比较，因此返回紧凑的 blake2b 二进制摘要。
+    """
     try:
-        entries = _normalize_wi_entries(raw)
-        if not entries:
+        if isinstance(raw, list):
+            entries = raw
+        elif isinstance(raw, dict):
+            entries = raw.get('entries', [])
+            if isinstance(entries, dict):
+                entries = entries.values()
+        else:
             return None
-        def _clean_text(text):
-            if not isinstance(text, str):
-                return ""
-            cleaned = text.replace('\r\n', '\n').replace('\r', '\n')
-            cleaned = re.sub(r'\s+', ' ', cleaned)
-            return cleaned.strip()
 
+        has_entries = False
         entry_sigs = []
         for entry in entries:
-            content = _clean_text(entry.get('content', ''))
-            comment = _clean_text(entry.get('comment', ''))
+            if not isinstance(entry, dict):
+                continue
+            has_entries = True
+            content = entry.get('content')
+            comment = entry.get('comment')
+            # str.split() 按任意空白切分，等价于 re.sub(r'\s+', ' ', ...).strip()
+            content = ' '.join(content.split()) if isinstance(content, str) else ''
+            comment = ' '.join(comment.split()) if isinstance(comment, str) else ''
             if not content and not comment:
                 continue
             entry_sigs.append(f"{content}||{comment}")
 
+        if not has_entries:
+            return None
         entry_sigs.sort()
-        payload = "\n".join(entry_sigs)
-        return hashlib.sha1(payload.encode('utf-8')).hexdigest()
+        return hashlib.blake2b("\n".join(entry_sigs).encode('utf-8'), digest_size=16).digest()
     except Exception:
         return None
 
@@ -805,6 +802,19 @@ def _build_dir_tree_sig(base_dir: str) -> tuple:
         return ()
 
 
+def _attach_wi_search_keys(item: dict) -> dict:
+    """预先计算小写检索字段，缓存的列表重复过滤时不再逐项 lower()。"""
+    item['_name_lc'] = str(item.get('name') or '').lower()
+    item['_card_lc'] = str(item.get('card_name') or '').lower()
+    item['_summary_lc'] = str(item.get('ui_summary') or '').lower()
+    return item
+
+
+def _public_wi_items(items) -> list:
+    """去掉仅供服务端过滤使用的私有字段（以下划线开头）。"""
+    return [{k: v for k, v in item.items() if not k.startswith('_')} for item in items]
+
+
 def _select_preferred_resource_target(existing: dict, candidate: dict) -> dict:
     if not existing:
         return candidate
@@ -821,7 +831,201 @@ def _select_preferred_resource_target(existing: dict, candidate: dict) -> dict:
     return candidate if candidate_key < existing_key else existing
 
 
-def _apply_world_info_preview(data, cfg: dict, preview_limit=None, force_full: bool = False) -> dict:
+WI_PREVIEW_STREAM_MIN_BYTES = 256 * 1024
+_IJSON_SCALAR_EVENTS = ('string', 'number', 'boolean', 'null')
+_IJSON_VALUE_EVENTS = _IJSON_SCALAR_EVENTS + ('start_map', 'start_array')
+
+
+def _resolve_world_info_preview_limit(cfg: dict, preview_limit=None, force_full: bool = False) -> int:
+    if force_full:
+        return 0
+    try:
+        limit_val = int(preview_limit) if preview_limit is not None else 0
+    except Exception:
+        limit_val = 0
+    if limit_val <= 0:
+        default_limit = cfg.get('wi_preview_limit', 300)
+        try:
+            limit_val = int(default_limit) if default_limit is not None else 0
+        except Exception:
+            limit_val = 0
+    return max(limit_val, 0)
+
+
+WI_MMAP_MIN_BYTES = 64 * 1024
+
+
+def _load_world_info_json(file_path):
+    """
+    读取世界书 JSON：按字节整块读入后解析，省去文本层的逐块解码。
+    文件较大且装有 orjson 时改用 mmap + orjson，直接在页缓存上解析。
+    """
+    if orjson is not None:
+        try:
+            if os.path.getsize(file_path) >= WI_MMAP_MIN_BYTES:
+                with open(file_path, 'rb') as f, mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as mm:
+                    with memoryview(mm) as view:
+                        return orjson.loads(view)
+        except orjson.JSONDecodeError:
+            # orjson 更严格（如 NaN），交给标准库再试一次
+            pass
+    with open(file_path, 'rb') as f:
+        return json.loads(f.read())
+
+
+def _stream_world_info_preview_source(file_path: str, limit: int):
+    """
+    大文件预览：用 ijson 统计条目总数，仅物化前 limit 条条目，返回 (data, total_entries)。
+    对象形式下 entries 以外的顶层字段（含嵌套对象/数组）按原顺序完整保留，与整体加载的结果一致；
+    ijson 不可用、文件较小或结构不适用时返回 None。
+    """
+    if ijson is None or limit <= 0:
+        return None
+    try:
+        if os.path.getsize(file_path) < WI_PREVIEW_STREAM_MIN_BYTES:
+            return None
+
+        # 第一遍：走事件流统计条目，只物化 entries 以外的顶层字段
+        root_kind = None
+        entries_kind = None
+        pending_key = None
+        meta = {}
+        entry_keys = []
+        total = 0
+        # 正在物化的嵌套顶层字段：(字段名, ObjectBuilder, 当前嵌套深度)
+        building = None
+        with open(file_path, 'rb') as f:
+            for prefix, event, value in ijson.parse(f, use_float=True):
+                if root_kind is None:
+                    root_kind = event
+                    continue
+                if root_kind == 'start_array':
+                    if prefix == 'item' and event in _IJSON_VALUE_EVENTS:
+                        total += 1
+                    continue
+                if building is not None:
+                    key, builder, depth = building
+                    builder.event(event, value)
+                    if event in ('start_map', 'start_array'):
+                        depth += 1
+                    elif event in ('end_map', 'end_array'):
+                        depth -= 1
+                    if depth:
+                        building = (key, builder, depth)
+                    else:
+                        meta[key] = builder.value
+                        building = None
+                    continue
+                if prefix == '':
+                    pending_key = value if event == 'map_key' else None
+                    continue
+                if pending_key is not None:
+                    key, pending_key = pending_key, None
+                    if key == 'entries':
+                        if entries_kind is not None:
+                            # 重复的 entries 键：交给整体加载按"后者覆盖"处理
+                            return None
+                        entries_kind = event
+                        # 占住 entries 在顶层字段中的原始位置
+                        meta.setdefault('entries', None)
+                    elif event in _IJSON_SCALAR_EVENTS:
+                        meta[key] = value
+                    else:
+                        builder = ijson.common.ObjectBuilder()
+                        builder.event(event, value)
+                        building = (key, builder, 1)
+                    continue
+                if prefix == 'entries':
+                    if entries_kind == 'start_map' and event == 'map_key':
+                        entry_keys.append(value)
+                elif prefix == 'entries.item' and entries_kind == 'start_array' and event in _IJSON_VALUE_EVENTS:
+                    total += 1
+
+        # 第二遍：取够 limit 条即停止
+        if root_kind == 'start_array':
+            with open(file_path, 'rb') as f:
+                data = list(itertools.islice(ijson.items(f, 'item', use_float=True), limit))
+            return data, total
+        if root_kind != 'start_map':
+            return None
+
+        if entries_kind == 'start_array':
+            with open(file_path, 'rb') as f:
+                entries = list(itertools.islice(ijson.items(f, 'entries.item', use_float=True), limit))
+        elif entries_kind == 'start_map':
+            total = len(entry_keys)
+            if len(set(entry_keys)) != total:
+                # 重复的条目键：交给整体加载按"后者覆盖"处理
+                return None
+            try:
+                entry_keys.sort(key=lambda k: int(k))
+            except Exception:
+                entry_keys.sort()
+            wanted_keys = entry_keys[:limit]
+            wanted = set(wanted_keys)
+            picked = {}
+            with open(file_path, 'rb') as f:
+                for key, value in ijson.kvitems(f, 'entries', use_float=True):
+                    if key in wanted:
+                        picked[key] = value
+                        if len(picked) >= len(wanted):
+                            break
+            entries = {k: picked[k] for k in wanted_keys if k in picked}
+        else:
+            return None
+
+        meta['entries'] = entries
+        return meta, total
+    except Exception as e:
+        logger.warning('Stream WI preview failed, falling back to json.load: %s', e)
+        return None
+
+
+class _TeeReader:
+    """读取源流的同时把读到的字节写入 sink，供流式校验与落盘共用一次读取。"""
+
+    def __init__(self, src, sink):
+        self._src = src
+        self._sink = sink
+
+    def read(self, size=-1):
+        chunk = self._src.read(size)
+        if chunk:
+            self._sink.write(chunk)
+        return chunk
+
+
+def _save_validated_json_upload(file_storage, save_path: str) -> bool:
+    """
+    将上传的 JSON 流式写入 save_path 并校验格式，不把整个文件读入内存。
+    有 ijson 时边写边校验；ijson 拒绝或不可用时再用 json 校验已落盘文件，保持原有的接受范围。
+    校验失败时删除已写入的文件并返回 False。
+    """
+    try:
+        streamed_ok = False
+        with open(save_path, 'wb') as out:
+            if ijson is not None:
+                try:
+                    for _ in ijson.parse(_TeeReader(file_storage.stream, out)):
+                        pass
+                    streamed_ok = True
+                except Exception:
+                    streamed_ok = False
+            shutil.copyfileobj(file_storage.stream, out, 1 << 20)
+
+        if not streamed_ok:
+            with open(save_path, 'rb') as f:
+                json.loads(f.read())
+        return True
+    except Exception:
+        try:
+            os.remove(save_path)
+        except OSError:
+            pass
+        return False
+
+
+def _apply_world_info_preview(data, cfg: dict, preview_limit=None, force_full: bool = False, known_total=None) -> dict:
     truncated = False
     truncated_content = False
     total_entries = 0
@@ -860,21 +1064,10 @@ def _apply_world_info_preview(data, cfg: dict, preview_limit=None, force_full: b
                 return new_data
         return raw
 
-    try:
-        limit_val = int(preview_limit) if preview_limit is not None else 0
-    except Exception:
-        limit_val = 0
-
-    default_limit = cfg.get('wi_preview_limit', 300)
+    limit_val = _resolve_world_info_preview_limit(cfg, preview_limit=preview_limit, force_full=force_full)
     default_content_limit = cfg.get('wi_preview_entry_max_chars', 2000)
 
     if not force_full:
-        if limit_val <= 0:
-            try:
-                limit_val = int(default_limit) if default_limit is not None else 0
-            except Exception:
-                limit_val = 0
-
         content_limit = 0
         try:
             content_limit = int(default_content_limit) if default_content_limit is not None else 0
@@ -882,7 +1075,7 @@ def _apply_world_info_preview(data, cfg: dict, preview_limit=None, force_full: b
             content_limit = 0
 
         if limit_val > 0:
-            total_entries = _count_entries(data)
+            total_entries = _count_entries(data) if known_total is None else known_total
             if total_entries > limit_val:
                 data = _slice_entries(data, limit_val)
                 truncated = True
@@ -940,6 +1133,57 @@ from core.utils.image import extract_card_info # 用于 export logic
 logger = logging.getLogger(__name__)
 WI_LIST_CACHE_VERSION = 3
 
+WI_CARD_SIG_CACHE_MAX = 512
+WI_SOURCE_CACHE_MAX = 4
+
+
+def _get_wi_source_items(cache, sig):
+    """按来源签名读取未过滤的世界书列表，未命中返回 None。"""
+    with ctx.wi_list_cache_lock:
+        items = cache.get(sig)
+        if items is not None:
+            cache.move_to_end(sig)
+        return items
+
+
+def _put_wi_source_items(cache, sig, items):
+    with ctx.wi_list_cache_lock:
+        cache[sig] = items
+        cache.move_to_end(sig)
+        while len(cache) > WI_SOURCE_CACHE_MAX:
+            cache.popitem(last=False)
+
+
+def _get_embedded_wi_signature(card_id, full_path):
+    """
+    内嵌世界书内容签名，按 (路径, mtime_ns, size) 缓存在 LRU 中，
+    卡片未变化时跳过 PNG 元数据解析。文件不存在时返回 None。
+    """
+    try:
+        st = os.stat(full_path)
+    except OSError:
+        return None
+    stamp = (full_path, st.st_mtime_ns, st.st_size)
+    with ctx.wi_card_sig_cache_lock:
+        cached = ctx.wi_card_sig_cache.get(card_id)
+        if cached is not None and cached[0] == stamp:
+            ctx.wi_card_sig_cache.move_to_end(card_id)
+            return cached[1]
+
+    info = extract_card_info(full_path)
+    sig = None
+    if info:
+        data_block = info.get('data', {}) if 'data' in info else info
+        sig = _compute_wi_signature(data_block.get('character_book'))
+
+    with ctx.wi_card_sig_cache_lock:
+        ctx.wi_card_sig_cache[card_id] = (stamp, sig)
+        ctx.wi_card_sig_cache.move_to_end(card_id)
+        while len(ctx.wi_card_sig_cache) > WI_CARD_SIG_CACHE_MAX:
+            ctx.wi_card_sig_cache.popitem(last=False)
+    return sig
+
+
 bp = Blueprint('wi', __name__)
 
 @bp.route('/api/world_info/list', methods=['GET'])
@@ -962,7 +1206,7 @@ def api_list_world_infos():
         # === 动态获取配置中的路径，而不是使用全局静态变量 ===
         cfg = load_config()
         if bool(cfg.get('worldinfo_list_use_index', False)):
-            ui_data = load_ui_data()
+            ui_data = load_ui_data_snapshot()
             if not ctx.cache.initialized:
                 ctx.cache.reload_from_db()
             card_map = {str(card.get('id') or ''): card for card in getattr(ctx.cache, 'cards', []) or []}
@@ -1018,16 +1262,13 @@ def api_list_world_infos():
                 })
 
         current_wi_folder = _resolve_wi_dir(cfg)
-        resources_root = _resolve_resources_dir(cfg)
-        if not os.path.exists(current_wi_folder):
-            try: os.makedirs(current_wi_folder, exist_ok=True)
-            except: pass
+        default_res_dir = _resolve_resources_dir(cfg)
+        try: os.makedirs(current_wi_folder, exist_ok=True)
+        except OSError: pass
 
         # ===== [CACHE] key = type + category + search（未分页 items）=====
         cache_key = f"{wi_type}||{category}||{search_mode}||{search.lower()}"
 
-        cfg = load_config()
-        default_res_dir = _resolve_resources_dir(cfg)
         db_path = DEFAULT_DB_PATH
         cards_dir_sig = _safe_mtime(str(CARDS_FOLDER))
 
@@ -1060,7 +1301,7 @@ def api_list_world_infos():
                 end = start + page_size
                 return jsonify({
                     "success": True,
-                    "items": items[start:end],
+                    "items": _public_wi_items(items[start:end]),
                     "total": total_count,
                     "page": page,
                     "page_size": page_size,
@@ -1069,8 +1310,6 @@ def api_list_world_infos():
                     "folder_capabilities": folder_meta['folder_capabilities'],
                 })
 
-        # 原扫描
-        items = []
         embedded_name_set = set()
         embedded_sig_set = set()
 
@@ -1101,14 +1340,7 @@ def api_list_world_infos():
                         continue
                     try:
                         full_path = os.path.join(str(CARDS_FOLDER), card_id.replace('/', os.sep))
-                        if not os.path.exists(full_path):
-                            continue
-                        info = extract_card_info(full_path)
-                        if not info:
-                            continue
-                        data_block = info.get('data', {}) if 'data' in info else info
-                        book = data_block.get('character_book')
-                        sig = _compute_wi_signature(book)
+                        sig = _get_embedded_wi_signature(card_id, full_path)
                         if sig:
                             embedded_sig_set.add(sig)
                     except Exception:
@@ -1121,11 +1353,9 @@ def api_list_world_infos():
         resource_target_map = {}
         resource_lore_dirs = set()
         res_root_dir = None
-        ui_data = load_ui_data()
+        ui_data = load_ui_data_snapshot()
         resource_item_categories = get_resource_item_categories(ui_data).get('worldinfo', {})
         if wi_type in ['all', 'resource', 'global']:
-            cfg = load_config()
-            default_res_dir = os.path.join(BASE_DIR, cfg.get('resources_dir', 'resources'))
             res_root_dir = os.path.normpath(default_res_dir)
             if not ctx.cache.initialized:
                 ctx.cache.reload_from_db()
@@ -1155,96 +1385,107 @@ def api_list_world_infos():
             resource_targets = [resource_target_map[path] for path in sorted(resource_target_map.keys())]
 
             # 扫描 resources 根目录下的 lorebooks（防止 UI 数据缺失导致遗漏）
-            if res_root_dir and os.path.exists(res_root_dir):
+            if res_root_dir:
                 try:
-                    for folder in os.listdir(res_root_dir):
-                        full = os.path.join(res_root_dir, folder)
-                        if not os.path.isdir(full):
-                            continue
-                        lore_dir = os.path.normpath(os.path.join(full, 'lorebooks'))
+                    with os.scandir(res_root_dir) as it:
+                        res_entries = [entry for entry in it if entry.is_dir()]
+                    for entry in res_entries:
+                        lore_dir = os.path.normpath(os.path.join(entry.path, 'lorebooks'))
                         if os.path.exists(lore_dir):
                             resource_lore_dirs.add(lore_dir)
                 except Exception:
                     pass
 
         card_map = {str(card.get('id') or ''): card for card in getattr(ctx.cache, 'cards', []) or []}
+        scan_errors = 0
 
-        # 1. 全局目录 (Global)
+        # 按来源拆分的未过滤列表缓存：某一来源的签名变化时只重扫该来源
+        global_items = resource_items = embedded_items = None
         if wi_type in ['all', 'global']:
-            global_count_before = len(items)
+            # 排除资源目录下的世界书，避免误判为全局：预先构造规范化前缀元组，单次 startswith 判断
+            excluded_prefixes = [os.path.normcase(lore_dir) + os.sep for lore_dir in sorted(resource_lore_dirs)]
+            if res_root_dir and not _is_under_base(current_wi_folder, res_root_dir):
+                excluded_prefixes.append(os.path.normcase(res_root_dir) + os.sep)
+            excluded_prefixes = tuple(excluded_prefixes)
+            global_sig = ('global', WI_LIST_CACHE_VERSION, current_wi_folder, UI_DATA_FILE, global_dir_sig, ui_data_sig, excluded_prefixes)
+            global_items = _get_wi_source_items(ctx.wi_global_cache, global_sig)
+        if wi_type in ['all', 'resource']:
+            resource_sig = ('resource', WI_LIST_CACHE_VERSION, default_res_dir, UI_DATA_FILE, resource_dir_sig, ui_data_sig, card_category_sig)
+            resource_items = _get_wi_source_items(ctx.wi_resource_cache, resource_sig)
+        if wi_type in ['all', 'embedded']:
+            embedded_sig = ('embedded', WI_LIST_CACHE_VERSION, db_path, UI_DATA_FILE, ui_data_sig, db_sig, cards_dir_sig, card_category_sig)
+            embedded_items = _get_wi_source_items(ctx.wi_embedded_cache, embedded_sig)
+
+        # 1. 全局目录 (Global)
+        if wi_type in ['all', 'global'] and global_items is None:
+            global_items = []
+            # os.walk 产出的 root 均以 current_wi_folder 为字面前缀，直接切片代替逐文件 join/relpath
+            wi_prefix_len = len(current_wi_folder) + (0 if current_wi_folder.endswith(('/', os.sep)) else 1)
             for root, dirs, files in os.walk(current_wi_folder):
+                root_prefix = root if root.endswith(('/', os.sep)) else root + os.sep
                 for f in files:
                     if f.lower().endswith('.json'):
-                        full_path = os.path.join(root, f)
-                        # 排除资源目录下的世界书，避免误判为全局
-                        if any(_is_under_base(full_path, lore_dir) for lore_dir in resource_lore_dirs):
+                        full_path = root_prefix + f
+                        if excluded_prefixes and os.path.normcase(os.path.normpath(full_path)).startswith(excluded_prefixes):
                             continue
-                        if res_root_dir and not _is_under_base(current_wi_folder, res_root_dir):
-                            if _is_under_base(full_path, res_root_dir):
-                                continue
                         try:
                             if os.path.getsize(full_path) == 0: continue
+                            file_name = f
+                            file_base_lower = os.path.splitext(file_name)[0].lower()
                             # 简单读取 header，不读取全部 entries 以优化性能
                             # 如果文件巨大，可以考虑只读前几KB解析
-                            with open(full_path, 'r', encoding='utf-8') as f_obj:
-                                data = json.load(f_obj)
-                                # 兼容 list 或 dict
-                                file_name = os.path.basename(f)
-                                base_name = os.path.splitext(file_name)[0]
-                                name_source = "filename"
-                                if isinstance(data, dict):
-                                    name_val = (data.get('name') or "").strip()
-                                    if name_val:
-                                        name = name_val
-                                        name_source = "meta"
-                                    else:
-                                        name = file_name  # 显示含扩展名，更像“文件”
+                            data = _load_world_info_json(full_path)
+                            # 兼容 list 或 dict
+                            name_source = "filename"
+                            if isinstance(data, dict):
+                                name_val = (data.get('name') or "").strip()
+                                if name_val:
+                                    name = name_val
+                                    name_source = "meta"
                                 else:
-                                    name = file_name
-
-                                # 如果与内嵌世界书同名或内容相同，跳过（避免全局混入）
-                                if embedded_name_set:
-                                    name_key = str(name).strip().lower()
-                                    base_key = os.path.splitext(str(name).strip())[0].lower()
-                                    file_base_key = os.path.splitext(file_name)[0].lower() if file_name else base_key
-                                    if name_key in embedded_name_set or base_key in embedded_name_set or file_base_key in embedded_name_set:
-                                        continue
-                                if embedded_sig_set:
-                                    sig = _compute_wi_signature(data)
-                                    if sig and sig in embedded_sig_set:
-                                        continue
-                                    
-                                rel_path = os.path.relpath(full_path, current_wi_folder).replace('\\', '/')
-                                physical_category = _get_parent_category(rel_path)
-                                items.append({
-                                    "id": f"global::{rel_path}",
-                                    "type": "global",
-                                    "source_type": "global",
-                                    "name": name,
-                                    "name_source": name_source,
-                                    "file_name": file_name,
-                                    "path": full_path,
-                                    "mtime": os.path.getmtime(full_path),
-                                    "display_category": physical_category,
-                                    "physical_category": physical_category,
-                                    "category_mode": "physical",
-                                    "category_override": "",
-                                    "owner_card_id": "",
-                                    "owner_card_name": "",
-                                    "owner_card_category": "",
-                                    "ui_summary": _get_worldinfo_ui_summary(ui_data, 'global', file_path=full_path),
-                                    "last_sent_to_st": _get_worldinfo_last_sent_to_st(ui_data, 'global', full_path, cfg),
-                                })
-                        except Exception as e: 
-                            print(f"Error reading WI {f}: {e}")
+                                    name = file_name  # 显示含扩展名，更像“文件”
+                            else:
+                                name = file_name
+
+                            # 与内嵌世界书的去重键：扫描结果会跨请求缓存，去重在合并时按当前内嵌集合进行
+                            # name 取自文件名时，其去扩展名形式即 file_base_lower，无需再单独 splitext
+                            name_lower = name.lower()
+
+                            rel_path = full_path[wi_prefix_len:].replace('\\', '/')
+                            physical_category = _get_parent_category(rel_path)
+                            global_items.append(_attach_wi_search_keys({
+                                "id": f"global::{rel_path}",
+                                "type": "global",
+                                "source_type": "global",
+                                "name": name,
+                                "name_source": name_source,
+                                "file_name": file_name,
+                                "path": full_path,
+                                "mtime": os.path.getmtime(full_path),
+                                "display_category": physical_category,
+                                "physical_category": physical_category,
+                                "category_mode": "physical",
+                                "category_override": "",
+                                "owner_card_id": "",
+                                "owner_card_name": "",
+                                "owner_card_category": "",
+                                "ui_summary": _get_worldinfo_ui_summary(ui_data, 'global', file_path=full_path),
+                                "last_sent_to_st": _get_worldinfo_last_sent_to_st(ui_data, 'global', full_path, cfg),
+                                "_dedup_keys": (name_lower, file_base_lower),
+                                "_content_sig": _compute_wi_signature(data),
+                            }))
+                        except Exception as e:
+                            scan_errors += 1
+                            logger.debug('WI parse error %s: %s', full_path, e)
                             continue
+            _put_wi_source_items(ctx.wi_global_cache, global_sig, global_items)
         # 2. 资源目录 (Resource) - 基于 ui_data 查找自定义路径
-        if wi_type in ['all', 'resource']:
+        if wi_type in ['all', 'resource'] and resource_items is None:
+            resource_items = []
             # 建立 card_id -> resource_path 的映射
             # 此时我们要扫描的是哪些文件夹里有 'lorebooks/*.json'
             # 为了避免重复扫描同一个文件夹（多个卡片可能指向同一个资源目录），我们需要去重
             scanned_paths = set()
-            resource_count_before = len(items)
             
             # 遍历资源目标目录
             for target in resource_targets:
@@ -1255,61 +1496,72 @@ def api_list_world_infos():
                 if lore_dir in scanned_paths: continue # 已扫描过
                 scanned_paths.add(lore_dir)
                 
-                if os.path.exists(lore_dir):
-                    for f in os.listdir(lore_dir):
+                try:
+                    lore_files = os.listdir(lore_dir)
+                except OSError:
+                    continue
+                if lore_files:
+                    lore_prefix = lore_dir + os.sep
+                    for f in lore_files:
                         if f.lower().endswith('.json'):
-                            full_path = os.path.join(lore_dir, f)
+                            full_path = lore_prefix + f
                             try:
-                                with open(full_path, 'r', encoding='utf-8') as f_obj:
-                                    data = json.load(f_obj)
-                                    file_name = os.path.basename(f)
-                                    base_name = os.path.splitext(file_name)[0]
-                                    name_source = "filename"
-                                    if isinstance(data, dict):
-                                        name_val = (data.get('name') or "").strip()
-                                        if name_val:
-                                            name = name_val
-                                            name_source = "meta"
-                                        else:
-                                            name = file_name
+                                data = _load_world_info_json(full_path)
+                                file_name = os.path.basename(f)
+                                base_name = os.path.splitext(file_name)[0]
+                                name_source = "filename"
+                                if isinstance(data, dict):
+                                    name_val = (data.get('name') or "").strip()
+                                    if name_val:
+                                        name = name_val
+                                        name_source = "meta"
                                     else:
                                         name = file_name
-                                    path_key = _normalize_resource_item_key(full_path)
-                                    override_info = resource_item_categories.get(path_key) or {}
-                                    override_category = _normalize_category_path(override_info.get('category'))
-                                    owner_category = _normalize_category_path(card.get('category', ''))
-                                    display_category = override_category or owner_category
-                                    items.append({
-                                        "id": f"resource::{key}::{f}",
-                                        "type": "resource",
-                                        "source_type": "resource",
-                                        "name": name,
-                                        "name_source": name_source,
-                                        "file_name": file_name,
-                                        "path": full_path,
-                                        "card_name": card.get('char_name', ''), # 关联的角色名
-                                        "card_id": card.get('id', ''), # 用于跳转
-                                        "mtime": os.path.getmtime(full_path),
-                                        "display_category": display_category,
-                                        "physical_category": _get_parent_category(os.path.relpath(full_path, lore_dir).replace('\\', '/')),
-                                        "category_mode": "override" if override_category else "inherited",
-                                        "category_override": override_category,
-                                        "owner_card_id": card.get('id', ''),
-                                        "owner_card_name": card.get('char_name', ''),
-                                        "owner_card_category": owner_category,
-                                        "ui_summary": _get_worldinfo_ui_summary(ui_data, 'resource', file_path=full_path),
-                                        "last_sent_to_st": _get_worldinfo_last_sent_to_st(ui_data, 'resource', full_path, cfg),
-                                    })
-                            except: continue
+                                else:
+                                    name = file_name
+                                path_key = _normalize_resource_item_key(full_path)
+                                override_info = resource_item_categories.get(path_key) or {}
+                                override_category = _normalize_category_path(override_info.get('category'))
+                                owner_category = _normalize_category_path(card.get('category', ''))
+                                display_category = override_category or owner_category
+                                resource_items.append(_attach_wi_search_keys({
+                                    "id": f"resource::{key}::{f}",
+                                    "type": "resource",
+                                    "source_type": "resource",
+                                    "name": name,
+                                    "name_source": name_source,
+                                    "file_name": file_name,
+                                    "path": full_path,
+                                    "card_name": card.get('char_name', ''), # 关联的角色名
+                                    "card_id": card.get('id', ''), # 用于跳转
+                                    "mtime": os.path.getmtime(full_path),
+                                    "display_category": display_category,
+                                    "physical_category": _get_parent_category(f),
+                                    "category_mode": "override" if override_category else "inherited",
+                                    "category_override": override_category,
+                                    "owner_card_id": card.get('id', ''),
+                                    "owner_card_name": card.get('char_name', ''),
+                                    "owner_card_category": owner_category,
+                                    "ui_summary": _get_worldinfo_ui_summary(ui_data, 'resource', file_path=full_path),
+                                    "last_sent_to_st": _get_worldinfo_last_sent_to_st(ui_data, 'resource', full_path, cfg),
+                                }))
+                            except Exception as e:
+                                scan_errors += 1
+                                logger.debug('WI parse error %s: %s', full_path, e)
+                                continue
+            _put_wi_source_items(ctx.wi_resource_cache, resource_sig, resource_items)
+        if scan_errors:
+            logger.info('Skipped %d unreadable WI files', scan_errors)
         # 3. 角色卡内嵌 (Embedded) - 查询数据库
-        if wi_type in ['all', 'embedded']:
+        if wi_type in ['all', 'embedded'] and embedded_items is None:
+            embedded_items = []
             conn = get_db()
             cursor = conn.execute("SELECT id, char_name, character_book_name, last_modified FROM card_metadata WHERE has_character_book = 1")
             rows = cursor.fetchall()
             for row in rows:
                 card = card_map.get(str(row['id']) or '') or {}
                 owner_category = _normalize_category_path(card.get('category', ''))
-                items.append({
+                embedded_items.append(_attach_wi_search_keys({
                     "id": f"embedded::{row['id']}",
                     "type": "embedded",
                     "source_type": "embedded",
@@ -1326,8 +1578,21 @@ def api_list_world_infos():
                     "owner_card_category": owner_category,
                     "ui_summary": _get_embedded_worldinfo_ui_summary(ui_data, card_id=row['id']),
                     "last_sent_to_st": 0.0,
-                })
+                }))
+            _put_wi_source_items(ctx.wi_embedded_cache, embedded_sig, embedded_items)
 
+        items = []
+        if global_items:
+            # 如果与内嵌世界书同名或内容相同，跳过（避免全局混入）
+            if embedded_name_set or embedded_sig_set:
+                global_items = [
+                    i for i in global_items
+                    if embedded_name_set.isdisjoint(i['_dedup_keys'])
+                    and i['_content_sig'] not in embedded_sig_set
+                ]
+            items.extend(global_items)
+        items.extend(resource_items or [])
+        items.extend(embedded_items or [])
         source_items = list(items)
 
         # 过滤与排序
@@ -1335,12 +1600,10 @@ def api_list_world_infos():
             items = [i for i in items if _is_in_category_subtree(i.get('display_category', ''), category)]
 
         if search:
+            search_lc = search.lower()
             items = [
-                i for i in items if (
-                    search in i['name'].lower()
-                    or (i.get('card_name') and search in i['card_name'].lower())
-                    or search in str(i.get('ui_summary', '')).lower()
-                )
+                i for i in items
+                if search_lc in i['_name_lc'] or search_lc in i['_card_lc'] or search_lc in i['_summary_lc']
             ]
             
         items.sort(key=lambda x: x.get('mtime', 0), reverse=True)
@@ -1363,7 +1626,7 @@ def api_list_world_infos():
         total_count = len(items)
         start = (page - 1) * page_size
         end = start + page_size
-        paginated_items = items[start:end]
+        paginated_items = _public_wi_items(items[start:end])
         
         return jsonify({
             "success": True, 
@@ -1646,17 +1909,11 @@ def api_upload_world_info():
                 save_path = os.path.join(target_dir, f"{name_part}_{counter}{ext}")
                 counter += 1
             
-            try:
-                # 尝试验证 JSON 格式
-                content = file.read()
-                json.loads(content) # 校验格式
-                
-                # 重置指针并保存
-                file.seek(0)
-                file.save(save_path)
+            # 流式落盘并校验 JSON 格式，失败时不留下残缺文件
+            if _save_validated_json_upload(file, save_path):
                 success_count += 1
                 saved_paths.append(save_path)
-            except Exception:
+            else:
                 failed_list.append(file.filename)
 
         msg = f"成功上传 {success_count} 个世界书。"
@@ -1736,15 +1993,7 @@ def api_export_world_info():
             payload = _build_export_worldbook_payload(book)
             download_name = os.path.basename(file_path)
 
-        json_bytes = json.dumps(payload, ensure_ascii=False, indent=2).encode('utf-8')
-        buf = BytesIO(json_bytes)
-        buf.seek(0)
-        return send_file(
-            buf,
-            mimetype='application/json; charset=utf-8',
-            as_attachment=True,
-            download_name=download_name,
-        )
+        return _send_worldbook_json(payload, download_name)
     except Exception as e:
         logger.error(f"Export WI error: {e}")
         return jsonify({'success': False, 'msg': str(e)}), 500
@@ -1843,7 +2092,7 @@ def api_get_world_info_detail():
         card_id = req.get('card_id')
         preview_limit = request.json.get('preview_limit')
         force_full = bool(request.json.get('force_full', False))
-        ui_data = load_ui_data()
+        ui_data = load_ui_data_snapshot()
 
         if source_type == 'embedded' and wi_id and not file_path:
             try:
@@ -1904,11 +2153,16 @@ def api_get_world_info_detail():
 
         if not os.path.exists(file_path):
              return jsonify({"success": False, "msg": "文件不存在"})
-             
-        with open(file_path, 'r', encoding='utf-8') as f:
-            data = json.load(f)
 
-        resp = _apply_world_info_preview(data, cfg, preview_limit=preview_limit, force_full=force_full)
+        known_total = None
+        limit_val = _resolve_world_info_preview_limit(cfg, preview_limit=preview_limit, force_full=force_full)
+        streamed = _stream_world_info_preview_source(file_path, limit_val)
+        if streamed is not None:
+            data, known_total = streamed
+        else:
+            data = _load_world_info_json(file_path)
+
+        resp = _apply_world_info_preview(data, cfg, preview_limit=preview_limit, force_full=force_full, known_total=known_total)
         effective_source = source_type if source_type in ('global', 'resource') else ('resource' if _is_under_base(file_path, resources_dir) else 'global')
         resp['ui_summary'] = _get_worldinfo_ui_summary(ui_data, effective_source, file_path=file_path)
         if effective_source in ('global', 'resource'):
@@ -2150,10 +2404,12 @@ def api_migrate_lorebooks():
         target_res_dirs = set()
         
         # 1. 扫描 resources/ 根目录下的文件夹
-        if os.path.exists(default_res_dir):
-            for d in os.listdir(default_res_dir):
-                full = os.path.join(default_res_dir, d)
-                if os.path.isdir(full): target_res_dirs.add(full)
+        try:
+            with os.scandir(default_res_dir) as it:
+                for entry in it:
+                    if entry.is_dir(): target_res_dirs.add(entry.path)
+        except OSError:
+            pass
 
         # 2. 扫描卡片指定的自定义路径
         if not ctx.cache.initialized: ctx.cache.reload_from_db()
@@ -2176,56 +2432,63 @@ def api_migrate_lorebooks():
         
         for res_path in target_res_dirs:
             lore_target_dir = os.path.join(res_path, 'lorebooks')
+            lore_target_ready = False
             
-            # 扫描该资源目录根下的文件
+            # 扫描该资源目录根下的文件（DirEntry 自带类型信息，省去逐个 isfile）
             try:
-                files = os.listdir(res_path)
-            except:
+                with os.scandir(res_path) as it:
+                    entries = [entry for entry in it if entry.name.lower().endswith('.json') and entry.is_file()]
+            except OSError:
                 continue
 
-            for f in files:
-                if f.lower().endswith('.json'):
-                    src_path = os.path.join(res_path, f)
-                    if not os.path.isfile(src_path): continue
+            for entry in entries:
+                f = entry.name
+                src_path = entry.path
 
-                    # 检查是否为有效 WI
+                # 检查是否为有效 WI
+                try:
                     try:
-                        with open(src_path, 'r', encoding='utf-8') as f_obj:
-                            try:
-                                data = json.load(f_obj)
-                            except: continue # JSON 解析失败跳过
-
-                            is_wi = False
-                            # 判定标准
-                            if isinstance(data, dict) and 'entries' in data: is_wi = True
-                            elif isinstance(data, list) and len(data) > 0:
-                                # 检查第一项是否有 keys 或 key，防止把其他配置json误判
-                                first = data[0]
-                                if isinstance(first, dict) and ('keys' in first or 'key' in first):
-                                    is_wi = True
+                        data = _load_world_info_json(src_path)
+                    except: continue # JSON 解析失败跳过
+
+                    is_wi = False
+                    # 判定标准
+                    if isinstance(data, dict) and 'entries' in data: is_wi = True
+                    elif isinstance(data, list) and len(data) > 0:
+                        # 检查第一项是否有 keys 或 key，防止把其他配置json误判
+                        first = data[0]
+                        if isinstance(first, dict) and ('keys' in first or 'key' in first):
+                            is_wi = True
                             
-                            if is_wi:
-                                os.makedirs(lore_target_dir, exist_ok=True)
+                    if is_wi:
+                        if not lore_target_ready:
+                            os.makedirs(lore_target_dir, exist_ok=True)
+                            lore_target_ready = True
                                 
-                                dst_path = os.path.join(lore_target_dir, f)
-                                # 防重名
-                                if os.path.exists(dst_path):
-                                    if os.path.samefile(src_path, dst_path): continue
-                                    base, ext = os.path.splitext(f)
-                                    dst_path = os.path.join(lore_target_dir, f"{base}_{int(time.time())}{ext}")
+                        dst_path = os.path.join(lore_target_dir, f)
+                        # 防重名
+                        if os.path.exists(dst_path):
+                            if os.path.samefile(src_path, dst_path): continue
+                            base, ext = os.path.splitext(f)
+                            dst_path = os.path.join(lore_target_dir, f"{base}_{int(time.time())}{ext}")
                                 
-                                # 执行移动
-                                try:
-                                    # 1. 尝试移动
-                                    shutil.move(src_path, dst_path)               
-                                    moved_count += 1
-                                except Exception as move_err:
-                                    print(f"Move failed for {f}: {move_err}")
-                                    # 尝试回滚或忽略，防止数据丢失
-                                    continue
-                    except Exception as e:
-                        print(f"Error checking file {src_path}: {e}")
-                        continue
+                        # 执行移动
+                        try:
+                            # 1. 同一文件系统内直接 rename；跨设备时退回 shutil.move（复制+删除）
+                            try:
+                                os.replace(src_path, dst_path)
+                            except OSError as rename_err:
+                                if rename_err.errno != errno.EXDEV:
+                                    raise
+                                shutil.move(src_path, dst_path)
+                            moved_count += 1
+                        except Exception as move_err:
+                            print(f"Move failed for {f}: {move_err}")
+                            # 尝试回滚或忽略，防止数据丢失
+                            continue
+                except Exception as e:
+                    print(f"Error checking file {src_path}: {e}")
+                    continue
         
         invalidate_wi_list_cache()
         return jsonify({"success": True, "count": moved_count})
@@ -2257,38 +2520,65 @@ def api_export_worldbook_single():
 
         final_export = _build_export_worldbook_payload(book)
 
-        json_bytes = json.dumps(final_export, ensure_ascii=False, indent=2).encode("utf-8")
-        buf = BytesIO(json_bytes)
-        buf.seek(0)
-
-        return send_file(
-            buf,
-            mimetype="application/json; charset=utf-8",
-            as_attachment=True,
-            download_name=f"{cid.replace('/', '_')}_worldbook.json"
-        )
+        return _send_worldbook_json(final_export, f"{cid.replace('/', '_')}_worldbook.json")
     except Exception as e:
         import traceback
         traceback.print_exc()
         return jsonify({"success": False, "msg": str(e)})
 
 # --- WI Clipboard APIs ---
+def _dumps_clipboard_entry(entry):
+    """序列化剪切板条目：有 orjson 时走 orjson（输出 UTF-8 原文），不支持的值回退标准库。"""
+    if orjson is not None:
+        try:
+            return orjson.dumps(entry).decode('utf-8')
+        except TypeError:
+            pass
+    return json.dumps(entry)
+
+
+def _reject_json_constant(name):
+    raise ValueError(f"非标准 JSON 常量: {name}")
+
+
+def _is_strict_json_text(raw):
+    """校验库中存储的 JSON 文本能否原样拼进响应：须为严格 JSON（不含 NaN/Infinity），损坏或截断的返回 False。"""
+    if orjson is not None:
+        try:
+            orjson.loads(raw)
+            return True
+        except orjson.JSONDecodeError:
+            # orjson 不接受超出 64 位的整数等，交给标准库再判断一次
+            pass
+    try:
+        json.loads(raw, parse_constant=_reject_json_constant)
+        return True
+    except (TypeError, ValueError):
+        return False
+
+
 @bp.route('/api/wi/clipboard/list', methods=['GET'])
 def api_wi_clipboard_list():
     try:
-        db_path = DEFAULT_DB_PATH
-        with sqlite3.connect(db_path, timeout=10) as conn:
-            conn.row_factory = sqlite3.Row
-            cursor = conn.execute("SELECT * FROM wi_clipboard ORDER BY sort_order ASC, created_at DESC")
-            rows = cursor.fetchall()
-            items = []
-            for r in rows:
-                items.append({
-                    "db_id": r['id'],
-                    "content": json.loads(r['content_json']),
-                    "sort_order": r['sort_order']
-                })
-        return jsonify({"success": True, "items": items})
+        with get_pooled_conn(DEFAULT_DB_PATH) as conn:
+            # 只取三列并按位置解包，不经过 sqlite3.Row 的按名查找
+            cursor = conn.cursor()
+            cursor.row_factory = None
+            rows = cursor.execute(
+                "SELECT id, sort_order, content_json FROM wi_clipboard ORDER BY sort_order ASC, created_at DESC"
+            ).fetchall()
+        # content_json 校验通过后原样拼接进响应，省去解析后再序列化；损坏的行跳过，不让整个响应变成非法 JSON
+        parts = []
+        for db_id, sort_order, content_json in rows:
+            if content_json is None:
+                content_json = 'null'
+            elif not _is_strict_json_text(content_json):
+                logger.warning(f"Skip corrupt WI clipboard row: {db_id}")
+                continue
+            parts.append('{"db_id":%s,"sort_order":%s,"content":%s}' % (
+                json.dumps(db_id), json.dumps(sort_order), content_json
+            ))
+        return Response('{"success":true,"items":[%s]}' % ','.join(parts), mimetype='application/json')
     except Exception as e:
         return jsonify({"success": False, "msg": str(e)})
 
@@ -2299,31 +2589,27 @@ def api_wi_clipboard_add():
         overwrite_id = request.json.get('overwrite_id') # 如果有值，则是覆盖操作
         limit = 50 # 限制数量
 
-        db_path = DEFAULT_DB_PATH
-        with sqlite3.connect(db_path, timeout=10) as conn:
+        with get_pooled_conn(DEFAULT_DB_PATH) as conn:
             cursor = conn.cursor()
             
             # 覆盖模式
             if overwrite_id:
                 cursor.execute("UPDATE wi_clipboard SET content_json = ?, created_at = ? WHERE id = ?", 
-                              (json.dumps(entry), time.time(), overwrite_id))
-                conn.commit()
+                              (_dumps_clipboard_entry(entry), time.time(), overwrite_id))
                 return jsonify({"success": True, "msg": "已覆盖条目"})
 
-            # 新增模式：检查数量
-            cursor.execute("SELECT COUNT(*) FROM wi_clipboard")
-            count = cursor.fetchone()[0]
+            # 新增模式：计数、取最大排序与插入放在同一个写事务里，并发添加不会突破上限或撞上同一排序
+            cursor.execute("BEGIN IMMEDIATE")
+            count, max_order = cursor.execute(
+                "SELECT COUNT(*), COALESCE(MAX(sort_order), 0) FROM wi_clipboard"
+            ).fetchone()
             if count >= limit:
+                cursor.execute("ROLLBACK")
                 return jsonify({"success": False, "code": "FULL", "msg": "剪切板已满"})
-            
-            # 获取最大排序
-            cursor.execute("SELECT MAX(sort_order) FROM wi_clipboard")
-            max_order = cursor.fetchone()[0]
-            new_order = (max_order if max_order is not None else 0) + 1
 
             cursor.execute("INSERT INTO wi_clipboard (content_json, sort_order, created_at) VALUES (?, ?, ?)",
-                           (json.dumps(entry), new_order, time.time()))
-            conn.commit()
+                           (_dumps_clipboard_entry(entry), max_order + 1, time.time()))
+            cursor.execute("COMMIT")
         
         return jsonify({"success": True})
     except Exception as e:
@@ -2333,10 +2619,8 @@ def api_wi_clipboard_add():
 def api_wi_clipboard_delete():
     try:
         db_id = request.json.get('db_id')
-        db_path = DEFAULT_DB_PATH
-        with sqlite3.connect(db_path, timeout=10) as conn:
+        with get_pooled_conn(DEFAULT_DB_PATH) as conn:
             conn.execute("DELETE FROM wi_clipboard WHERE id = ?", (db_id,))
-            conn.commit()
         return jsonify({"success": True})
     except Exception as e:
         return jsonify({"success": False, "msg": str(e)})
@@ -2344,10 +2628,8 @@ def api_wi_clipboard_delete():
 @bp.route('/api/wi/clipboard/clear', methods=['POST'])
 def api_wi_clipboard_clear():
     try:
-        db_path = DEFAULT_DB_PATH
-        with sqlite3.connect(db_path, timeout=10) as conn:
+        with get_pooled_conn(DEFAULT_DB_PATH) as conn:
             conn.execute("DELETE FROM wi_clipboard")
-            conn.commit()
         return jsonify({"success": True})
     except Exception as e:
         return jsonify({"success": False, "msg": str(e)})
@@ -2356,11 +2638,14 @@ def api_wi_clipboard_clear():
 def api_wi_clipboard_reorder():
     try:
         order_map = request.json.get('order_map') # list of db_ids in order
-        db_path = DEFAULT_DB_PATH
-        with sqlite3.connect(db_path, timeout=10) as conn:
-            for idx, db_id in enumerate(order_map):
-                conn.execute("UPDATE wi_clipboard SET sort_order = ? WHERE id = ?", (idx, db_id))
-            conn.commit()
+        with get_pooled_conn(DEFAULT_DB_PATH) as conn:
+            # 单事务 + executemany：整批排序只提交一次
+            conn.execute("BEGIN")
+            conn.executemany(
+                "UPDATE wi_clipboard SET sort_order = ? WHERE id = ?",
+                [(idx, db_id) for idx, db_id in enumerate(order_map)],
+            )
+            conn.execute("COMMIT")
         return jsonify({"success": True})
     except Exception as e:
         return jsonify({"success": False, "msg": str(e)})
@@ -2395,8 +2680,8 @@ def api_delete_world_info():
         # 执行移动到回收站
         suppress_fs_events(2.5)
         if safe_move_to_trash(file_path, TRASH_FOLDER):
-            ui_data = load_ui_data()
             if source_type in ('global', 'resource'):
+                ui_data = load_ui_data()
                 if delete_worldinfo_note(ui_data, source_type, file_path=file_path):
                     save_ui_data(ui_data)
             # 刷新列表缓存
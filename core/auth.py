@@ -12,27 +12,56 @@ core/auth.py
 import os
 import secrets
 import hashlib
+import hmac
 import logging
 import ipaddress
 import time
 import threading
 import socket
-from functools import wraps
-from flask import request, session, redirect, url_for, render_template_string, jsonify
+from functools import lru_cache, wraps
+from flask import g, has_app_context, request, session, redirect, url_for
+from flask.sessions import SecureCookieSessionInterface
+from markupsafe import escape
 
-from core.config import load_config
+from core.config import DATA_DIR, load_config, load_config_cached, save_config
 
 logger = logging.getLogger(__name__)
 
 # 默认白名单（仅本机）
 DEFAULT_TRUSTED_IPS = ['127.0.0.1', '::1']
+# 本机客户端地址的字面形式（默认白名单必定包含）
+_LOCAL_CLIENT_IPS = frozenset(DEFAULT_TRUSTED_IPS + ['localhost'])
+_DEFAULT_TRUSTED_IP_SET = frozenset(ipaddress.ip_address(v) for v in DEFAULT_TRUSTED_IPS)
 # 默认受信任代理（仅本机）
 DEFAULT_TRUSTED_PROXIES = ['127.0.0.1', '::1']
+# 免认证路径前缀（静态资源与认证路由），str.startswith 直接接受元组
+_AUTH_EXEMPT_PREFIXES = ('/static/', '/auth/', '/favicon.ico')
+
+# IP 解析缓存：客户端/代理地址高度重复，ip_address 结果不可变可直接复用
+_cached_ip_address = lru_cache(maxsize=256)(ipaddress.ip_address)
 
 # 域名解析缓存（用于白名单域名匹配）
 _DOMAIN_CACHE_LOCK = threading.Lock()
 _DOMAIN_IP_CACHE = {}
 
+# 白名单预编译缓存：模式元组 -> (单 IP 集合, 网段元组, 域名元组)
+_WHITELIST_CACHE_LOCK = threading.Lock()
+_WHITELIST_CACHE = {}
+_WHITELIST_CACHE_MAX = 16
+# 配置键 -> (最近一次配置对象, 预编译白名单)；配置对象由 load_config_cached 共享
+_CONFIG_WHITELIST_LAST = {}
+
+# 最近一次配置对象及从中读取的凭据
+_CONFIG_CREDENTIALS_LAST = (None, None)
+# 最近一次已配置凭据及其摘要
+_CREDENTIALS_DIGEST_LAST = (None, None)
+
+# Secret Key 进程内缓存（重复调用 init_auth 时不再读盘）
+_SECRET_KEY_LOCK = threading.Lock()
+# 密钥文件只存放一行十六进制串，读取上限足以覆盖手工填写的较长密钥
+_SECRET_KEY_READ_LIMIT = 4096
+_SECRET_KEY = None
+
 # 登录失败限流（内存态）
 _RATE_LIMIT_LOCK = threading.Lock()
 _FAILED_LOGINS = {}
@@ -41,6 +70,21 @@ _HARD_LOCKED = False
 _HARD_LOCKED_AT = 0.0
 _GLOBAL_FAIL_COUNT = 0
 _GLOBAL_FAIL_LAST_TS = 0.0
+# 过期记录的全量清理按间隔摊销；单个 key 的过期由 _check_lockout / _record_failed_login 自行处理
+_RATE_LIMIT_SWEEP_INTERVAL = 60
+_LAST_RATE_LIMIT_SWEEP_TS = 0.0
+
+
+def _auth_config():
+    """
+    认证相关配置：同一请求内复用一份快照，before_request 链路只 stat 一次配置文件
+    """
+    if not has_app_context():
+        return load_config_cached()
+    cfg = g.get('_auth_cfg')
+    if cfg is None:
+        cfg = g._auth_cfg = load_config_cached()
+    return cfg
 
 
 def _strip_port(ip):
@@ -56,12 +100,15 @@ def _strip_port(ip):
     ip = ip.strip()
 
     # IPv6 with brackets: [::1]:1234
-    if ip.startswith('[') and ']' in ip:
-        return ip[1:ip.index(']')].strip()
+    if ip.startswith('['):
+        end = ip.find(']')
+        if end != -1:
+            return ip[1:end].strip()
 
-    # IPv4 with port: 1.2.3.4:5678
-    if ':' in ip and ip.count(':') == 1 and '.' in ip:
-        return ip.split(':', 1)[0].strip()
+    # IPv4 with port: 1.2.3.4:5678（只有一个冒号且冒号前为点分地址；裸 IPv6 原样返回）
+    head, sep, tail = ip.partition(':')
+    if sep and ':' not in tail and '.' in head:
+        return head.strip()
 
     return ip
 
@@ -101,13 +148,13 @@ def get_trusted_proxies():
     获取受信任代理列表
     仅当请求来自这些代理时，才会信任 X-Forwarded-For / X-Real-IP
     """
-    cfg = load_config()
+    cfg = _auth_config()
     user_proxies = cfg.get('auth_trusted_proxies', [])
     return DEFAULT_TRUSTED_PROXIES + list(user_proxies)
 
 
 def _get_rate_limit_config():
-    cfg = load_config()
+    cfg = _auth_config()
     try:
         max_attempts = int(cfg.get('auth_max_attempts', 5))
     except Exception:
@@ -130,7 +177,7 @@ def _get_rate_limit_config():
 
 
 def _get_hard_lock_threshold():
-    cfg = load_config()
+    cfg = _auth_config()
     try:
         threshold = int(cfg.get('auth_hard_lock_threshold', 50))
     except Exception:
@@ -149,7 +196,12 @@ def _get_rate_limit_key():
 
 
 def _cleanup_rate_limit_state(now_ts, window_seconds):
-    # 清理过期记录，避免内存增长
+    # 清理过期记录，避免内存增长（调用方持有 _RATE_LIMIT_LOCK；距上次清理不足间隔时跳过）
+    global _LAST_RATE_LIMIT_SWEEP_TS
+    if not _rate_limit_sweep_due(now_ts):
+        return
+    _LAST_RATE_LIMIT_SWEEP_TS = now_ts
+
     stale_keys = []
     for key, data in _FAILED_LOGINS.items():
         if now_ts - data.get('last_ts', now_ts) > window_seconds:
@@ -162,6 +214,13 @@ def _cleanup_rate_limit_state(now_ts, window_seconds):
         _LOCKED_UNTIL.pop(key, None)
 
 
+def _rate_limit_sweep_due(now_ts):
+    """
+    是否到了全量清理周期（无锁读取，仅用于决定是否需要加锁）
+    """
+    return not (0 <= now_ts - _LAST_RATE_LIMIT_SWEEP_TS < _RATE_LIMIT_SWEEP_INTERVAL)
+
+
 def _check_lockout(key, now_ts):
     locked_until = _LOCKED_UNTIL.get(key)
     if locked_until and locked_until > now_ts:
@@ -201,54 +260,56 @@ def _is_hard_locked():
     return _HARD_LOCKED
 
 
-def _parse_x_forwarded_for(xff_value):
+def _parse_xff_hop(part):
     """
-    解析 X-Forwarded-For，返回合法 IP 列表（按顺序）
+    解析 X-Forwarded-For 中的单个节点，非法时返回空字符串
     """
-    if not xff_value:
-        return []
-
-    parts = [p.strip() for p in xff_value.split(',') if p.strip()]
-    ips = []
-    for part in parts:
-        ip = _strip_port(part)
-        if ip == 'localhost':
-            ip = '127.0.0.1'
-        try:
-            ipaddress.ip_address(ip)
-            ips.append(ip)
-        except ValueError:
-            continue
-    return ips
+    ip = _strip_port(part.strip())
+    if not ip:
+        return ''
+    if ip == 'localhost':
+        ip = '127.0.0.1'
+    try:
+        _cached_ip_address(ip)
+    except ValueError:
+        return ''
+    return ip
 
 
 def _get_client_ip_from_xff(xff_value, trusted_proxies, remote_addr):
     """
     从 X-Forwarded-For 链中提取真实客户端 IP
     逻辑:
-    - 解析 XFF 为列表
-    - 追加 remote_addr 作为最后一跳（如未包含）
-    - 从右向左跳过受信任代理，取第一个非代理 IP
+    - remote_addr 作为最后一跳（与 XFF 最右侧合法节点相同时不重复）
+    - 从右向左跳过受信任代理（trusted_proxies 为预编译白名单），取第一个非代理 IP
+    - 全部都是代理时，兜底返回最左边的合法节点或 remote_addr
+    直接从右向左逐段解析，命中即返回，不构造完整的节点列表
     """
-    xff_ips = _parse_x_forwarded_for(xff_value)
-
+    remote_ip = None
     if remote_addr:
         try:
-            ipaddress.ip_address(remote_addr)
-            if not xff_ips or xff_ips[-1] != remote_addr:
-                xff_ips.append(remote_addr)
+            remote_ip = _cached_ip_address(remote_addr)
         except ValueError:
             pass
 
-    # 从右向左跳过受信任代理
-    for ip in reversed(xff_ips):
-        if not is_ip_in_whitelist(ip, trusted_proxies):
+    remote_pending = remote_ip is not None
+    leftmost = ''
+    for part in reversed(xff_value.split(',') if xff_value else ()):
+        ip = _parse_xff_hop(part)
+        if not ip:
+            continue
+        if remote_pending:
+            remote_pending = False
+            if ip != remote_addr and not _match_compiled_whitelist(remote_ip, trusted_proxies):
+                return remote_addr
+        if not _match_compiled_whitelist(_cached_ip_address(ip), trusted_proxies):
             return ip
+        leftmost = ip
 
-    # 全部都是代理，兜底返回最左边或 remote_addr
-    if xff_ips:
-        return xff_ips[0]
-    return remote_addr or ''
+    if remote_pending:
+        # XFF 中没有合法节点，链上只有 remote_addr 本身
+        return remote_addr
+    return leftmost or remote_addr or ''
 
 
 def get_real_ip():
@@ -260,34 +321,41 @@ def get_real_ip():
     if remote_addr == 'localhost':
         remote_addr = '127.0.0.1'
 
-    trusted_proxies = get_trusted_proxies()
-    is_proxy = bool(remote_addr and is_ip_in_whitelist(remote_addr, trusted_proxies))
-    has_forwarded = bool(request.headers.get('X-Forwarded-For') or request.headers.get('X-Real-IP'))
-    local_host = _is_local_host(request.host)
+    remote_ip = _parse_client_ip(remote_addr)
+    if remote_ip is None:
+        return remote_addr or ''
+
+    headers = request.headers
+    forwarded_for = headers.get('X-Forwarded-For')
+    real_ip = headers.get('X-Real-IP')
+    has_forwarded = bool(forwarded_for or real_ip)
+
+    # 无转发头的本机直连：无论来源是否为受信任代理，结论都是回退到本机 IP，无需查代理名单
+    if not has_forwarded and remote_ip in _DEFAULT_TRUSTED_IP_SET and _is_local_host(request.host):
+        return remote_addr
 
-    if is_proxy:
-        # 仅在受信任代理下使用转发头
-        forwarded_for = request.headers.get('X-Forwarded-For')
+    trusted_proxies = _get_trusted_proxies_compiled()
+    if trusted_proxies and _match_compiled_whitelist(remote_ip, trusted_proxies):
+        # 仅在受信任代理下使用转发头（直连请求的转发头一律忽略）
         if forwarded_for:
             client_ip = _get_client_ip_from_xff(forwarded_for, trusted_proxies, remote_addr)
             if client_ip:
                 # 反向代理场景下不信任 loopback 作为真实客户端（避免外网穿透绕过）
-                if is_ip_in_whitelist(client_ip, DEFAULT_TRUSTED_IPS):
+                if _is_default_trusted_ip(client_ip):
                     return ''
                 return client_ip
 
-        real_ip = request.headers.get('X-Real-IP')
         if real_ip:
             real_ip = _strip_port(real_ip.strip())
             if real_ip:
-                if is_ip_in_whitelist(real_ip, DEFAULT_TRUSTED_IPS):
+                if _is_default_trusted_ip(real_ip):
                     return ''
                 return real_ip
 
         # 代理请求但未携带转发头：
         # - 若 Host 非本机，则视为外网，不允许回退到本机 IP
         # - 若 Host 为本机，允许回退（本机访问）
-        if (has_forwarded or not is_ip_in_whitelist(remote_addr, DEFAULT_TRUSTED_IPS)) or not local_host:
+        if (has_forwarded or remote_ip not in _DEFAULT_TRUSTED_IP_SET) or not _is_local_host(request.host):
             return ''
 
     return remote_addr or ''
@@ -302,7 +370,7 @@ def get_trusted_ips():
     - 通配符: "192.168.1.*" (会转换为 CIDR)
     - 域名: "your-ddns.example.com"
     """
-    cfg = load_config()
+    cfg = _auth_config()
     user_whitelist = cfg.get('auth_trusted_ips', [])
 
     # 合并默认白名单和用户白名单
@@ -316,31 +384,23 @@ def normalize_ip_pattern(pattern):
          "192.168.*.*" -> "192.168.0.0/16"
     """
     pattern = pattern.strip()
+    if '*' not in pattern:
+        return pattern
 
-    # 处理通配符格式
-    if '*' in pattern:
-        parts = pattern.split('.')
-        cidr_bits = 0
-        normalized_parts = []
-
-        for part in parts:
-            if part == '*':
-                normalized_parts.append('0')
-            else:
-                normalized_parts.append(part)
-                cidr_bits += 8
-
-        if len(normalized_parts) == 4:
-            return f"{'.'.join(normalized_parts)}/{cidr_bits}"
-
-    return pattern
+    # 处理通配符格式：每个非通配段贡献 8 位前缀
+    parts = pattern.split('.')
+    if len(parts) != 4:
+        return pattern
+    wildcard_count = parts.count('*')
+    normalized = '.'.join(['0' if part == '*' else part for part in parts])
+    return f"{normalized}/{(4 - wildcard_count) * 8}"
 
 
 def _get_domain_cache_ttl_seconds():
     """
     获取域名解析缓存时间（秒）
     """
-    cfg = load_config()
+    cfg = _auth_config()
     try:
         ttl = int(cfg.get('auth_domain_cache_seconds', 60))
     except Exception:
@@ -443,71 +503,166 @@ def _resolve_domain_ips(domain):
     return resolved_ips
 
 
-def is_ip_in_whitelist(ip, whitelist):
+def _compile_whitelist(whitelist):
     """
-    检查 IP 是否在白名单中
+    将白名单模式预编译为 (单 IP 集合, IPv4 网段元组, IPv6 网段元组, 域名元组)。
+    以模式元组为键缓存，配置变化后自然生成新键，不需要额外失效。
     """
-    if not ip:
-        return False
-
-    # 处理 localhost 别名
-    if ip == 'localhost':
-        ip = '127.0.0.1'
-
-    try:
-        client_ip = ipaddress.ip_address(ip)
-    except ValueError:
-        # 无法解析的 IP，不在白名单中
-        return False
-
-    for pattern in whitelist:
-        if not isinstance(pattern, str):
-            continue
-
+    key = tuple(pattern for pattern in whitelist if isinstance(pattern, str))
+    with _WHITELIST_CACHE_LOCK:
+        compiled = _WHITELIST_CACHE.get(key)
+    if compiled is not None:
+        return compiled
+
+    single_ips = set()
+    networks = []
+    domains = []
+    for pattern in key:
         pattern = pattern.strip()
         if not pattern:
             continue
 
-        # 先按 IP/CIDR/通配符匹配（兼容旧行为）
+        # 先按 IP/CIDR/通配符解析（兼容旧行为）
         normalized_ip_pattern = normalize_ip_pattern(pattern)
-
         try:
-            # 尝试作为单个 IP 匹配
             if '/' not in normalized_ip_pattern:
-                if client_ip == ipaddress.ip_address(normalized_ip_pattern):
-                    return True
+                single_ips.add(ipaddress.ip_address(normalized_ip_pattern))
             else:
-                # 作为网络段匹配
                 network = ipaddress.ip_network(normalized_ip_pattern, strict=False)
-                if client_ip in network:
-                    return True
+                # /32、/128 等单地址网段归入集合，走 O(1) 查找
+                if network.num_addresses == 1:
+                    single_ips.add(network.network_address)
+                else:
+                    networks.append(network)
+            continue
         except ValueError:
             # 非 IP/CIDR 格式，继续尝试按域名匹配
             pass
 
-        # 域名匹配：将域名解析为 IP 列表后对比
         domain = _normalize_domain_pattern(pattern)
-        if not domain:
-            continue
-
         if domain == 'localhost':
-            domain_ips = set(str(ipaddress.ip_address(v)) for v in DEFAULT_TRUSTED_IPS)
+            # localhost 别名在编译期展开为本机地址，请求时无需再做字符串比较
+            single_ips.update(_DEFAULT_TRUSTED_IP_SET)
+        elif domain:
+            domains.append(domain)
         else:
-            domain_ips = _resolve_domain_ips(domain)
+            logger.warning(f"忽略无法识别的白名单条目: {pattern}")
+
+    # 按 IP 版本分桶并合并重叠/相邻网段，请求时只遍历同版本的网段；
+    # 前缀短（范围大）的网段排在前面，常见的大段白名单先命中
+    networks_v4, networks_v6 = (
+        tuple(sorted(
+            ipaddress.collapse_addresses(n for n in networks if n.version == version),
+            key=lambda n: n.prefixlen,
+        ))
+        for version in (4, 6)
+    )
+
+    compiled = (frozenset(single_ips), networks_v4, networks_v6, tuple(domains))
+    with _WHITELIST_CACHE_LOCK:
+        if len(_WHITELIST_CACHE) >= _WHITELIST_CACHE_MAX:
+            _WHITELIST_CACHE.clear()
+        _WHITELIST_CACHE[key] = compiled
+    return compiled
+
+
+def _parse_client_ip(ip):
+    """
+    解析客户端 IP，无法解析时返回 None
+    """
+    if not ip:
+        return None
+
+    # 处理 localhost 别名
+    if ip == 'localhost':
+        ip = '127.0.0.1'
+
+    try:
+        return _cached_ip_address(ip)
+    except ValueError:
+        # 无法解析的 IP，不在白名单中
+        return None
+
+
+def is_ip_in_whitelist(ip, whitelist):
+    """
+    检查 IP 是否在白名单中
+    """
+    client_ip = _parse_client_ip(ip)
+    if client_ip is None:
+        return False
+    return _match_compiled_whitelist(client_ip, _compile_whitelist(whitelist))
 
-        if str(client_ip) in domain_ips:
+
+def _match_compiled_whitelist(client_ip, compiled):
+    """
+    用预编译白名单匹配已解析的客户端 IP
+    """
+    single_ips, networks_v4, networks_v6, domains = compiled
+    if client_ip in single_ips:
+        return True
+    for network in (networks_v4 if client_ip.version == 4 else networks_v6):
+        if client_ip in network:
             return True
 
+    # 域名匹配：将域名解析为 IP 列表后对比
+    if domains:
+        client_ip_text = str(client_ip)
+        for domain in domains:
+            if client_ip_text in _resolve_domain_ips(domain):
+                return True
+
     return False
 
 
+def _get_config_whitelist_compiled(cfg_key, defaults):
+    """
+    获取“默认列表 + 配置项”对应的预编译白名单。
+    load_config_cached 在配置未变化时返回同一对象，以其身份为键即可跳过逐条模式的拼接与校验。
+    """
+    cfg = _auth_config()
+    last = _CONFIG_WHITELIST_LAST.get(cfg_key)
+    if last is not None and last[0] is cfg:
+        return last[1]
+    compiled = _compile_whitelist(defaults + list(cfg.get(cfg_key, [])))
+    _CONFIG_WHITELIST_LAST[cfg_key] = (cfg, compiled)
+    return compiled
+
+
+def _get_trusted_whitelist_compiled():
+    """
+    获取当前配置对应的预编译访问白名单（与 get_trusted_ips 同源）
+    """
+    return _get_config_whitelist_compiled('auth_trusted_ips', DEFAULT_TRUSTED_IPS)
+
+
+def _get_trusted_proxies_compiled():
+    """
+    获取当前配置对应的预编译受信任代理列表（与 get_trusted_proxies 同源）
+    """
+    return _get_config_whitelist_compiled('auth_trusted_proxies', DEFAULT_TRUSTED_PROXIES)
+
+
+def _is_default_trusted_ip(ip):
+    """
+    判断 IP 是否为默认白名单中的本机地址
+    """
+    client_ip = _parse_client_ip(ip)
+    return client_ip is not None and client_ip in _DEFAULT_TRUSTED_IP_SET
+
+
 def is_trusted_request():
     """
     判断是否为受信任的请求（在白名单中）
     """
     ip = get_real_ip()
-    whitelist = get_trusted_ips()
-    return is_ip_in_whitelist(ip, whitelist)
+    # 本机地址始终位于默认白名单中，先于配置读取与 IP 解析直接放行
+    if ip in _LOCAL_CLIENT_IPS:
+        return True
+    client_ip = _parse_client_ip(ip)
+    if client_ip is None:
+        return False
+    return _match_compiled_whitelist(client_ip, _get_trusted_whitelist_compiled())
 
 
 def get_auth_credentials():
@@ -522,12 +677,18 @@ def get_auth_credentials():
     if env_username and env_password:
         return env_username, env_password
 
-    # 从配置文件读取
-    cfg = load_config()
+    # 从配置文件读取（配置对象未变化时复用上次整理好的结果）
+    global _CONFIG_CREDENTIALS_LAST
+    cfg = _auth_config()
+    last_cfg, last_credentials = _CONFIG_CREDENTIALS_LAST
+    if cfg is last_cfg:
+        return last_credentials
+
     cfg_username = cfg.get('auth_username', '').strip()
     cfg_password = cfg.get('auth_password', '').strip()
-
-    return cfg_username, cfg_password
+    credentials = (cfg_username, cfg_password)
+    _CONFIG_CREDENTIALS_LAST = (cfg, credentials)
+    return credentials
 
 
 def is_auth_enabled():
@@ -539,16 +700,38 @@ def is_auth_enabled():
     return bool(username and password)
 
 
+def _credentials_digest(username, password):
+    """
+    用户名与密码拼接后的 SHA-256 摘要，用于定长、常数时间比较
+    """
+    return hashlib.sha256(f"{username}\0{password}".encode('utf-8')).digest()
+
+
+def _get_stored_credentials_digest(stored):
+    """
+    已配置凭据 (username, password) 的摘要。
+    get_auth_credentials 在配置未变化时返回同一元组，按身份命中即可，无需逐字符比较存储的密码。
+    """
+    global _CREDENTIALS_DIGEST_LAST
+    last_stored, last_digest = _CREDENTIALS_DIGEST_LAST
+    if stored is last_stored or stored == last_stored:
+        return last_digest
+    digest = _credentials_digest(*stored)
+    _CREDENTIALS_DIGEST_LAST = (stored, digest)
+    return digest
+
+
 def verify_credentials(username, password):
     """
-    验证用户名和密码
+    验证用户名和密码（比较摘要，耗时与输入内容无关）
     """
-    stored_username, stored_password = get_auth_credentials()
+    stored = get_auth_credentials()
+    stored_username, stored_password = stored
 
     if not stored_username or not stored_password:
         return False
 
-    return username == stored_username and password == stored_password
+    return hmac.compare_digest(_credentials_digest(username, password), _get_stored_credentials_digest(stored))
 
 
 def is_authenticated():
@@ -573,18 +756,35 @@ def logout_user():
     session.pop('authenticated', None)
 
 
+def _is_direct_loopback_request():
+    """
+    本机直连（loopback 地址、无转发头、Host 为本机）：与 get_real_ip + 默认白名单的判定结果一致，
+    但无需读取配置或解析 IP
+    """
+    if request.remote_addr not in _LOCAL_CLIENT_IPS:
+        return False
+    headers = request.headers
+    if 'X-Forwarded-For' in headers or 'X-Real-IP' in headers:
+        return False
+    return _is_local_host(request.host)
+
+
 def check_auth():
     """
     检查是否需要认证，返回 True 表示通过（无需认证或已认证）
     """
-    # 白名单内的请求直接放行
-    if is_trusted_request():
+    # 本机直连始终位于默认白名单内，先于任何配置读取放行
+    if _is_direct_loopback_request():
         return True
 
-    # 未启用认证，直接放行
+    # 未启用认证，直接放行（只读缓存配置，先于可能触发 DNS 解析的白名单判断）
     if not is_auth_enabled():
         return True
 
+    # 白名单内的请求直接放行
+    if is_trusted_request():
+        return True
+
     # 检查是否已登录
     return is_authenticated()
 
@@ -730,35 +930,88 @@ LOGIN_PAGE_TEMPLATE = '''
 '''
 
 
-def init_auth(app):
+def _load_secret_key():
     """
-    初始化认证模块，注册相关路由和钩子
+    获取 Session 密钥：优先环境变量，否则读取/生成持久密钥文件（结果进程内缓存）
     """
-    # 设置 Secret Key（用于 Session 加密）
-    if not app.secret_key:
-        # 尝试从环境变量获取，否则生成一个持久的密钥
-        secret_key = os.environ.get('STM_SECRET_KEY')
-        if not secret_key:
+    global _SECRET_KEY
+    secret_key = os.environ.get('STM_SECRET_KEY')
+    if secret_key:
+        return secret_key
+
+    with _SECRET_KEY_LOCK:
+        if _SECRET_KEY is None:
             # 生成随机密钥并存储到配置目录
-            from core.config import DATA_DIR
             key_file = os.path.join(DATA_DIR, '.secret_key')
-            if os.path.exists(key_file):
-                with open(key_file, 'r') as f:
-                    secret_key = f.read().strip()
-            else:
+            try:
+                fd = os.open(key_file, os.O_RDONLY)
+                try:
+                    secret_key = os.read(fd, _SECRET_KEY_READ_LIMIT).decode('utf-8').strip()
+                finally:
+                    os.close(fd)
+            except FileNotFoundError:
+                secret_key = ''
+            except OSError as e:
+                logger.warning(f"读取 Session 密钥文件失败，将重新生成: {e}")
+                secret_key = ''
+            if not secret_key:
                 secret_key = secrets.token_hex(32)
                 try:
-                    with open(key_file, 'w') as f:
-                        f.write(secret_key)
-                except:
-                    pass
-        app.secret_key = secret_key
+                    # 直接以 0600 权限创建，密钥文件不会出现短暂的宽松权限窗口
+                    fd = os.open(key_file, os.O_WRONLY | os.O_CREAT | os.O_TRUNC, 0o600)
+                    try:
+                        os.write(fd, secret_key.encode('utf-8'))
+                    finally:
+                        os.close(fd)
+                except OSError as e:
+                    logger.warning(f"保存 Session 密钥文件失败，重启后登录状态将失效: {e}")
+            _SECRET_KEY = secret_key
+        return _SECRET_KEY
+
+
+class _AccessedRefreshSessionInterface(SecureCookieSessionInterface):
+    """
+    仅在本次请求实际读写过会话时才续期 Cookie。
+    默认实现对持久会话每个请求都重新签名并下发 Set-Cookie，
+    静态资源、白名单放行等不触碰 session 的请求因此白白多做一次 HMAC。
+    """
+
+    def should_set_cookie(self, app, session):
+        if session.modified:
+            return True
+        # 先判断 accessed：读取 permanent 在旧版 Flask 中会把会话标记为已访问
+        return bool(
+            session.accessed
+            and session.permanent
+            and app.config['SESSION_REFRESH_EACH_REQUEST']
+        )
+
+
+def init_auth(app):
+    """
+    初始化认证模块，注册相关路由和钩子
+    """
+    # 设置 Secret Key（用于 Session 加密）
+    if not app.secret_key:
+        app.secret_key = _load_secret_key()
     
     # 配置 Session
+    app.session_interface = _AccessedRefreshSessionInterface()
     app.config['SESSION_COOKIE_HTTPONLY'] = True
     app.config['SESSION_COOKIE_SAMESITE'] = 'Lax'
     app.config['PERMANENT_SESSION_LIFETIME'] = 86400 * 7  # 7 天
 
+    # 登录页模板只编译一次（沿用应用的 Jinja 环境与自动转义设置），不再每次请求重新解析
+    login_template = app.jinja_env.from_string(LOGIN_PAGE_TEMPLATE)
+    # 无错误提示时页面只有 client_ip 一处变量：预先渲染出前后两段，请求时只做转义与拼接
+    ip_slot = '\x00client_ip\x00'
+    login_head, login_tail = login_template.render(error=None, client_ip=ip_slot).split(ip_slot)
+
+    def render_login_page(error=None, client_ip=''):
+        if error:
+            return login_template.render(error=error, client_ip=client_ip)
+        return login_head + str(escape(client_ip)) + login_tail
+
     # === 登录页面路由 ===
     @app.route('/auth/login', methods=['GET', 'POST'])
     def auth_login():
@@ -768,7 +1021,7 @@ def init_auth(app):
         # 锁定模式：需要手动重启
         if _is_hard_locked():
             error = "系统已进入锁定模式，需要后台手动重启"
-            return render_template_string(LOGIN_PAGE_TEMPLATE, error=error, client_ip=client_ip)
+            return render_login_page(error, client_ip)
 
         # 白名单内直接重定向到首页
         if is_trusted_request():
@@ -783,31 +1036,34 @@ def init_auth(app):
             # 登录失败限流/锁定
             now_ts = time.time()
             key = _get_rate_limit_key()
-            with _RATE_LIMIT_LOCK:
-                max_attempts, window_seconds, lockout_seconds = _get_rate_limit_config()
-                hard_lock_threshold = _get_hard_lock_threshold()
-                _cleanup_rate_limit_state(now_ts, window_seconds)
-                locked, remaining = _check_lockout(key, now_ts)
-            if locked:
+            # 配置读取不需要持锁
+            max_attempts, window_seconds, lockout_seconds = _get_rate_limit_config()
+            hard_lock_threshold = _get_hard_lock_threshold()
+            # 读多写少：仍在锁定期内的 key 直接拒绝（单键读取在 GIL 下是原子的），不加锁；
+            # 已过期的锁定与周期清理留到下面唯一的一次加锁里处理
+            locked_until = _LOCKED_UNTIL.get(key)
+            if locked_until and locked_until > now_ts:
+                remaining = max(1, int(locked_until - now_ts))
                 minutes = max(1, int((remaining + 59) / 60))
                 error = f"登录失败次数过多，请在 {minutes} 分钟后再试"
                 logger.warning(f"登录被锁定: {key} 剩余 {remaining}s")
-                return render_template_string(LOGIN_PAGE_TEMPLATE, error=error, client_ip=client_ip)
+                return render_login_page(error, client_ip)
 
-            username = request.form.get('username', '').strip()
-            password = request.form.get('password', '')
+            form = request.form
+            username = form.get('username', '').strip()
+            password = form.get('password', '')
+            login_ok = verify_credentials(username, password)
 
-            if verify_credentials(username, password):
-                login_user()
-                with _RATE_LIMIT_LOCK:
+            # 每次 POST 只进入一次限流锁：清理、重置或记录失败都在同一临界区内完成
+            hard_locked_now = False
+            is_locked = locked = False
+            remaining = 0
+            with _RATE_LIMIT_LOCK:
+                _cleanup_rate_limit_state(now_ts, window_seconds)
+                if login_ok:
                     _reset_failed_logins(key)
                     _reset_global_failures()
-                logger.info(f"用户 '{username}' 从 {client_ip} 登录成功")
-                # 重定向到原始请求页面或首页
-                next_url = request.args.get('next', '/')
-                return redirect(next_url)
-            else:
-                with _RATE_LIMIT_LOCK:
+                else:
                     is_locked = _record_failed_login(
                         key, now_ts, max_attempts, window_seconds, lockout_seconds
                     )
@@ -817,19 +1073,31 @@ def init_auth(app):
                     if _GLOBAL_FAIL_COUNT >= hard_lock_threshold and not _HARD_LOCKED:
                         _HARD_LOCKED = True
                         _HARD_LOCKED_AT = now_ts
+                        hard_locked_now = True
                         logger.error(f"触发锁定模式: 全局连续失败 {_GLOBAL_FAIL_COUNT} 次")
-                        error = "系统已进入锁定模式，需要后台手动重启"
-                        return render_template_string(LOGIN_PAGE_TEMPLATE, error=error, client_ip=client_ip)
-                    locked, remaining = _check_lockout(key, now_ts)
-                if is_locked or locked:
-                    minutes = max(1, int((remaining + 59) / 60))
-                    error = f"登录失败次数过多，请在 {minutes} 分钟后再试"
-                    logger.warning(f"登录被锁定: {key} 剩余 {remaining}s")
-                else:
-                    error = "用户名或密码错误"
-                    logger.warning(f"登录失败: 用户 '{username}' 从 {client_ip}")
+                    else:
+                        locked, remaining = _check_lockout(key, now_ts)
+
+            if login_ok:
+                login_user()
+                logger.info(f"用户 '{username}' 从 {client_ip} 登录成功")
+                # 重定向到原始请求页面或首页
+                next_url = request.args.get('next', '/')
+                return redirect(next_url)
+
+            # 模板渲染放到锁外
+            if hard_locked_now:
+                error = "系统已进入锁定模式，需要后台手动重启"
+                return render_login_page(error, client_ip)
+            if is_locked or locked:
+                minutes = max(1, int((remaining + 59) / 60))
+                error = f"登录失败次数过多，请在 {minutes} 分钟后再试"
+                logger.warning(f"登录被锁定: {key} 剩余 {remaining}s")
+            else:
+                error = "用户名或密码错误"
+                logger.warning(f"登录失败: 用户 '{username}' 从 {client_ip}")
 
-        return render_template_string(LOGIN_PAGE_TEMPLATE, error=error, client_ip=client_ip)
+        return render_login_page(error, client_ip)
 
     # === 登出路由 ===
     @app.route('/auth/logout')
@@ -838,42 +1106,47 @@ def init_auth(app):
         return redirect('/auth/login')
 
     # === 全局认证检查 ===
+    # 免认证前缀按应用实际的静态路径生成一次（默认即 /static/），钩子内只做一次 startswith
+    static_prefix = (app.static_url_path or '').rstrip('/') + '/'
+    exempt_prefixes = _AUTH_EXEMPT_PREFIXES
+    if static_prefix != '/' and static_prefix not in exempt_prefixes:
+        exempt_prefixes = (static_prefix,) + exempt_prefixes
+
+    # 拒绝响应的 JSON 正文是常量，初始化时按应用的 JSON 设置序列化一次；
+    # 每次拒绝只新建一个轻量 Response（after_request 钩子可能改写头部，不能共享同一对象）
+    locked_body = app.json.dumps({
+        'success': False,
+        'error': 'Locked',
+        'message': '系统已进入锁定模式，需要后台手动重启'
+    }) + '\n'
+    unauthorized_body = app.json.dumps({
+        'success': False,
+        'error': 'Unauthorized',
+        'message': '需要登录才能访问此接口'
+    }) + '\n'
+    response_class = app.response_class
+
     @app.before_request
     def check_authentication():
         # 排除静态资源和认证相关路由
-        excluded_paths = (
-            '/static/',
-            '/auth/',
-            '/favicon.ico',
-        )
-        
         path = request.path
-        for excluded in excluded_paths:
-            if path.startswith(excluded):
-                return None
+        if path.startswith(exempt_prefixes):
+            return None
 
         # 锁定模式：需要手动重启
         if _is_hard_locked():
             if path.startswith('/api/'):
-                return jsonify({
-                    'success': False,
-                    'error': 'Locked',
-                    'message': '系统已进入锁定模式，需要后台手动重启'
-                }), 503
+                return response_class(locked_body, status=503, mimetype='application/json')
             return redirect('/auth/login')
         
         # 检查认证
         if not check_auth():
             # API 请求返回 401
             if path.startswith('/api/'):
-                return jsonify({
-                    'success': False,
-                    'error': 'Unauthorized',
-                    'message': '需要登录才能访问此接口'
-                }), 401
+                return response_class(unauthorized_body, status=401, mimetype='application/json')
             
             # 页面请求重定向到登录页
-            return redirect(f'/auth/login?next={request.path}')
+            return redirect(f'/auth/login?next={path}')
         
         return None
 
@@ -885,8 +1158,6 @@ def cli_set_auth(username, password):
     """
     通过命令行设置认证账号密码
     """
-    from core.config import load_config, save_config
-
     cfg = load_config()
     cfg['auth_username'] = username
     cfg['auth_password'] = password
@@ -905,8 +1176,6 @@ def cli_add_trusted_ip(ip):
     """
     通过命令行添加信任地址（IP/网段/域名）
     """
-    from core.config import load_config, save_config
-
     cfg = load_config()
     trusted_ips = cfg.get('auth_trusted_ips', [])
 
@@ -930,7 +1199,6 @@ def cli_show_status():
     显示当前认证状态
     """
     username, password = get_auth_credentials()
-    from core.config import load_config
     cfg = load_config()
     trusted_ips = cfg.get('auth_trusted_ips', [])
     trusted_proxies = cfg.get('auth_trusted_proxies', [])
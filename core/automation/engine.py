@@ -1,133 +1,265 @@
 import re
 import logging
+from functools import lru_cache
 from .constants import *
 
 logger = logging.getLogger(__name__)
 
+
+_REGEX_META = frozenset('.^$*+?{}[]\\|()')
+
+
+@lru_cache(maxsize=256)
+def _compile_regex(pattern, flags):
+    """按 (pattern, flags) 缓存编译结果，批量评估时同一条件只编译一次"""
+    return re.compile(pattern, flags)
+
+
+@lru_cache(maxsize=256)
+def _split_field_path(field_key):
+    """点号路径拆分结果跨卡片复用"""
+    return tuple(field_key.split('.'))
+
+
+@lru_cache(maxsize=256)
+def _prepare_targets(target_value, case_sensitive, multi_match=True):
+    """
+    整理比较目标：含 '|' 的字符串拆分为多个目标（去空白、去空项），
+    不区分大小写时预先转为小写
+    """
+    if multi_match and '|' in target_value:
+        # 每段只 strip 一次
+        targets = [t for t in map(str.strip, target_value.split('|')) if t]
+    else:
+        targets = [target_value]
+    if not case_sensitive:
+        targets = [t.lower() for t in targets]
+    return tuple(targets)
+
+
+@lru_cache(maxsize=256)
+def _sorted_target_list(target):
+    """列表 EQ 比较用的目标：按 ',' 拆分后排序（多重集合相等即排序后相等），按目标缓存"""
+    if ',' in target:
+        return tuple(sorted(t.strip() for t in target.split(',')))
+    return (target,)
+
+
+@lru_cache(maxsize=256)
+def _is_literal_regex(pattern):
+    """正则条件是否只是普通字面量（不含任何元字符），此时可直接做子串查找"""
+    return _REGEX_META.isdisjoint(pattern)
+
+
+def _literal_search(pattern, text, case_sensitive):
+    """
+    字面量正则的快速匹配；结果与 re.search 保持一致。
+    忽略大小写时仅在 lower() 与 re.IGNORECASE 等价的情况下走快速路径，否则返回 None 交给正则引擎。
+    """
+    if case_sensitive:
+        return pattern in text
+    if pattern.lower() == pattern == pattern.upper():
+        # 模式本身无大小写之分（数字、中文等）
+        return pattern in text
+    if pattern.isascii() and text.isascii():
+        return pattern.lower() in text.lower()
+    return None
+
+
+def _wi_entry_dicts(card_data):
+    """整理世界书条目为 dict 列表（兼容 V2 数组 和 V3 字典/数组）"""
+    book = card_data.get('character_book') or {}
+    entries = book.get('entries') or []
+    if isinstance(entries, dict):
+        entries = entries.values()
+    elif not isinstance(entries, list):
+        return []
+    return [e for e in entries if isinstance(e, dict)]
+
+
+def _regex_scripts_of(card_data):
+    """读取正则脚本原始列表（V2/V3 兼容）"""
+    ext = card_data.get('extensions') or {}
+    scripts = ext.get('regex_scripts')
+    if not scripts: scripts = card_data.get('regex_scripts', [])
+    return scripts or []
+
+
+def _tavern_helper_scripts_of(card_data):
+    """
+    读取 ST Helper 脚本原始列表，兼容多版本格式:
+    1) tavern_helper: { scripts: [...] }
+    2) tavern_helper: [["scripts", [...]], ["variables", {...}]]
+    3) TavernHelper_scripts: [...] (更老版本)
+    """
+    ext = card_data.get('extensions') or {}
+    if not isinstance(ext, dict):
+        ext = {}
+
+    helper_data = ext.get('tavern_helper')
+    if helper_data is None:
+        helper_data = ext.get('TavernHelper_scripts')
+    if helper_data is None:
+        helper_data = card_data.get('tavern_helper')
+    if helper_data is None:
+        helper_data = card_data.get('TavernHelper_scripts')
+
+    scripts_list = []
+    if isinstance(helper_data, dict):
+        # 新版字典结构
+        scripts_list = helper_data.get('scripts', [])
+    elif isinstance(helper_data, list):
+        # 旧版列表结构
+        for item in helper_data:
+            # item 应该是 ["scripts", [obj, obj...]]
+            if isinstance(item, list) and len(item) >= 2 and item[0] == 'scripts':
+                if isinstance(item[1], list):
+                    scripts_list = item[1]
+                break
+
+        # 更老版本: 直接是脚本对象数组
+        if not scripts_list and all(isinstance(item, dict) for item in helper_data):
+            scripts_list = helper_data
+    return scripts_list
+
+
+def _unwrap_script_obj(obj):
+    if not isinstance(obj, dict):
+        return None
+    # 更老格式: { type: 'script', value: { name/content/... } }
+    value_obj = obj.get('value')
+    if isinstance(value_obj, dict):
+        return value_obj
+    return obj
+
+
+def _combined_wi_text(card_data, wi_entries):
+    """
+    将 WI 条目内容与备注拼成一个大字符串，作为 character_book_content 的取值，方便全文模糊搜索
+    卡片没有可用的世界书时返回 None，由调用方按普通字段取值
+    """
+    if card_data.get('character_book'):
+        if isinstance(card_data['character_book'].get('entries', []), (list, dict)):
+            return " ".join(
+                str(e.get('content', '')) + " " + str(e.get('comment', '')) for e in wi_entries
+            )
+    return None
+
+
+# 条件开销估计：操作符本身的比较开销 + 需遍历条目/脚本才能取值的字段的额外开销
+_OPERATOR_COST = {
+    OP_EXISTS: 0, OP_NOT_EXISTS: 0,
+    OP_EQ: 1, OP_NEQ: 1, OP_GT: 1, OP_LT: 1, OP_TRUE: 1, OP_FALSE: 1,
+    OP_CONTAINS: 2, OP_NOT_CONTAINS: 2,
+    OP_REGEX: 5,
+}
+
+
+def _condition_cost(prepared_cond):
+    _raw_field, mapped_field, op, _val, _case = prepared_cond
+    cost = _OPERATOR_COST.get(op, 2)
+    if mapped_field in _LIST_FIELD_KEYS or mapped_field == 'character_book_content':
+        cost += 3
+    return cost
+
+
+def _regex_script_values(card_data, specific_target, wi_entries):
+    """正则脚本匹配 (Regex Scripts)"""
+    scripts = _regex_scripts_of(card_data)
+    if isinstance(scripts, list):
+        if specific_target == 'regex_content':
+            # 提取正则内容 regex / findRegex
+            return [str(s.get('findRegex') or s.get('regex') or '') for s in scripts if isinstance(s, dict)]
+        else:
+            # 提取名称 scriptName
+            return [str(s.get('scriptName', '')) for s in scripts if isinstance(s, dict)]
+    return []
+
+
+def _world_info_values(card_data, specific_target, wi_entries):
+    """世界书匹配 (World Info)"""
+    entries = wi_entries if wi_entries is not None else _wi_entry_dicts(card_data)
+    if specific_target == 'wi_content':
+        return [str(e.get('content', '')) for e in entries]
+    elif specific_target == 'wi_name':
+        # 兼容常见世界书标题字段：comment/title/name
+        return [str(e.get('comment') or e.get('title') or e.get('name') or '') for e in entries]
+    else:
+        searchable = []
+        for e in entries:
+            searchable.append(str(e.get('content', '')))
+            searchable.append(str(e.get('comment') or e.get('title') or e.get('name') or ''))
+        return searchable
+
+
+def _tavern_helper_values(card_data, specific_target, wi_entries):
+    """ST Helper 脚本匹配 (Tavern Helper)"""
+    scripts_list = _tavern_helper_scripts_of(card_data)
+    if not scripts_list:
+        return []
+
+    if specific_target == 'st_script_content':
+        # 脚本内容 (Usually 'content')
+        out = []
+        for s in scripts_list:
+            script_obj = _unwrap_script_obj(s)
+            if isinstance(script_obj, dict):
+                out.append(str(script_obj.get('content') or script_obj.get('script') or ''))
+        return out
+    else:
+        # 脚本名称 (Usually 'name')
+        out = []
+        for s in scripts_list:
+            script_obj = _unwrap_script_obj(s)
+            if isinstance(script_obj, dict):
+                out.append(str(script_obj.get('name') or script_obj.get('scriptName') or ''))
+        return out
+
+
+# 取值结果为字符串列表的特殊字段 -> 取值函数；EXISTS/NOT_EXISTS 只需知道列表是否非空
+_LIST_FIELD_HANDLERS = {
+    'extensions.regex_scripts': _regex_script_values,
+    'regex_scripts': _regex_script_values,
+    'character_book': _world_info_values,
+    'extensions.tavern_helper': _tavern_helper_values,
+}
+_LIST_FIELD_KEYS = frozenset(_LIST_FIELD_HANDLERS)
+
+
+def _list_field_has_items(card_data, field_key, wi_entries):
+    """
+    判断特殊列表字段提取后是否非空（与 _get_field_value 结果 != [] 等价），不生成字符串列表
+    """
+    if field_key == 'character_book':
+        return bool(wi_entries)
+    if field_key == 'extensions.tavern_helper':
+        scripts_list = _tavern_helper_scripts_of(card_data)
+        return bool(scripts_list) and any(isinstance(s, dict) for s in scripts_list)
+    scripts = _regex_scripts_of(card_data)
+    return isinstance(scripts, list) and any(isinstance(s, dict) for s in scripts)
+
+
 class AutomationEngine:
     def __init__(self):
         pass
 
-    def _get_field_value(self, card_data, field_key, specific_target=None):
-        """从数据中提取值，支持复杂对象扁平化"""
+    def _get_field_value(self, card_data, field_key, specific_target=None, wi_entries=None):
+        """
+        从数据中提取值，支持复杂对象扁平化
+        wi_entries: 调用方已归一化的世界书条目列表（evaluate 内每张卡只整理一次）
+        """
         if not field_key: return None
         if not isinstance(card_data, dict): return None
         
-        # === 1. 正则脚本匹配 (Regex Scripts) ===
-        if field_key == 'extensions.regex_scripts' or field_key == 'regex_scripts':
-            # V2/V3 兼容读取
-            ext = card_data.get('extensions') or {}
-            scripts = ext.get('regex_scripts')
-            if not scripts: scripts = card_data.get('regex_scripts', [])
-            
-            scripts = scripts or []
-            
-            if isinstance(scripts, list):
-                if specific_target == 'regex_content':
-                    # 提取正则内容 regex / findRegex
-                    return [str(s.get('findRegex') or s.get('regex') or '') for s in scripts if isinstance(s, dict)]
-                else:
-                    # 提取名称 scriptName
-                    return [str(s.get('scriptName', '')) for s in scripts if isinstance(s, dict)]
-            return []
-
-        # === 2. 世界书匹配 (World Info) ===
-        if field_key == 'character_book':
-            book = card_data.get('character_book') or {}
-            # 兼容 V2 数组 和 V3 字典/数组
-            entries = book.get('entries') or []
-            if isinstance(entries, dict):
-                entries = list(entries.values())
-                
-            if isinstance(entries, list):
-                if specific_target == 'wi_content':
-                    return [str(e.get('content', '')) for e in entries if isinstance(e, dict)]
-                elif specific_target == 'wi_name':
-                    # 兼容常见世界书标题字段：comment/title/name
-                    return [
-                        str(e.get('comment') or e.get('title') or e.get('name') or '')
-                        for e in entries
-                        if isinstance(e, dict)
-                    ]
-                else:
-                    searchable = []
-                    for e in entries:
-                        if isinstance(e, dict):
-                            searchable.append(str(e.get('content', '')))
-                            searchable.append(str(e.get('comment') or e.get('title') or e.get('name') or ''))
-                    return searchable
-            return []
-
-        # === 3. ST Helper 脚本匹配 (Tavern Helper) ===
-        if field_key == 'extensions.tavern_helper':
-            # 兼容多版本格式:
-            # 1) tavern_helper: { scripts: [...] }
-            # 2) tavern_helper: [["scripts", [...]], ["variables", {...}]]
-            # 3) TavernHelper_scripts: [...] (更老版本)
-            ext = card_data.get('extensions') or {}
-            if not isinstance(ext, dict):
-                ext = {}
-
-            helper_data = ext.get('tavern_helper')
-            if helper_data is None:
-                helper_data = ext.get('TavernHelper_scripts')
-            if helper_data is None:
-                helper_data = card_data.get('tavern_helper')
-            if helper_data is None:
-                helper_data = card_data.get('TavernHelper_scripts')
-            
-            scripts_list = []
-
-            def _unwrap_script_obj(obj):
-                if not isinstance(obj, dict):
-                    return None
-                # 更老格式: { type: 'script', value: { name/content/... } }
-                value_obj = obj.get('value')
-                if isinstance(value_obj, dict):
-                    return value_obj
-                return obj
-            
-            if isinstance(helper_data, dict):
-                # 新版字典结构
-                scripts_list = helper_data.get('scripts', [])
-            elif isinstance(helper_data, list):
-                # 旧版列表结构
-                for item in helper_data:
-                    # item 应该是 ["scripts", [obj, obj...]]
-                    if isinstance(item, list) and len(item) >= 2 and item[0] == 'scripts':
-                        if isinstance(item[1], list):
-                            scripts_list = item[1]
-                        break
-
-                # 更老版本: 直接是脚本对象数组
-                if not scripts_list and all(isinstance(item, dict) for item in helper_data):
-                    scripts_list = helper_data
-            
-            if not scripts_list:
-                return []
-
-            if specific_target == 'st_script_content':
-                # 脚本内容 (Usually 'content')
-                out = []
-                for s in scripts_list:
-                    script_obj = _unwrap_script_obj(s)
-                    if isinstance(script_obj, dict):
-                        out.append(str(script_obj.get('content') or script_obj.get('script') or ''))
-                return out
-            else:
-                # 脚本名称 (Usually 'name')
-                out = []
-                for s in scripts_list:
-                    script_obj = _unwrap_script_obj(s)
-                    if isinstance(script_obj, dict):
-                        out.append(str(script_obj.get('name') or script_obj.get('scriptName') or ''))
-                return out
+        # === 1~3. 正则脚本 / 世界书 / ST Helper 脚本：按字段键直接分派 ===
+        handler = _LIST_FIELD_HANDLERS.get(field_key)
+        if handler is not None:
+            return handler(card_data, specific_target, wi_entries)
 
         # === 4. 通用嵌套取值 ===
         if '.' in field_key:
-            keys = field_key.split('.')
             value = card_data
-            for k in keys:
+            for k in _split_field_path(field_key):
                 if isinstance(value, dict):
                     value = value.get(k)
                 else:
@@ -138,147 +270,125 @@ class AutomationEngine:
 
     def _check_condition(self, value, operator, target_value, case_sensitive=False):
         """核心判断逻辑"""
-        try:
-            # 1. 空值检查
-            if operator == OP_EXISTS:
-                return value is not None and value != "" and value != []
-            if operator == OP_NOT_EXISTS:
-                return value is None or value == "" or value == []
-
-            if value is None: return False # 其他操作符如果值为 None 默认不匹配
-
-            # 2. 数值比较
-            if operator in [OP_GT, OP_LT]:
-                try:
-                    val_num = float(value)
-                    tgt_num = float(target_value)
-                    return val_num > tgt_num if operator == OP_GT else val_num < tgt_num
-                except:
-                    return False
-
-            # 3. 布尔比较
-            if operator in [OP_TRUE, OP_FALSE]:
-                bool_val = str(value).lower() in ('true', '1', 'yes', 'on')
-                return bool_val is True if operator == OP_TRUE else bool_val is False
+        # 1. 空值检查
+        if operator == OP_EXISTS:
+            return value is not None and value != "" and value != []
+        if operator == OP_NOT_EXISTS:
+            return value is None or value == "" or value == []
+
+        if value is None: return False # 其他操作符如果值为 None 默认不匹配
+
+        # 2. 数值比较
+        if operator in [OP_GT, OP_LT]:
+            try:
+                val_num = float(value)
+                tgt_num = float(target_value)
+            except (TypeError, ValueError, OverflowError):
+                return False
+            return val_num > tgt_num if operator == OP_GT else val_num < tgt_num
 
-            # =========================================================
-            # 增强型字符串/列表比较 (支持 '|' 分割的 OR 逻辑)
-            # =========================================================
-            
-            # 预处理：是否启用多值匹配模式
-            # 条件：操作符不是正则，且 target_value 是字符串并包含 '|'
-            enable_multi_match = (
-                operator != OP_REGEX and 
-                isinstance(target_value, str) and 
-                '|' in target_value
-            )
+        # 3. 布尔比较
+        if operator in [OP_TRUE, OP_FALSE]:
+            bool_val = str(value).lower() in ('true', '1', 'yes', 'on')
+            return bool_val is True if operator == OP_TRUE else bool_val is False
 
-            # 获取待匹配的目标列表
-            targets = []
-            if enable_multi_match:
-                # 分割并去空
-                targets = [t.strip() for t in target_value.split('|') if t.strip()]
-            else:
-                targets = [str(target_value)]
-
-            # 辅助函数：单次比较逻辑 (复用原有的比较核心)
-            def single_check(val, op, tgt, is_case_sensitive):
-                val_str = str(val)
-                tgt_str = str(tgt)
-                
-                if not is_case_sensitive:
-                    val_str = val_str.lower()
-                    tgt_str = tgt_str.lower()
-
-                if op == OP_EQ:
-                    # 如果是列表，EQ 意味着集合相等
-                    if isinstance(val, list):
-                        if ',' in tgt:
-                            target_list = [t.strip() for t in tgt.split(',')]
-                        else:
-                            target_list = [str(tgt)]
-
-                        value_list = [str(v) for v in val]
-
-                        if not is_case_sensitive:
-                            target_list = [t.lower() for t in target_list]
-                            value_list = [v.lower() for v in value_list]
-
-                        return sorted(value_list) == sorted(target_list)
-                    return val_str == tgt_str
-
-                if op == OP_NEQ:
-                    return val_str != tgt_str
-
-                if op == OP_CONTAINS:
-                    if isinstance(val, list):
-                        # 列表包含：只要列表中有任意一项包含/等于目标
-                        if not is_case_sensitive:
-                            return any(tgt_str in str(v).lower() for v in val)
-                        return any(str(tgt) in str(v) for v in val)
-                    else:
-                        # 字符串包含
-                        return tgt_str in val_str
-
-                if op == OP_NOT_CONTAINS:
-                    # CONTAINS 的反向
-                    if isinstance(val, list):
-                        if not is_case_sensitive:
-                            return not any(tgt_str in str(v).lower() for v in val)
-                        return not any(str(tgt) in str(v) for v in val)
-                    else:
-                        return tgt_str not in val_str
-                
+        # =========================================================
+        # 增强型字符串/列表比较 (支持 '|' 分割的 OR 逻辑)
+        # =========================================================
+        
+        # A. 正则模式 (Regex) - 原样保留，正则自带 | 支持
+        if operator == OP_REGEX:
+            pattern = str(target_value)
+            text = str(value)
+            if _is_literal_regex(pattern):
+                matched = _literal_search(pattern, text, case_sensitive)
+                if matched is not None:
+                    return matched
+            flags = 0 if case_sensitive else re.IGNORECASE
+            try:
+                compiled = _compile_regex(pattern, flags)
+            except re.error as e:
+                logger.error(f"Condition check error: {e}")
                 return False
+            return bool(compiled.search(text))
+
+        # 预处理：是否启用多值匹配模式（target_value 是字符串并包含 '|'）
+        # 拆分/小写后的目标元组按 (target_value, 大小写) 缓存，批量评估时不再逐卡重复处理
+        if isinstance(target_value, str):
+            targets = _prepare_targets(target_value, bool(case_sensitive))
+        else:
+            targets = _prepare_targets(str(target_value), bool(case_sensitive), False)
+
+        # 待匹配值的字符串/列表形式只与 value 有关，在遍历多个目标前统一转换一次
+        # （str.lower 自带 ASCII 快速路径，列表项在一次遍历中完成转换与小写）
+        val_str = str(value)
+        val_list = None
+        if case_sensitive:
+            if isinstance(value, list):
+                val_list = [str(v) for v in value]
+        else:
+            val_str = val_str.lower()
+            if isinstance(value, list):
+                val_list = [str(v).lower() for v in value]
+        sorted_val_list = tuple(sorted(val_list)) if operator == OP_EQ and val_list is not None else None
+
+        # 辅助函数：单次比较逻辑 (复用原有的比较核心)
+        def single_check(op, tgt_str):
+
+            if op == OP_EQ:
+                # 如果是列表，EQ 意味着集合相等
+                if val_list is not None:
+                    return sorted_val_list == _sorted_target_list(tgt_str)
+                return val_str == tgt_str
+
+            if op == OP_NEQ:
+                return val_str != tgt_str
+
+            if op == OP_CONTAINS:
+                if val_list is not None:
+                    # 列表包含：只要列表中有任意一项包含/等于目标
+                    return any(tgt_str in v for v in val_list)
+                # 字符串包含
+                return tgt_str in val_str
+
+            if op == OP_NOT_CONTAINS:
+                # CONTAINS 的反向
+                if val_list is not None:
+                    return not any(tgt_str in v for v in val_list)
+                return tgt_str not in val_str
 
-            # === 执行多值逻辑 ===
-            
-            # A. 正则模式 (Regex) - 原样保留，正则自带 | 支持
-            if operator == OP_REGEX:
-                flags = 0 if case_sensitive else re.IGNORECASE
-                return bool(re.search(str(target_value), str(value), flags))
-
-            # B. 肯定类操作符 (EQ, CONTAINS) -> OR 逻辑
-            # 只要有一个目标匹配成功，则返回 True
-            if operator in [OP_EQ, OP_CONTAINS]:
-                for tgt in targets:
-                    if single_check(value, operator, tgt, case_sensitive):
-                        return True
-                return False
+            return False
 
-            # C. 否定类操作符 (NEQ, NOT_CONTAINS) -> AND 逻辑 (NOR)
-            # 必须所有目标都不匹配，才返回 True
-            if operator in [OP_NEQ, OP_NOT_CONTAINS]:
-                for tgt in targets:
-                    # 注意：这里我们调用 single_check 并期望它返回 True (即符合 NEQ/NOT_CONTAINS)
-                    # 如果有一个不符合（即实际上相等或包含了），则整体失败
-                    if not single_check(value, operator, tgt, case_sensitive):
-                        return False
-                return True
+        # === 执行多值逻辑 ===
 
+        # B. 肯定类操作符 (EQ, CONTAINS) -> OR 逻辑
+        # 只要有一个目标匹配成功，则返回 True
+        if operator in [OP_EQ, OP_CONTAINS]:
+            for tgt in targets:
+                if single_check(operator, tgt):
+                    return True
             return False
-        except Exception as e:
-            logger.error(f"Condition check error: {e}")
-            return False
 
-    def evaluate(self, card_data, ruleset, match_if_no_conditions=False):
+        # C. 否定类操作符 (NEQ, NOT_CONTAINS) -> AND 逻辑 (NOR)
+        # 必须所有目标都不匹配，才返回 True
+        if operator in [OP_NEQ, OP_NOT_CONTAINS]:
+            for tgt in targets:
+                # 注意：这里我们调用 single_check 并期望它返回 True (即符合 NEQ/NOT_CONTAINS)
+                # 如果有一个不符合（即实际上相等或包含了），则整体失败
+                if not single_check(operator, tgt):
+                    return False
+            return True
+
+        return False
+
+    def prepare_ruleset(self, ruleset):
         """
-        评估一张卡片，返回执行计划
-        match_if_no_conditions: 如果规则没有条件，是否视为匹配（用于手动执行）
+        将规则集整理为评估用的元组结构，与卡片无关的字段映射/取键只做一次。
+        批量评估同一规则集时，调用方可预先整理并通过 evaluate(prepared=...) 复用；
+        结果是规则集当时的快照，规则被修改后需重新整理。
+        返回 [(规则级是否 AND, ((组内是否 AND, ((raw_field, mapped_field, op, value, case_sensitive), ...)), ...), rule), ...]
         """
-        plan = {
-            "actions": []
-        }
-        
-        # 预处理：将 WI 拼成大字符串方便全文搜索（如果规则里有模糊搜WI的需求）
-        if card_data.get('character_book'):
-            entries = card_data['character_book'].get('entries', [])
-            if isinstance(entries, dict): entries = list(entries.values())
-            if isinstance(entries, list):
-                combined_wi = " ".join([str(e.get('content', '')) + " " + str(e.get('comment', '')) for e in entries if isinstance(e, dict)])
-                card_data['character_book_content'] = combined_wi
-
-        # 遍历规则
+        prepared = []
         for rule in ruleset.get('rules', []):
             if not rule.get('enabled', True): continue
 
@@ -291,66 +401,110 @@ class AutomationEngine:
                     "logic": "AND", # 旧版默认逻辑通常隐含为 AND，或者看 rule.logic (如果前端以前没做 group)
                     "conditions": rule.get('conditions', [])
                 }]
-            
-            # 如果完全没有条件，根据 match_if_no_conditions 参数决定
-            if not rule_groups:
-                if match_if_no_conditions:
-                    # 没有条件但视为匹配，直接收集动作
-                    for action in rule.get('actions', []):
-                        plan['actions'].append(action)
-                    if rule.get('stop_on_match'):
-                        break
-                continue
-            
+
+            groups = []
+            for group in rule_groups:
+                conditions = []
+                for cond in group.get('conditions', []):
+                    raw_field = cond['field']
+                    conditions.append((
+                        raw_field,
+                        FIELD_MAP.get(raw_field, raw_field),
+                        cond['operator'],
+                        cond.get('value'),
+                        bool(cond.get('case_sensitive', False)),
+                    ))
+                # 组内条件互不影响，按估计开销升序（稳定排序）排列，短路时尽量跳过昂贵条件
+                conditions.sort(key=_condition_cost)
+                groups.append((group.get('logic', 'AND').upper() == 'AND', tuple(conditions)))
+
             # 规则级逻辑：组与组之间的关系
             # 默认 OR：即只要有一个组满足，规则就触发（适合：情况A 或 情况B）
             # 用户也可设为 AND：必须满足 组A 且 组B
-            rule_top_logic = rule.get('logic', 'OR').upper() 
-            
-            group_results = []
+            rule_is_and = rule.get('logic', 'OR').upper() == 'AND'
+            prepared.append((rule_is_and, tuple(groups), rule))
+        return prepared
 
-            for group in rule_groups:
-                conditions = group.get('conditions', [])
-                group_logic = group.get('logic', 'AND').upper()
-                
+    def evaluate(self, card_data, ruleset, match_if_no_conditions=False, prepared=None):
+        """
+        评估一张卡片，返回执行计划
+        match_if_no_conditions: 如果规则没有条件，是否视为匹配（用于手动执行）
+        prepared: prepare_ruleset(ruleset) 的结果，批量评估时传入以免每张卡重复整理
+        """
+        plan = {
+            "actions": []
+        }
+        
+        # 预处理：世界书条目每张卡只整理一次，供拼接全文与各 wi_* 条件复用
+        wi_entries = _wi_entry_dicts(card_data)
+
+        # 字段取值缓存：仅在本次评估（单张卡片）内有效；派生值只放在这里，不写回 card_data
+        field_cache = {}
+
+        def iter_cond_results(conditions):
+            for raw_field, mapped_field, op, val, case in conditions:
+                # 取值（同一张卡内相同字段只提取一次）
+                field_key = (mapped_field, raw_field)
+                if (
+                    (op == OP_EXISTS or op == OP_NOT_EXISTS)
+                    and mapped_field in _LIST_FIELD_KEYS
+                    and field_key not in field_cache
+                ):
+                    # 列表字段的存在性判断无需生成完整的字符串列表
+                    has_items = _list_field_has_items(card_data, mapped_field, wi_entries)
+                    yield has_items if op == OP_EXISTS else not has_items
+                    continue
+
+                if mapped_field == 'character_book_content' and field_key not in field_cache:
+                    # 将 WI 拼成大字符串方便全文搜索：仅在有条件引用时才拼接
+                    combined_wi = _combined_wi_text(card_data, wi_entries)
+                    if combined_wi is not None:
+                        field_cache[field_key] = combined_wi
+
+                if field_key in field_cache:
+                    actual_val = field_cache[field_key]
+                else:
+                    actual_val = self._get_field_value(
+                        card_data, mapped_field, specific_target=raw_field, wi_entries=wi_entries
+                    )
+                    field_cache[field_key] = actual_val
+
+                # 判值
+                yield self._check_condition(actual_val, op, val, case)
+
+        def iter_group_results(groups):
+            for group_is_and, conditions in groups:
                 # 如果组内无条件，根据 match_if_no_conditions 参数决定
                 if not conditions:
-                    if match_if_no_conditions:
-                        group_results.append(True)
-                    else:
-                        group_results.append(False)
+                    yield bool(match_if_no_conditions)
                     continue
 
-                cond_results = []
-                for cond in conditions:
-                    raw_field = cond['field']
-                    mapped_field = FIELD_MAP.get(raw_field, raw_field)
-                    
-                    op = cond['operator']
-                    val = cond.get('value')
-                    case = cond.get('case_sensitive', False)
-                    
-                    # 取值
-                    actual_val = self._get_field_value(card_data, mapped_field, specific_target=raw_field)
-                    
-                    # 判值
-                    res = self._check_condition(actual_val, op, val, case)
-                    cond_results.append(res)
-                
                 # 计算 Group 结果
-                if group_logic == 'AND':
-                    group_match = all(cond_results)
+                if group_is_and:
+                    yield all(iter_cond_results(conditions))
                 else: # OR
-                    group_match = any(cond_results)
-                
-                group_results.append(group_match)
-            
-            # 计算 Rule 最终结果
-            is_rule_match = False
-            if rule_top_logic == 'AND':
-                is_rule_match = all(group_results)
+                    yield any(iter_cond_results(conditions))
+
+        if prepared is None:
+            prepared = self.prepare_ruleset(ruleset)
+
+        # 遍历规则
+        for rule_is_and, groups, rule in prepared:
+            # 如果完全没有条件，根据 match_if_no_conditions 参数决定
+            if not groups:
+                if match_if_no_conditions:
+                    # 没有条件但视为匹配，直接收集动作
+                    for action in rule.get('actions', []):
+                        plan['actions'].append(action)
+                    if rule.get('stop_on_match'):
+                        break
+                continue
+
+            # 组/条件结果按需惰性计算：AND 遇到 False、OR 遇到 True 即停止，后续条件不再取值判定
+            if rule_is_and:
+                is_rule_match = all(iter_group_results(groups))
             else: # OR
-                is_rule_match = any(group_results)
+                is_rule_match = any(iter_group_results(groups))
 
             if is_rule_match:
                 logger.info(f"Rule matched: {rule.get('name')}")
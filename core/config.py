@@ -2,7 +2,12 @@ import sys
 import os
 import json
 import logging
+import threading
 
+try:
+    import orjson  # 可选依赖：加速 config.json 解析
+except ImportError:
+    orjson = None
 
 logger = logging.getLogger(__name__)
 
@@ -30,11 +35,27 @@ THUMB_FOLDER = os.path.join(SYSTEM_DIR, 'thumbnails')
 TRASH_FOLDER = os.path.join(SYSTEM_DIR, 'trash')
 TEMP_DIR = os.path.join(DATA_DIR, 'temp')
 
-# 确保核心系统目录存在
-for d in [DATA_DIR, SYSTEM_DIR, DB_FOLDER, THUMB_FOLDER, TRASH_FOLDER, TEMP_DIR]:
-    if not os.path.exists(d):
-        try: os.makedirs(d)
-        except: pass
+_SYSTEM_DIRS_READY = False
+
+
+def ensure_system_dirs():
+    """
+    确保核心系统目录存在（进程内只执行一次）。
+    只需创建叶子目录，DATA_DIR / SYSTEM_DIR 会随 makedirs 一并创建。
+    """
+    global _SYSTEM_DIRS_READY
+    if _SYSTEM_DIRS_READY:
+        return
+    for d in (DB_FOLDER, THUMB_FOLDER, TRASH_FOLDER, TEMP_DIR):
+        try:
+            os.makedirs(d, exist_ok=True)
+        except OSError as e:
+            logger.warning(f"创建系统目录失败 {d}: {e}")
+    _SYSTEM_DIRS_READY = True
+
+
+# 导入即保证目录存在：数据库、缩略图等模块在未经 create_app 的场景（CLI/后台任务）也会直接使用这些路径
+ensure_system_dirs()
 
 # 默认配置
 DEFAULT_CONFIG = {
@@ -220,6 +241,7 @@ def build_default_config(default_overrides=None):
 def write_config_file(path, cfg):
     with open(path, 'w', encoding='utf-8') as f:
         json.dump(normalize_config(cfg), f, ensure_ascii=False, indent=2)
+    _invalidate_config_cache()
 
 
 def ensure_config_file(default_overrides=None, target_path=None):
@@ -230,11 +252,21 @@ def ensure_config_file(default_overrides=None, target_path=None):
     return True
 
 
+def _loads_config_bytes(raw):
+    """解析 config.json 原始字节：有 orjson 时优先使用，不接受的内容（如 NaN）交给标准库。"""
+    if orjson is not None:
+        try:
+            return orjson.loads(raw)
+        except orjson.JSONDecodeError:
+            pass
+    return json.loads(raw)
+
+
 def load_config():
     if os.path.exists(CONFIG_FILE):
         try:
-            with open(CONFIG_FILE, 'r', encoding='utf-8') as f:
-                return normalize_config(json.load(f))
+            with open(CONFIG_FILE, 'rb') as f:
+                return normalize_config(_loads_config_bytes(f.read()))
         except Exception:
             logger.warning(
                 'config.json could not be parsed; falling back to defaults for the current process.'
@@ -242,9 +274,45 @@ def load_config():
             return normalize_config()
     return normalize_config()
 
+# 只读热路径（如每个请求的鉴权检查）使用的配置缓存，键为 (路径, mtime_ns, size)
+_config_cache = {'key': None, 'cfg': None}
+_config_cache_lock = threading.Lock()
+
+
+def _invalidate_config_cache():
+    with _config_cache_lock:
+        _config_cache['key'] = None
+        _config_cache['cfg'] = None
+
+
+def load_config_cached():
+    """
+    按 config.json 的 stat 结果缓存 load_config() 的结果，文件未变化时不再读取与解析。
+    返回的 dict 在调用方之间共享，只能读取；需要修改并保存时请使用 load_config()。
+    """
+    path = CONFIG_FILE
+    try:
+        st = os.stat(path)
+        key = (path, st.st_mtime_ns, st.st_size)
+    except OSError:
+        key = None
+    with _config_cache_lock:
+        if key is not None and _config_cache['key'] == key:
+            return _config_cache['cfg']
+    cfg = load_config()
+    with _config_cache_lock:
+        _config_cache['key'] = key
+        _config_cache['cfg'] = cfg
+    return cfg
+
 class ConfigProxy:
+    """
+    模块级配置只读代理：读取走 load_config_cached()，config.json 未变化时不再重复解析；
+    save_config() 写盘后缓存自动失效。
+    """
+
     def _load(self):
-        return load_config()
+        return load_config_cached()
 
     def get(self, key, default=None):
         return self._load().get(key, default)
@@ -265,7 +333,8 @@ class ConfigProxy:
         return self._load().values()
 
     def to_dict(self):
-        return self._load()
+        # 调用方可能修改返回值，返回独立副本而不是共享缓存
+        return load_config()
 
 def save_config(cfg):
     try:
@@ -300,23 +369,30 @@ def ensure_runtime_dirs(cfg=None):
     return resolved
 
 
+def _get_runtime_folder(key: str) -> str:
+    """
+    解析运行时目录：配置走 stat 缓存，目录已存在时只做一次 isdir 检查
+    （DynamicPath 每次 os.path.join 都会调用到这里）；运行中被删除的目录会在下次访问时重建
+    """
+    path = _resolve_dir(load_config_cached(), key, RUNTIME_DIR_DEFAULTS[key])
+    if not os.path.isdir(path):
+        _ensure_dir(path)
+    return path
+
+
 def get_cards_folder() -> str:
-    cfg = load_config()
-    return _ensure_dir(_resolve_dir(cfg, 'cards_dir', RUNTIME_DIR_DEFAULTS['cards_dir']))
+    return _get_runtime_folder('cards_dir')
 
 def get_world_info_folder() -> str:
-    cfg = load_config()
-    return _ensure_dir(_resolve_dir(cfg, 'world_info_dir', RUNTIME_DIR_DEFAULTS['world_info_dir']))
+    return _get_runtime_folder('world_info_dir')
 
 
 def get_chats_folder() -> str:
-    cfg = load_config()
-    return _ensure_dir(_resolve_dir(cfg, 'chats_dir', RUNTIME_DIR_DEFAULTS['chats_dir']))
+    return _get_runtime_folder('chats_dir')
 
 
 def get_beautify_folder() -> str:
-    cfg = load_config()
-    return _ensure_dir(_resolve_dir(cfg, 'beautify_dir', RUNTIME_DIR_DEFAULTS['beautify_dir']))
+    return _get_runtime_folder('beautify_dir')
 
 class DynamicPath:
     def __init__(self, getter):
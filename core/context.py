@@ -1,6 +1,7 @@
 import threading
 import queue
 import time
+from collections import OrderedDict
 
 from core.data.cache import GlobalMetadataCache
 
@@ -115,6 +116,13 @@ class AppContext:
         # 避免频繁扫描磁盘读取大 JSON
         self.wi_list_cache = {}
         self.wi_list_cache_lock = threading.Lock()
+        # 按来源拆分的未过滤列表：sig -> items，共用 wi_list_cache_lock
+        self.wi_global_cache = OrderedDict()
+        self.wi_resource_cache = OrderedDict()
+        self.wi_embedded_cache = OrderedDict()
+        # 内嵌世界书内容签名 LRU：card_id -> ((path, mtime_ns, size), sig)
+        self.wi_card_sig_cache = OrderedDict()
+        self.wi_card_sig_cache_lock = threading.Lock()
         
         # === 全局元数据缓存 (原 metadata_cache) ===
         # 初始为 None，在 _init_components 中实例化
@@ -1,14 +1,21 @@
 import threading
-import sqlite3
+import bisect
+import functools
+from contextlib import contextmanager
 import json
 import os
 import time
 import logging
 from urllib.parse import quote
 
+try:
+    import orjson  # 可选依赖：加速全量重载时逐行解析 tags
+except ImportError:
+    orjson = None
+
 # === 基础设施 (只导入配置和底层数据操作，不导入 context) ===
 from core.config import CARDS_FOLDER, DEFAULT_DB_PATH
-from core.data.db_session import execute_with_retry
+from core.data.db_session import execute_with_retry, get_pooled_conn
 from core.data.ui_store import (
     load_ui_data,
     get_version_remark,
@@ -22,6 +29,101 @@ from core.data.ui_store import (
 
 logger = logging.getLogger(__name__)
 
+# 重建期间缓存被并发修改时，锁外重建的最大尝试次数
+RELOAD_MAX_ATTEMPTS = 3
+
+
+@functools.lru_cache(maxsize=4096)
+def _quote_dir(dir_path):
+    return quote(dir_path)
+
+
+def _quote_card_id(card_id):
+    """等价于 quote(card_id)：同一目录下的卡片共用目录段的编码结果，只对文件名逐字编码"""
+    head, sep, tail = card_id.rpartition('/')
+    if not sep:
+        return quote(card_id)
+    return _quote_dir(head) + '/' + quote(tail)
+
+
+@functools.lru_cache(maxsize=4096)
+def _category_chain(category):
+    """分类自身及其全部父级路径，由浅到深，如 'a/b/c' -> ('a', 'a/b', 'a/b/c')"""
+    chain = []
+    current_path = ""
+    for part in category.split('/'):
+        current_path = f"{current_path}/{part}" if current_path else part
+        chain.append(current_path)
+    return tuple(chain)
+
+
+def _parse_tags_json(raw):
+    """解析 card_metadata.tags 列的 JSON；为空或无法解析时返回 []"""
+    if not raw:
+        return []
+    if orjson is not None:
+        try:
+            return orjson.loads(raw)
+        except orjson.JSONDecodeError:
+            # orjson 更严格（如 NaN），交给标准库再试一次
+            pass
+    try:
+        return json.loads(raw)
+    except (TypeError, ValueError):
+        return []
+
+
+def _scan_card_folders(root):
+    """
+    用 scandir 一次遍历卡片目录（跳过以 . 开头的隐藏项，不进入符号链接目录，与 os.walk 默认行为一致），
+    相对路径随遍历直接拼接，无需逐个 relpath。
+    返回 (physical_folders, walked_dirs, walked_bundle_dirs)：
+    所有可见子文件夹、实际遍历过的子目录、其中带 .bundle 标记的子目录（均为 '/' 分隔的相对路径）。
+    """
+    physical_folders = set()
+    walked_dirs = set()
+    walked_bundle_dirs = set()
+    pending = [(root, "")]
+    while pending:
+        dir_path, rel_dir = pending.pop()
+        try:
+            with os.scandir(dir_path) as it:
+                entries = list(it)
+        except OSError:
+            # 与 os.walk 一致：无法读取的目录直接跳过
+            continue
+        if rel_dir:
+            physical_folders.add(rel_dir)
+            walked_dirs.add(rel_dir)
+        for entry in entries:
+            name = entry.name
+            try:
+                is_dir = entry.is_dir()
+            except OSError:
+                is_dir = False
+            if name.startswith('.'):
+                if name == '.bundle' and rel_dir and not is_dir:
+                    walked_bundle_dirs.add(rel_dir)
+                continue
+            if not is_dir:
+                continue
+            child_rel = f"{rel_dir}/{name}" if rel_dir else name
+            physical_folders.add(child_rel)
+            try:
+                is_link = entry.is_symlink()
+            except OSError:
+                is_link = False
+            if not is_link:
+                pending.append((entry.path, child_rel))
+    return physical_folders, walked_dirs, walked_bundle_dirs
+
+
+def _set_card_urls(card, card_id, mtime):
+    """按卡片 ID 与修改时间生成图片/缩略图 URL（时间戳用于强制前端重载）"""
+    encoded_id = _quote_card_id(card_id)
+    card['image_url'] = f"/cards_file/{encoded_id}?t={mtime}"
+    card['thumb_url'] = f"/api/thumbnail/{encoded_id}?t={mtime}"
+
 class GlobalMetadataCache:
     """
     全局元数据内存缓存。
@@ -37,6 +139,10 @@ class GlobalMetadataCache:
         self.visible_folders = []       # 可见的文件夹列表 (用于前端目录树)
         self.lock = threading.Lock()    # 读写锁
         self.initialized = False        # 是否已加载完成
+        self._card_positions = {}       # id(card 对象) -> 在 self.cards 中的下标
+        self._card_positions_of = None  # (列表对象, 长度)：列表被整体替换或在外部增删后按需重建
+        self._mutation_seq = 0          # 增量更新计数：全量重载据此判断锁外构建的快照是否已过时
+        self._reload_lock = threading.Lock()  # 串行化全量重载（不阻塞读取方）
 
     def _normalize_tags(self, tags):
         """规范化 tags，兼容 None / 字符串 / 非法类型。"""
@@ -52,12 +158,97 @@ class GlobalMetadataCache:
 
         return [str(t).strip() for t in raw_tags if str(t).strip()]
 
-    def _rebuild_global_tags_locked(self):
-        tags = set()
-        for card in self.id_map.values():
-            for tag in self._normalize_tags(card.get('tags')):
-                tags.add(tag)
-        self.global_tags = sorted(tags)
+    def _apply_tag_change_locked(self, old_tags, new_tags):
+        """
+        按单张卡片的标签变化增量维护全局标签池（有序列表），不再对全部标签重新排序。
+        新标签二分插入；被移除的标签只有在所有卡片都不再使用时才从池中删除。
+        """
+        pool = sorted(self.global_tags) if not isinstance(self.global_tags, list) else list(self.global_tags)
+        new_set = set(new_tags)
+        removed = set(old_tags) - new_set
+
+        if removed:
+            still_used = set()
+            for card in self.id_map.values():
+                for tag in self._normalize_tags(card.get('tags')):
+                    if tag in removed:
+                        still_used.add(tag)
+            for tag in removed - still_used:
+                idx = bisect.bisect_left(pool, tag)
+                if idx < len(pool) and pool[idx] == tag:
+                    del pool[idx]
+
+        for tag in new_set:
+            idx = bisect.bisect_left(pool, tag)
+            if idx == len(pool) or pool[idx] != tag:
+                pool.insert(idx, tag)
+
+        # 整体替换而非原地修改，未加锁的读取方始终看到完整的列表
+        self.global_tags = pool
+
+    def _listed_index_locked(self, card):
+        """
+        返回 card 对象在 self.cards 中的下标（按对象身份），不在列表中返回 None。
+        位置索引与当前列表不一致时整体重建一次，之后的查询与移除都是 O(1)。
+        """
+        cards = self.cards
+        built_for = self._card_positions_of
+        if built_for is None or built_for[0] is not cards or built_for[1] != len(cards):
+            self._reindex_cards_locked()
+        idx = self._card_positions.get(id(card))
+        if idx is not None and cards[idx] is not card:
+            # 列表在外部被重排：重建后再查一次
+            self._reindex_cards_locked()
+            idx = self._card_positions.get(id(card))
+        return idx
+
+    def _reindex_cards_locked(self):
+        cards = self.cards
+        self._card_positions = {id(c): i for i, c in enumerate(cards)}
+        self._card_positions_of = (cards, len(cards))
+
+    def _unlist_card_locked(self, card):
+        """
+        从 self.cards 中移除 card 对象，返回是否确实在列表中。
+        按位置索引定位后原地删除，保持其余卡片的相对顺序；只需顺移其后元素的下标。
+        """
+        idx = self._listed_index_locked(card)
+        if idx is None:
+            return False
+        cards = self.cards
+        del cards[idx]
+        positions = self._card_positions
+        del positions[id(card)]
+        for i in range(idx, len(cards)):
+            positions[id(cards[i])] = i
+        self._card_positions_of = (cards, len(cards))
+        return True
+
+    @contextmanager
+    def mutating(self):
+        """
+        持锁修改缓存，供外部直接写 id_map / bundle_map / visible_folders 或卡片字段的调用方使用。
+        进入时记一次变更，正在锁外重建的 reload_from_db 据此丢弃过期快照。
+        """
+        with self.lock:
+            self._mutation_seq += 1
+            yield self
+
+    def set_bundle_card_locked(self, bundle_dir, bundle_card):
+        """
+        用新的 Bundle 主卡替换列表中同一 bundle_dir 的旧主卡，不存在时插到列表最前。
+        调用方须已持有 self.lock。
+        """
+        self._mutation_seq += 1
+        cards = self.cards
+        for idx, c in enumerate(cards):
+            if c.get('is_bundle') and c.get('bundle_dir') == bundle_dir:
+                self._card_positions.pop(id(c), None)
+                cards[idx] = bundle_card
+                if self._card_positions_of is not None and self._card_positions_of[0] is cards:
+                    self._card_positions[id(bundle_card)] = idx
+                return
+        cards.insert(0, bundle_card)
 
     def update_card_data(self, card_id, new_data):
         """
@@ -65,8 +256,10 @@ class GlobalMetadataCache:
         用于编辑卡片信息后的快速响应。
         """
         with self.lock:
+            self._mutation_seq += 1
             if card_id in self.id_map:
                 card = self.id_map[card_id]
+                old_tags = self._normalize_tags(card.get('tags'))
                 
                 # 1. 处理分类变更导致的计数更新
                 old_category = card.get('category', '')
@@ -86,13 +279,11 @@ class GlobalMetadataCache:
                 
                 # 3. 刷新 URL 时间戳 (强制前端重载图片)
                 mtime = card.get('last_modified', time.time())
-                encoded_id = quote(card['id'])
-                card['image_url'] = f"/cards_file/{encoded_id}?t={mtime}"
-                card['thumb_url'] = f"/api/thumbnail/{encoded_id}?t={mtime}"
+                _set_card_urls(card, card['id'], mtime)
                 
                 # 4. 更新全局标签池
                 if 'tags' in new_data:
-                    self._rebuild_global_tags_locked()
+                    self._apply_tag_change_locked(old_tags, card['tags'])
 
                 return card
             return None
@@ -101,17 +292,20 @@ class GlobalMetadataCache:
         """
         [增量更新] 文件夹移动/重命名时的批量更新。
         """
+        # 前缀只拼接一次，不在逐项比较时重复构造
+        old_dir_prefix = old_path_prefix + '/'
         with self.lock:
+            self._mutation_seq += 1
             new_bundle_map = {}
             for bundle_dir, bundle_card_id in self.bundle_map.items():
                 if bundle_dir == old_path_prefix:
                     remapped_dir = new_path_prefix
-                elif bundle_dir.startswith(old_path_prefix + '/'):
+                elif bundle_dir.startswith(old_dir_prefix):
                     remapped_dir = new_path_prefix + bundle_dir[len(old_path_prefix):]
                 else:
                     remapped_dir = bundle_dir
 
-                if bundle_card_id.startswith(old_path_prefix + '/'):
+                if bundle_card_id.startswith(old_dir_prefix):
                     remapped_card_id = new_path_prefix + bundle_card_id[len(old_path_prefix):]
                 else:
                     remapped_card_id = bundle_card_id
@@ -119,10 +313,7 @@ class GlobalMetadataCache:
                 new_bundle_map[remapped_dir] = remapped_card_id
 
             # 1. 找出所有受影响的卡片 ID
-            affected_ids = []
-            for cid in self.id_map.keys():
-                if cid.startswith(old_path_prefix + '/'):
-                    affected_ids.append(cid)
+            affected_ids = [cid for cid in self.id_map if cid.startswith(old_dir_prefix)]
             
             # 2. 逐个更新
             for old_id in affected_ids:
@@ -137,7 +328,7 @@ class GlobalMetadataCache:
                 old_cat = card['category']
                 if old_cat == old_path_prefix:
                     new_cat = new_path_prefix
-                elif old_cat.startswith(old_path_prefix + '/'):
+                elif old_cat.startswith(old_dir_prefix):
                     new_cat = new_path_prefix + old_cat[len(old_path_prefix):]
                 else:
                     new_cat = new_id.rsplit('/', 1)[0] if '/' in new_id else ""
@@ -149,7 +340,7 @@ class GlobalMetadataCache:
                     b_dir = card.get('bundle_dir', '')
                     if b_dir == old_path_prefix:
                         card['bundle_dir'] = new_path_prefix
-                    elif b_dir.startswith(old_path_prefix + '/'):
+                    elif b_dir.startswith(old_dir_prefix):
                         card['bundle_dir'] = new_path_prefix + b_dir[len(old_path_prefix):]
 
                     remapped_bundle_dir = card.get('bundle_dir', '')
@@ -161,14 +352,11 @@ class GlobalMetadataCache:
                             if not isinstance(version, dict):
                                 continue
                             version_id = str(version.get('id') or '')
-                            if version_id.startswith(old_path_prefix + '/'):
+                            if version_id.startswith(old_dir_prefix):
                                 version['id'] = new_path_prefix + version_id[len(old_path_prefix):]
 
                 # 更新 URL
-                encoded_id = quote(new_id)
-                mtime = card.get('last_modified', 0)
-                card['image_url'] = f"/cards_file/{encoded_id}?t={mtime}"
-                card['thumb_url'] = f"/api/thumbnail/{encoded_id}?t={mtime}"
+                _set_card_urls(card, new_id, card.get('last_modified', 0))
 
                 self.id_map[new_id] = card
 
@@ -182,7 +370,7 @@ class GlobalMetadataCache:
             for f in self.visible_folders:
                 if f == old_path_prefix:
                     new_visible.append(new_path_prefix)
-                elif f.startswith(old_path_prefix + '/'):
+                elif f.startswith(old_dir_prefix):
                     new_visible.append(new_path_prefix + f[len(old_path_prefix):])
                 else:
                     new_visible.append(f)
@@ -197,14 +385,17 @@ class GlobalMetadataCache:
     def update_tags_update(self, card_id, new_tags):
         """[增量更新] 更新标签"""
         with self.lock:
+            self._mutation_seq += 1
             if card_id in self.id_map:
                 card = self.id_map[card_id]
+                old_tags = self._normalize_tags(card.get('tags'))
                 card['tags'] = self._normalize_tags(new_tags)
-                self._rebuild_global_tags_locked()
+                self._apply_tag_change_locked(old_tags, card['tags'])
 
     def move_card_update(self, old_id, new_id, old_category, new_category, new_filename, full_path):
         """[增量更新] 单卡移动/重命名"""
         with self.lock:
+            self._mutation_seq += 1
             if old_id in self.id_map:
                 card = self.id_map.pop(old_id)
                 
@@ -217,10 +408,7 @@ class GlobalMetadataCache:
                 except: 
                     pass
                 
-                encoded_id = quote(new_id)
-                mtime = card.get('last_modified', 0)
-                card['image_url'] = f"/cards_file/{encoded_id}?t={mtime}"
-                card['thumb_url'] = f"/api/thumbnail/{encoded_id}?t={mtime}"
+                _set_card_urls(card, new_id, card.get('last_modified', 0))
                 
                 self.id_map[new_id] = card
 
@@ -271,13 +459,14 @@ class GlobalMetadataCache:
 
     def move_bundle_update(self, old_bundle_path, new_bundle_path, old_category, new_category):
         """[增量更新] Bundle 文件夹移动"""
+        old_bundle_prefix = old_bundle_path + '/'
         with self.lock:
-            entries_to_move = []
+            self._mutation_seq += 1
             count_change = 0
-            
-            for cid in self.id_map.keys():
-                if cid == old_bundle_path or cid.startswith(old_bundle_path + '/'):
-                    entries_to_move.append(cid)
+            entries_to_move = [
+                cid for cid in self.id_map
+                if cid == old_bundle_path or cid.startswith(old_bundle_prefix)
+            ]
 
             for old_id in entries_to_move:
                 card = self.id_map.pop(old_id)
@@ -293,13 +482,10 @@ class GlobalMetadataCache:
                 
                 if card.get('is_bundle'):
                     card['bundle_dir'] = new_bundle_path
-                    if card in self.cards: 
+                    if self._listed_index_locked(card) is not None:
                         count_change = 1 # 只有主显示卡片影响计数
 
-                encoded_id = quote(new_id)
-                mtime = card.get('last_modified', 0)
-                card['image_url'] = f"/cards_file/{encoded_id}?t={mtime}"
-                card['thumb_url'] = f"/api/thumbnail/{encoded_id}?t={mtime}"
+                _set_card_urls(card, new_id, card.get('last_modified', 0))
                 
                 self.id_map[new_id] = card
             
@@ -310,30 +496,32 @@ class GlobalMetadataCache:
     def delete_card_update(self, card_id):
         """[增量更新] 删除卡片"""
         with self.lock:
+            self._mutation_seq += 1
             if card_id in self.id_map:
                 card = self.id_map.pop(card_id)
-                if card in self.cards:
-                    self.cards.remove(card)
+                if self._unlist_card_locked(card):
                     self._update_category_count(card['category'], -1)
     
     def delete_bundle_update(self, bundle_dir):
         """[增量更新] 删除 Bundle"""
+        bundle_prefix = bundle_dir + '/'
         with self.lock:
-            ids_to_remove = []
+            self._mutation_seq += 1
             category = ""
             found_main = False
             
-            for cid, card in self.id_map.items():
-                if (card.get('is_bundle') and card.get('bundle_dir') == bundle_dir) or cid.startswith(bundle_dir + '/'):
-                    ids_to_remove.append(cid)
-                    if card in self.cards:
-                        category = card['category']
-                        found_main = True
+            # Bundle 的主卡与各版本 ID 都位于 bundle_dir/ 之下，一次前缀扫描即可；
+            # 主卡另由 bundle_map 定位（兜底），并一并移除这条已失效的映射
+            ids_to_remove = [cid for cid in self.id_map if cid.startswith(bundle_prefix)]
+            leader_id = self.bundle_map.pop(bundle_dir, None)
+            if leader_id in self.id_map and not leader_id.startswith(bundle_prefix):
+                ids_to_remove.append(leader_id)
             
             for cid in ids_to_remove:
                 card = self.id_map.pop(cid)
-                if card in self.cards:
-                    self.cards.remove(card)
+                if self._unlist_card_locked(card):
+                    category = card['category']
+                    found_main = True
             
             if found_main:
                 self._update_category_count(category, -1)
@@ -341,6 +529,7 @@ class GlobalMetadataCache:
     def add_card_update(self, new_card_data):
         """[增量更新] 新增卡片"""
         with self.lock:
+            self._mutation_seq += 1
             new_card_data['tags'] = self._normalize_tags(new_card_data.get('tags'))
             ui_data = load_ui_data()
 
@@ -364,249 +553,273 @@ class GlobalMetadataCache:
             new_card_data['last_sent_to_st'] = sent_ts
 
             self.cards.append(new_card_data)
+            built_for = self._card_positions_of
+            if built_for is not None and built_for[0] is self.cards and built_for[1] == len(self.cards) - 1:
+                self._card_positions[id(new_card_data)] = len(self.cards) - 1
+                self._card_positions_of = (self.cards, len(self.cards))
             self.id_map[new_card_data['id']] = new_card_data
             
             self._update_category_count(new_card_data['category'], 1)
             
-            if isinstance(self.global_tags, list):
-                temp_tags = set(self.global_tags)
-            else:
-                temp_tags = self.global_tags
-            for t in new_card_data['tags']:
-                temp_tags.add(t)
-            self.global_tags = sorted(list(temp_tags))
+            self._apply_tag_change_locked((), new_card_data['tags'])
 
     def _update_category_count(self, category, delta):
         """递归更新分类计数"""
         if not category: return
-        parts = category.split('/')
-        current_path = ""
-        for part in parts:
-            current_path = f"{current_path}/{part}" if current_path else part
-            if current_path not in self.category_counts:
-                self.category_counts[current_path] = 0
-            self.category_counts[current_path] += delta
-            if self.category_counts[current_path] < 0:
-                 self.category_counts[current_path] = 0
+        counts = self.category_counts
+        for current_path in _category_chain(category):
+            value = counts.get(current_path, 0) + delta
+            counts[current_path] = value if value > 0 else 0
 
     def _recalculate_counts(self):
-        """全量重算分类计数 (用于复杂移动操作后)"""
-        self.category_counts = {}
+        """全量重算分类计数 (用于复杂移动操作后)：先按分类汇总直属卡片数，再逐个分类展开父级"""
+        direct_counts = {}
         for card in self.cards:
             cat = card['category']
-            self._update_category_count(cat, 1)
+            direct_counts[cat] = direct_counts.get(cat, 0) + 1
+
+        counts = {}
+        for cat, n in direct_counts.items():
+            if not cat: continue
+            for current_path in _category_chain(cat):
+                counts[current_path] = counts.get(current_path, 0) + n
+        self.category_counts = counts
 
     def reload_from_db(self):
         """
         [全量加载] 从数据库和 UI Store 读取所有数据并重建内存缓存。
         此操作通常在后台线程执行。
+        遍历文件夹、读库与重建都在锁外完成，self.lock 只在最后整体替换各字段时持有；
+        若重建期间有增量更新写入了缓存，则丢弃该快照并在锁外重新构建，避免这些更新被旧快照覆盖。
         """
-        def _do_fetch_all():
-            # 使用独立连接，确保线程安全
-            conn = sqlite3.connect(DEFAULT_DB_PATH, timeout=30)
-            conn.row_factory = sqlite3.Row
-            cursor = conn.cursor()
-            cursor.execute("""
-                SELECT id, char_name, tags, category, creator, 
-                       char_version, last_modified, file_hash, token_count, is_favorite
-                FROM card_metadata
-            """)
-            rows = cursor.fetchall()
-            conn.close()
-            return rows
-
-        with self.lock:
+        with self._reload_lock:
             try:
-                physical_folders = set()
-                try:
-                    for root, dirs, files in os.walk(CARDS_FOLDER):
-                        # 排除以 . 开头的隐藏目录 (如 .trash, .git)
-                        dirs[:] = [d for d in dirs if not d.startswith('.')]
-                        
-                        # 计算相对路径
-                        rel_path = os.path.relpath(root, CARDS_FOLDER)
-                        if rel_path == ".":
-                            # 根目录下的子文件夹
-                            for d in dirs:
-                                physical_folders.add(d)
-                        else:
-                            # 子目录下的子文件夹
-                            current_rel = rel_path.replace('\\', '/')
-                            physical_folders.add(current_rel)
-                            for d in dirs:
-                                physical_folders.add(f"{current_rel}/{d}")
-                except Exception as fs_e:
-                    logger.error(f"Scanning physical folders failed: {fs_e}")
-
-                # 1. 加载数据
-                ui_data = load_ui_data()
-                ui_data_stale_cleaned = False
-                rows = execute_with_retry(_do_fetch_all, max_retries=5)
-                
-                raw_cards = []
-                for row in rows:
-                    try: 
-                        tags = json.loads(row['tags']) if row['tags'] else []
-                    except: 
-                        tags = []
-                    tags = self._normalize_tags(tags)
-                    
-                    card_id = row['id'].replace('\\', '/')
-                    dir_path = card_id.rsplit('/', 1)[0] if '/' in card_id else ""
-
-                    card_data = {
-                        "id": card_id,
-                        "filename": os.path.basename(card_id),
-                        "char_name": row['char_name'],
-                        "tags": tags,
-                        "category": row['category'].replace('\\', '/'),
-                        "creator": row['creator'],
-                        "char_version": row['char_version'],
-                        "last_modified": row['last_modified'],
-                        "file_hash": row['file_hash'],
-                        "token_count": row['token_count'] if 'token_count' in row.keys() else 0,
-                        "dir_path": dir_path,
-                        "is_bundle": False, 
-                        "versions": [],
-                        "is_favorite": bool(row['is_favorite']),
-                    }
-                    raw_cards.append(card_data)
-
-                # 2. 处理 Bundle 聚合逻辑
-                bundle_dirs = set()
-                unique_dirs = set(c['dir_path'] for c in raw_cards)
-                
-                # 扫描文件系统确认 .bundle 标记 (这步可能略慢，但通常文件夹不多)
-                for d in unique_dirs:
-                    if not d: continue
-                    sys_path_d = d.replace('/', os.sep)
-                    full_dir_path = os.path.join(CARDS_FOLDER, sys_path_d)
-                    if os.path.exists(os.path.join(full_dir_path, '.bundle')):
-                        bundle_dirs.add(d)
-
-                final_cards = []
-                bundles = {}
-                new_bundle_map = {}
-
-                old_bundle_map = dict(self.bundle_map)
-                unbundled_dirs = set(old_bundle_map.keys()) - bundle_dirs
-
-                if unbundled_dirs:
-                    for unbundled_dir in unbundled_dirs:
-                        migrated = migrate_bundle_remarks_to_versions(ui_data, unbundled_dir)
-                        if migrated > 0:
-                            ui_data_stale_cleaned = True
-
-                for card in raw_cards:
-                    d = card['dir_path']
-                    if d in bundle_dirs:
-                        if d not in bundles: bundles[d] = []
-                        bundles[d].append(card)
-                    else:
-                        if self._enrich_card_ui(card, ui_data, is_bundle=False):
-                            ui_data_stale_cleaned = True
-                        final_cards.append(card)
-
-                # 聚合 Bundle 版本
-                for dir_path, version_list in bundles.items():
-                    if not version_list: continue
-                    # 按时间倒序，最新的为主版本
-                    version_list.sort(key=lambda x: x['last_modified'], reverse=True)
-                    latest_card = version_list[0]
-
-                    bundle_card = latest_card.copy()
-                    bundle_card['is_bundle'] = True
-                    bundle_card['bundle_dir'] = dir_path
-
-                    bundle_card['versions'] = []
-                    cover_id = latest_card['id']
-                    for v in version_list:
-                        ver_info = {
-                            "id": v['id'],
-                            "filename": v['filename'],
-                            "last_modified": v['last_modified'],
-                            "import_time": get_import_time(ui_data, v['id'], v['last_modified']),
-                            "char_version": v.get('char_version', '')
-                        }
-                        ver_remark = get_version_remark(ui_data, dir_path, v['id'], cover_id)
-                        if ver_remark:
-                            ver_info['ui_summary'] = ver_remark.get('summary', '')
-                            ver_info['source_link'] = ver_remark.get('link', '')
-                            ver_info['resource_folder'] = ver_remark.get('resource_folder', '')
-                        bundle_card['versions'].append(ver_info)
-
-                    # 分类为 Bundle 所在文件夹的父级
-                    bundle_card['category'] = dir_path.rsplit('/', 1)[0] if '/' in dir_path else ""
-
-                    if self._enrich_card_ui(bundle_card, ui_data, is_bundle=True):
-                        ui_data_stale_cleaned = True
-                    final_cards.append(bundle_card)
-                    new_bundle_map[dir_path] = bundle_card['id']
-
-                    valid_version_ids = {v['id'] for v in bundle_card['versions']}
-                    if cleanup_stale_version_remarks(ui_data, dir_path, valid_version_ids):
-                        ui_data_stale_cleaned = True
-
-                if ui_data_stale_cleaned:
-                    save_ui_data(ui_data)
-
-                # 3. 统计计数和标签
-                new_global_tags = set()
-                new_cat_counts = {}
-                bundle_paths = set(bundle_dirs)
-                # 用于推导文件夹列表
-                derived_folders = set()
-
-                for c in final_cards:
-                    for t in self._normalize_tags(c.get('tags')):
-                        new_global_tags.add(t)
-                    
-                    cat = c['category']
-                    if cat: derived_folders.add(cat)
-                    if cat not in new_cat_counts: new_cat_counts[cat] = 0
-                    new_cat_counts[cat] += 1
-                    
-                    # 递归统计父分类
-                    if cat != "":
-                        parts = cat.split('/')
-                        current = ""
-                        for part in parts:
-                            current = f"{current}/{part}" if current else part
-                            derived_folders.add(current) # 记录父级分类
-                            if current != cat:
-                                if current not in new_cat_counts: new_cat_counts[current] = 0
-                                new_cat_counts[current] += 1
-
-                # 4. 更新实例状态
-                self.cards = final_cards
-                self.id_map = {c['id']: c for c in final_cards}
-                self.bundle_map = new_bundle_map
-                self.global_tags = sorted(list(new_global_tags))
-                self.category_counts = new_cat_counts
-                all_visible = derived_folders.union(physical_folders)
-                # 过滤掉 Bundle 文件夹本身 (Bundle 应该作为卡片显示，而不是文件夹)
-                self.visible_folders = [
-                    f for f in sorted(list(all_visible)) 
-                    if f not in bundle_paths and f != "" and f != "."
-                ]
-                
-                # 确保空文件夹也有计数条目 (0)
-                for f in self.visible_folders:
-                    if f not in new_cat_counts:
-                        new_cat_counts[f] = 0
-                
-                self.initialized = True
-                logger.info(f"Cache reloaded: {len(self.cards)} items (including bundles).")
+                for attempt in range(RELOAD_MAX_ATTEMPTS):
+                    with self.lock:
+                        seq_at_start = self._mutation_seq
+                        old_bundle_map = dict(self.bundle_map)
+
+                    snapshot = self._build_snapshot(old_bundle_map)
+
+                    with self.lock:
+                        # 尚未初始化时最后一次尝试直接采用：空缓存上不存在需要保留的增量更新
+                        last_attempt = attempt == RELOAD_MAX_ATTEMPTS - 1
+                        if self._mutation_seq == seq_at_start or (last_attempt and not self.initialized):
+                            (
+                                self.cards, self.id_map, self.bundle_map, self.global_tags,
+                                self.category_counts, self.visible_folders,
+                            ) = snapshot
+                            self._reindex_cards_locked()
+                            self.initialized = True
+                            break
+                else:
+                    # 写入持续不断：保留已包含这些增量更新的现有缓存，由下一次重载再对齐
+                    logger.warning("Cache reload skipped: cache kept changing during rebuild.")
+                    return
+                logger.info(f"Cache reloaded: {len(snapshot[0])} items (including bundles).")
                 
             except Exception as e:
                 logger.error(f"Cache reload error: {e}")
                 # 保持旧数据，防止应用崩溃
 
+    def _build_snapshot(self, old_bundle_map):
+        """
+        按数据库、文件夹与 UI Store 构建一份完整的缓存快照，不读写实例状态。
+        old_bundle_map: 上一次的 Bundle 映射，用于迁移已取消聚合目录的版本备注
+        返回 (cards, id_map, bundle_map, global_tags, category_counts, visible_folders)
+        """
+        def _do_fetch_all():
+            # 借用进程级池化连接：已开启 WAL 与 mmap，全表扫描直接走页缓存，也免去每次重载重新打开数据库
+            with get_pooled_conn(DEFAULT_DB_PATH) as conn:
+                cursor = conn.cursor()
+                # 元组行 + 按位解包，比 sqlite3.Row 的按名访问开销更小
+                cursor.row_factory = None
+                cursor.execute("""
+                    SELECT id, char_name, tags, category, creator, 
+                           char_version, last_modified, file_hash, token_count, is_favorite
+                    FROM card_metadata
+                """)
+                return cursor.fetchall()
+
+        # 遍历目录时顺带记录 .bundle 标记：已遍历到的目录无需再逐个 stat
+        try:
+            physical_folders, walked_dirs, walked_bundle_dirs = _scan_card_folders(CARDS_FOLDER)
+        except Exception as fs_e:
+            logger.error(f"Scanning physical folders failed: {fs_e}")
+            physical_folders, walked_dirs, walked_bundle_dirs = set(), set(), set()
+
+        # 1. 加载数据
+        ui_data = load_ui_data()
+        ui_data_stale_cleaned = False
+        rows = execute_with_retry(_do_fetch_all, max_retries=5)
+        
+        final_cards = []
+        bundles = {}
+        new_bundle_map = {}
+
+        # 目录是否为 Bundle（.bundle 标记）：遍历时已见过的目录直接用遍历结果，其余目录（如遍历失败）才 stat，每个目录只判断一次
+        dir_is_bundle = {"": False}
+
+        def _is_bundle_dir(d):
+            flag = dir_is_bundle.get(d)
+            if flag is None:
+                if d in walked_dirs:
+                    flag = d in walked_bundle_dirs
+                else:
+                    sys_path_d = d.replace('/', os.sep)
+                    full_dir_path = os.path.join(CARDS_FOLDER, sys_path_d)
+                    flag = os.path.exists(os.path.join(full_dir_path, '.bundle'))
+                dir_is_bundle[d] = flag
+            return flag
+
+        # 不再是 Bundle 的旧聚合目录：先迁移版本备注，随后散卡的 UI 数据才能读到迁移结果
+        for old_dir in old_bundle_map:
+            if not _is_bundle_dir(old_dir):
+                migrated = migrate_bundle_remarks_to_versions(ui_data, old_dir)
+                if migrated > 0:
+                    ui_data_stale_cleaned = True
+
+        # 统计标签与各分类的直属卡片数：与列表构建同一趟完成
+        new_global_tags = set()
+        direct_cat_counts = {}
+
+        def _tally(c):
+            for t in self._normalize_tags(c.get('tags')):
+                new_global_tags.add(t)
+            cat = c['category']
+            direct_cat_counts[cat] = direct_cat_counts.get(cat, 0) + 1
+
+        for (
+            row_id, char_name, tags_json, category, creator,
+            char_version, last_modified, file_hash, token_count, is_favorite,
+        ) in rows:
+            tags = self._normalize_tags(_parse_tags_json(tags_json))
+            
+            card_id = row_id.replace('\\', '/')
+            dir_path = card_id.rsplit('/', 1)[0] if '/' in card_id else ""
+
+            card_data = {
+                "id": card_id,
+                "filename": os.path.basename(card_id),
+                "char_name": char_name,
+                "tags": tags,
+                "category": category.replace('\\', '/'),
+                "creator": creator,
+                "char_version": char_version,
+                "last_modified": last_modified,
+                "file_hash": file_hash,
+                "token_count": token_count,
+                "dir_path": dir_path,
+                "is_bundle": False, 
+                "versions": [],
+                "is_favorite": bool(is_favorite),
+            }
+
+            # 2. 处理 Bundle 聚合逻辑：Bundle 内的版本先归组，散卡直接补全 UI 数据入列
+            if _is_bundle_dir(dir_path):
+                if dir_path not in bundles: bundles[dir_path] = []
+                bundles[dir_path].append(card_data)
+            else:
+                if self._enrich_card_ui(card_data, ui_data, is_bundle=False):
+                    ui_data_stale_cleaned = True
+                final_cards.append(card_data)
+                _tally(card_data)
+
+        # 仍带 .bundle 标记但已没有卡片的旧聚合目录，同样视为取消聚合
+        for old_dir in old_bundle_map:
+            if old_dir not in bundles and _is_bundle_dir(old_dir):
+                migrated = migrate_bundle_remarks_to_versions(ui_data, old_dir)
+                if migrated > 0:
+                    ui_data_stale_cleaned = True
+
+        # 聚合 Bundle 版本
+        for dir_path, version_list in bundles.items():
+            if not version_list: continue
+            # 按时间倒序，最新的为主版本
+            version_list.sort(key=lambda x: x['last_modified'], reverse=True)
+            latest_card = version_list[0]
+
+            bundle_card = latest_card.copy()
+            bundle_card['is_bundle'] = True
+            bundle_card['bundle_dir'] = dir_path
+
+            bundle_card['versions'] = []
+            cover_id = latest_card['id']
+            for v in version_list:
+                ver_info = {
+                    "id": v['id'],
+                    "filename": v['filename'],
+                    "last_modified": v['last_modified'],
+                    "import_time": get_import_time(ui_data, v['id'], v['last_modified']),
+                    "char_version": v.get('char_version', '')
+                }
+                ver_remark = get_version_remark(ui_data, dir_path, v['id'], cover_id)
+                if ver_remark:
+                    ver_info['ui_summary'] = ver_remark.get('summary', '')
+                    ver_info['source_link'] = ver_remark.get('link', '')
+                    ver_info['resource_folder'] = ver_remark.get('resource_folder', '')
+                bundle_card['versions'].append(ver_info)
+
+            # 分类为 Bundle 所在文件夹的父级
+            bundle_card['category'] = dir_path.rsplit('/', 1)[0] if '/' in dir_path else ""
+
+            if self._enrich_card_ui(bundle_card, ui_data, is_bundle=True):
+                ui_data_stale_cleaned = True
+            final_cards.append(bundle_card)
+            _tally(bundle_card)
+            new_bundle_map[dir_path] = bundle_card['id']
+
+            valid_version_ids = {v['id'] for v in bundle_card['versions']}
+            if cleanup_stale_version_remarks(ui_data, dir_path, valid_version_ids):
+                ui_data_stale_cleaned = True
+
+        if ui_data_stale_cleaned:
+            save_ui_data(ui_data)
+
+        bundle_paths = set(bundles)
+
+        # 3. 按分类（而非逐卡）展开父级路径，累加递归计数
+        new_cat_counts = {}
+        # 用于推导文件夹列表
+        derived_folders = set()
+        for cat, n in direct_cat_counts.items():
+            new_cat_counts[cat] = new_cat_counts.get(cat, 0) + n
+            if cat == "":
+                continue
+            derived_folders.add(cat)
+            for current in _category_chain(cat):
+                derived_folders.add(current) # 记录父级分类
+                if current != cat:
+                    new_cat_counts[current] = new_cat_counts.get(current, 0) + n
+
+        all_visible = derived_folders.union(physical_folders)
+        # 过滤掉 Bundle 文件夹本身 (Bundle 应该作为卡片显示，而不是文件夹)
+        visible_folders = [
+            f for f in sorted(list(all_visible)) 
+            if f not in bundle_paths and f != "" and f != "."
+        ]
+        
+        # 确保空文件夹也有计数条目 (0)
+        for f in visible_folders:
+            if f not in new_cat_counts:
+                new_cat_counts[f] = 0
+
+        return (
+            final_cards,
+            {c['id']: c for c in final_cards},
+            new_bundle_map,
+            sorted(list(new_global_tags)),
+            new_cat_counts,
+            visible_folders,
+        )
+
     def toggle_favorite_update(self, card_id, new_status):
         """[增量更新] 更新卡片收藏状态"""
         with self.lock:
-            if card_id in self.id_map:
-                self.id_map[card_id]['is_favorite'] = new_status
+            self._mutation_seq += 1
+            card = self.id_map.get(card_id)
+            if card is not None:
+                card['is_favorite'] = new_status
                 return True
             return False
 
@@ -642,10 +855,7 @@ class GlobalMetadataCache:
         card['last_sent_to_st'] = get_last_sent_to_st(ui_data, key)
 
         # 预计算 URL
-        mtime = int(card.get('last_modified', 0))
-        encoded_id = quote(card['id'])
-        card['image_url'] = f"/cards_file/{encoded_id}?t={mtime}"
-        card['thumb_url'] = f"/api/thumbnail/{encoded_id}?t={mtime}"
+        _set_card_urls(card, card['id'], int(card.get('last_modified', 0)))
 
         return import_time_changed
 
@@ -1,8 +1,11 @@
 import os
 import time
+import queue
 import sqlite3
 import json
 import logging
+import threading
+from contextlib import contextmanager
 from flask import g
 
 # === 基础设施 ===
@@ -46,6 +49,92 @@ def close_connection(exception):
     if db is not None:
         db.close()
 
+# === 进程级连接池 ===
+# 供不依赖 Flask g 的短小查询复用连接（如世界书剪切板），避免每次请求都重新打开数据库文件
+DB_POOL_SIZE = 4
+DB_POOL_CACHED_STATEMENTS = 256
+# 池化连接的内存映射窗口（256MB），读页直接走 mmap，免去 pread 系统调用
+DB_POOL_MMAP_SIZE = 256 * 1024 * 1024
+_db_pools = {}
+_db_pools_lock = threading.Lock()
+
+
+def _open_pooled_connection(db_path):
+    # 池化连接长期存活，预编译语句缓存跨请求复用
+    conn = sqlite3.connect(
+        db_path,
+        timeout=10,
+        check_same_thread=False,
+        isolation_level=None,
+        cached_statements=DB_POOL_CACHED_STATEMENTS,
+    )
+    conn.row_factory = sqlite3.Row
+    try:
+        conn.execute("PRAGMA journal_mode=WAL;")
+        conn.execute("PRAGMA synchronous=NORMAL;")
+        conn.execute("PRAGMA temp_store=MEMORY;")
+        conn.execute(f"PRAGMA mmap_size={DB_POOL_MMAP_SIZE};")
+    except Exception as e:
+        logger.warning(f"Failed to apply pooled connection pragmas: {e}")
+    return conn
+
+
+def _db_file_identity(db_path):
+    """数据库文件的 (设备号, inode)；文件不存在时返回 None。"""
+    try:
+        st = os.stat(db_path)
+    except OSError:
+        return None
+    return (st.st_dev, st.st_ino)
+
+
+@contextmanager
+def get_pooled_conn(db_path=None):
+    """
+    从进程级连接池借出一个连接（autocommit 模式，需要事务时显式 BEGIN）。
+    借出时核对数据库文件身份：文件被替换（备份还原、重置）后丢弃仍指向旧文件的连接。
+    归还时回滚未提交的事务；池已满则直接关闭多余连接。
+    """
+    db_path = db_path or DEFAULT_DB_PATH
+    with _db_pools_lock:
+        pool = _db_pools.get(db_path)
+        if pool is None:
+            pool = _db_pools[db_path] = queue.LifoQueue(maxsize=DB_POOL_SIZE)
+    current_identity = _db_file_identity(db_path)
+    conn = None
+    while conn is None:
+        try:
+            conn, identity = pool.get_nowait()
+        except queue.Empty:
+            conn = _open_pooled_connection(db_path)
+            identity = _db_file_identity(db_path)
+            break
+        if identity != current_identity:
+            conn.close()
+            conn = None
+
+    healthy = True
+    try:
+        yield conn
+    except sqlite3.Error:
+        healthy = False
+        raise
+    finally:
+        try:
+            if conn.in_transaction:
+                conn.rollback()
+        except sqlite3.Error:
+            healthy = False
+        if healthy:
+            try:
+                pool.put_nowait((conn, identity))
+                conn = None
+            except queue.Full:
+                pass
+        if conn is not None:
+            conn.close()
+
+
 def execute_with_retry(func, max_retries=5, delay=0.1):
     """
     数据库操作重试包装器。
@@ -1,6 +1,7 @@
 import os
 import json
 import logging
+import threading
 import time
 from core.config import DB_FOLDER
 from core.consts import RESERVED_RESOURCE_NAMES
@@ -10,6 +11,10 @@ UI_DATA_FILE = os.path.join(DB_FOLDER, 'ui_data.json')
 
 logger = logging.getLogger(__name__)
 
+# 只读快照缓存：key = (文件路径, mtime_ns, 文件大小)
+_ui_data_snapshot = {'key': None, 'data': None}
+_ui_data_snapshot_lock = threading.Lock()
+
 VERSION_REMARKS_KEY = '_version_remarks'
 IMPORT_TIME_KEY = 'import_time'
 LAST_SENT_TO_ST_KEY = 'last_sent_to_st'
@@ -1261,6 +1266,31 @@ def load_ui_data():
             return {}
     return {}
 
+
+def load_ui_data_snapshot():
+    """
+    只读场景使用的 UI 数据快照（如列表、详情接口）。
+    按文件 (路径, mtime, 大小) 缓存解析结果，文件未变化时不再重复解析。
+
+    注意：返回的字典在请求间共享，调用方不得修改；需要修改并保存时请使用 load_ui_data()。
+    """
+    try:
+        st = os.stat(UI_DATA_FILE)
+        key = (UI_DATA_FILE, st.st_mtime_ns, st.st_size)
+    except OSError:
+        key = (UI_DATA_FILE, None, None)
+
+    with _ui_data_snapshot_lock:
+        if _ui_data_snapshot['key'] == key:
+            return _ui_data_snapshot['data']
+
+    data = load_ui_data()
+    with _ui_data_snapshot_lock:
+        _ui_data_snapshot['key'] = key
+        _ui_data_snapshot['data'] = data
+    return data
+
+
 def save_ui_data(data):
     """
     保存 UI 辅助数据到 JSON 文件。
@@ -1268,6 +1298,9 @@ def save_ui_data(data):
     Args:
         data (dict): 要保存的数据字典。
     """
+    with _ui_data_snapshot_lock:
+        _ui_data_snapshot['key'] = None
+        _ui_data_snapshot['data'] = None
     try:
         # 确保父目录存在
         parent_dir = os.path.dirname(UI_DATA_FILE)
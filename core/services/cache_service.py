@@ -71,6 +71,7 @@ def update_card_cache(card_id, full_path, *, parsed_info=None, file_hash=None, f
     通常由 API 路由或扫描器调用。
     使用 get_db()，因此必须在请求上下文或手动推送的上下文中运行。
     """
+    invalidate_wi_card_sig_cache(card_id)
     try:
         conn = get_db()
         cursor = conn.cursor()
@@ -154,7 +155,18 @@ def update_card_cache(card_id, full_path, *, parsed_info=None, file_hash=None, f
             'previous_has_embedded_wi': False,
         })
 
+def invalidate_wi_card_sig_cache(card_id=None):
+    """失效内嵌世界书签名缓存；card_id 为空时全部清空"""
+    with ctx.wi_card_sig_cache_lock:
+        if card_id is None:
+            ctx.wi_card_sig_cache.clear()
+        else:
+            ctx.wi_card_sig_cache.pop(card_id, None)
+
 def invalidate_wi_list_cache():
     """主动失效：解决 overwrite 保存不改目录mtime 的情况"""
     with ctx.wi_list_cache_lock:
         ctx.wi_list_cache.clear()
+        ctx.wi_global_cache.clear()
+        ctx.wi_resource_cache.clear()
+        ctx.wi_embedded_cache.clear()
@@ -1271,18 +1271,19 @@ def sync_card_names_internal(
                 )
 
                 if old_cache_item and old_cache_item.get('is_bundle'):
-                    bundle_dir = old_cache_item.get('bundle_dir')
-                    if bundle_dir:
-                        ctx.cache.bundle_map[bundle_dir] = new_id
-
-                    # 维护 bundle versions 列表中的主版本 ID/文件名，避免短时间内显示旧值
-                    new_cache_item = ctx.cache.id_map.get(new_id)
-                    versions = new_cache_item.get('versions', []) if isinstance(new_cache_item, dict) else []
-                    for ver in versions:
-                        if ver.get('id') == old_id:
-                            ver['id'] = new_id
-                            ver['filename'] = os.path.basename(new_full_path)
-                            break
+                    with ctx.cache.mutating():
+                        bundle_dir = old_cache_item.get('bundle_dir')
+                        if bundle_dir:
+                            ctx.cache.bundle_map[bundle_dir] = new_id
+
+                        # 维护 bundle versions 列表中的主版本 ID/文件名，避免短时间内显示旧值
+                        new_cache_item = ctx.cache.id_map.get(new_id)
+                        versions = new_cache_item.get('versions', []) if isinstance(new_cache_item, dict) else []
+                        for ver in versions:
+                            if ver.get('id') == old_id:
+                                ver['id'] = new_id
+                                ver['filename'] = os.path.basename(new_full_path)
+                                break
 
                 ctx.cache.update_card_data(new_id, cache_payload)
         else:
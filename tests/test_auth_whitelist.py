@@ -0,0 +1,560 @@
+import os
+import sys
+from pathlib import Path
+
+from flask import Flask
+
+
+ROOT = Path(__file__).resolve().parents[1]
+if str(ROOT) not in sys.path:
+    sys.path.insert(0, str(ROOT))
+
+from core import auth as auth_module
+
+
+def test_is_ip_in_whitelist_matches_single_ip_cidr_wildcard_and_localhost_alias():
+    whitelist = ['127.0.0.1', '::1', ' 10.0.0.0/8 ', '192.168.1.*', 'localhost', 42]
+
+    assert auth_module.is_ip_in_whitelist('127.0.0.1', whitelist) is True
+    assert auth_module.is_ip_in_whitelist('localhost', whitelist) is True
+    assert auth_module.is_ip_in_whitelist('::1', whitelist) is True
+    assert auth_module.is_ip_in_whitelist('10.20.30.40', whitelist) is True
+    assert auth_module.is_ip_in_whitelist('192.168.1.77', whitelist) is True
+    assert auth_module.is_ip_in_whitelist('192.168.2.1', whitelist) is False
+    assert auth_module.is_ip_in_whitelist('not-an-ip', whitelist) is False
+    assert auth_module.is_ip_in_whitelist('', whitelist) is False
+
+
+def test_is_ip_in_whitelist_compiles_patterns_once_and_resolves_domains_lazily(monkeypatch):
+    resolved = []
+
+    def _fake_resolve(domain):
+        resolved.append(domain)
+        return {'203.0.113.5'}
+
+    monkeypatch.setattr(auth_module, '_WHITELIST_CACHE', {})
+    monkeypatch.setattr(auth_module, '_resolve_domain_ips', _fake_resolve)
+    whitelist = ['198.51.100.1', 'home.example.com']
+
+    assert auth_module.is_ip_in_whitelist('198.51.100.1', whitelist) is True
+    assert resolved == []
+    assert auth_module.is_ip_in_whitelist('203.0.113.5', whitelist) is True
+    assert resolved == ['home.example.com']
+
+    compiled = auth_module._WHITELIST_CACHE[tuple(whitelist)]
+    assert auth_module._compile_whitelist(list(whitelist)) is compiled
+
+
+def test_compile_whitelist_folds_localhost_alias_into_single_ips():
+    single_ips, networks_v4, networks_v6, domains = auth_module._compile_whitelist(['localhost', 'home.example.com'])
+
+    assert {str(ip) for ip in single_ips} == {'127.0.0.1', '::1'}
+    assert networks_v4 == networks_v6 == ()
+    assert domains == ('home.example.com',)
+
+
+def test_is_trusted_request_compiles_whitelist_once_per_config_object(monkeypatch):
+    cfg = {'auth_trusted_ips': ['10.0.0.0/8']}
+    compiled_calls = []
+    original_compile = auth_module._compile_whitelist
+
+    def _counting_compile(whitelist):
+        compiled_calls.append(list(whitelist))
+        return original_compile(whitelist)
+
+    monkeypatch.setattr(auth_module, 'load_config_cached', lambda: cfg)
+    monkeypatch.setattr(auth_module, '_compile_whitelist', _counting_compile)
+    monkeypatch.setattr(auth_module, '_CONFIG_WHITELIST_LAST', {})
+    monkeypatch.setattr(auth_module, 'get_real_ip', lambda: '10.1.2.3')
+
+    assert auth_module.is_trusted_request() is True
+    assert auth_module.is_trusted_request() is True
+    assert compiled_calls == [['127.0.0.1', '::1', '10.0.0.0/8']]
+
+    cfg = {'auth_trusted_ips': []}
+    assert auth_module.is_trusted_request() is False
+    assert len(compiled_calls) == 2
+
+
+def _make_auth_app():
+    app = Flask(__name__)
+    app.secret_key = 'test-secret'
+    auth_module.init_auth(app)
+
+    @app.route('/api/ping')
+    def _ping():
+        return {'success': True}
+
+    return app
+
+
+def _remote_client(app, remote_addr='203.0.113.50'):
+    client = app.test_client()
+    client.environ_base['REMOTE_ADDR'] = remote_addr
+    return client
+
+
+def test_check_authentication_skips_exempt_prefixes_without_evaluating_auth(monkeypatch):
+    app = _make_auth_app()
+
+    def _unexpected():
+        raise AssertionError('check_auth should not run for exempt paths')
+
+    monkeypatch.setattr(auth_module, 'check_auth', _unexpected)
+    client = app.test_client()
+
+    assert client.get('/static/app.js').status_code == 404
+    assert client.get('/favicon.ico').status_code == 404
+
+
+def test_check_auth_skips_whitelist_lookup_when_auth_is_disabled(monkeypatch):
+    app = _make_auth_app()
+
+    def _unexpected():
+        raise AssertionError('whitelist should not be evaluated when auth is disabled')
+
+    monkeypatch.setattr(auth_module, 'is_auth_enabled', lambda: False)
+    monkeypatch.setattr(auth_module, 'is_trusted_request', _unexpected)
+
+    assert app.test_client().get('/api/ping').get_json() == {'success': True}
+
+
+def test_check_authentication_rejects_untrusted_api_request_when_auth_enabled(monkeypatch):
+    app = _make_auth_app()
+    monkeypatch.setattr(auth_module, 'is_auth_enabled', lambda: True)
+    monkeypatch.setattr(auth_module, 'is_trusted_request', lambda: False)
+
+    res = _remote_client(app).get('/api/ping')
+
+    assert res.status_code == 401
+    assert res.get_json()['error'] == 'Unauthorized'
+
+
+def test_load_secret_key_reads_key_file_once(monkeypatch, tmp_path):
+    monkeypatch.delenv('STM_SECRET_KEY', raising=False)
+    monkeypatch.setattr(auth_module, 'DATA_DIR', str(tmp_path))
+    monkeypatch.setattr(auth_module, '_SECRET_KEY', None)
+    (tmp_path / '.secret_key').write_text('persisted-key\n')
+
+    assert auth_module._load_secret_key() == 'persisted-key'
+    (tmp_path / '.secret_key').write_text('changed-on-disk')
+    assert auth_module._load_secret_key() == 'persisted-key'
+
+
+def test_load_secret_key_creates_key_file_with_owner_only_permissions(monkeypatch, tmp_path):
+    monkeypatch.delenv('STM_SECRET_KEY', raising=False)
+    monkeypatch.setattr(auth_module, 'DATA_DIR', str(tmp_path))
+    monkeypatch.setattr(auth_module, '_SECRET_KEY', None)
+
+    secret_key = auth_module._load_secret_key()
+
+    key_file = tmp_path / '.secret_key'
+    assert key_file.read_text() == secret_key
+    assert len(secret_key) == 64
+    if os.name == 'posix':
+        assert key_file.stat().st_mode & 0o777 == 0o600
+
+
+def test_session_cookie_is_refreshed_only_when_session_was_accessed(monkeypatch):
+    app = _make_auth_app()
+
+    @app.route('/auth/test-login')
+    def _test_login():
+        auth_module.login_user()
+        return {'success': True}
+
+    monkeypatch.setattr(auth_module, 'is_auth_enabled', lambda: True)
+    monkeypatch.setattr(auth_module, 'is_trusted_request', lambda: False)
+    client = _remote_client(app)
+
+    assert 'Set-Cookie' in client.get('/auth/test-login').headers
+    assert 'Set-Cookie' not in client.get('/static/app.js').headers
+
+    res = client.get('/api/ping')
+    assert res.get_json() == {'success': True}
+    assert 'Set-Cookie' in res.headers
+
+    monkeypatch.setattr(auth_module, 'is_trusted_request', lambda: True)
+    assert 'Set-Cookie' not in client.get('/api/ping').headers
+
+
+def test_check_authentication_redirects_page_requests_with_next_path(monkeypatch):
+    app = _make_auth_app()
+
+    @app.route('/cards')
+    def _cards():
+        return 'ok'
+
+    monkeypatch.setattr(auth_module, 'is_auth_enabled', lambda: True)
+    monkeypatch.setattr(auth_module, 'is_trusted_request', lambda: False)
+
+    res = _remote_client(app).get('/cards')
+
+    assert res.status_code == 302
+    assert res.headers['Location'] == '/auth/login?next=/cards'
+
+
+def test_verify_credentials_compares_username_and_password_as_a_pair(monkeypatch):
+    monkeypatch.setattr(auth_module, 'get_auth_credentials', lambda: ('ab', 'c'))
+
+    assert auth_module.verify_credentials('ab', 'c') is True
+    assert auth_module.verify_credentials('a', 'bc') is False
+    assert auth_module.verify_credentials('ab', 'C') is False
+
+    monkeypatch.setattr(auth_module, 'get_auth_credentials', lambda: ('ab', 'd'))
+    assert auth_module.verify_credentials('ab', 'c') is False
+    assert auth_module.verify_credentials('ab', 'd') is True
+
+    monkeypatch.setattr(auth_module, 'get_auth_credentials', lambda: ('', ''))
+    assert auth_module.verify_credentials('', '') is False
+
+
+def test_is_trusted_request_accepts_loopback_without_loading_config(monkeypatch):
+    def _unexpected():
+        raise AssertionError('config should not be read for loopback clients')
+
+    monkeypatch.setattr(auth_module, 'load_config_cached', _unexpected)
+    for ip in ('127.0.0.1', '::1', 'localhost'):
+        monkeypatch.setattr(auth_module, 'get_real_ip', lambda ip=ip: ip)
+        assert auth_module.is_trusted_request() is True
+
+
+def test_get_real_ip_only_honours_forwarding_headers_from_trusted_proxies(monkeypatch):
+    monkeypatch.setattr(auth_module, 'load_config_cached', lambda: {})
+    app = Flask(__name__)
+
+    def _real_ip(remote_addr, headers):
+        with app.test_request_context('/', environ_base={'REMOTE_ADDR': remote_addr}, headers=headers):
+            return auth_module.get_real_ip()
+
+    assert _real_ip('203.0.113.9', {'X-Forwarded-For': '127.0.0.1'}) == '203.0.113.9'
+    assert _real_ip('127.0.0.1', {'X-Forwarded-For': ' 1.2.3.4 , , 198.51.100.7:8080, 127.0.0.1'}) == '198.51.100.7'
+    assert _real_ip('127.0.0.1', {'X-Real-IP': '198.51.100.8'}) == '198.51.100.8'
+    assert _real_ip('127.0.0.1', {'X-Forwarded-For': '::1'}) == ''
+
+
+def test_client_ip_parsing_is_memoized():
+    auth_module._cached_ip_address.cache_clear()
+
+    assert auth_module.is_ip_in_whitelist('10.9.8.7', ['10.0.0.0/8']) is True
+    assert auth_module.is_ip_in_whitelist('10.9.8.7', ['10.0.0.0/8']) is True
+    assert auth_module.is_ip_in_whitelist('bogus', ['10.0.0.0/8']) is False
+
+    info = auth_module._cached_ip_address.cache_info()
+    assert info.hits == 1
+    assert info.currsize == 1
+
+
+def test_get_real_ip_uses_configured_proxies_compiled_once_per_config(monkeypatch):
+    cfg = {'auth_trusted_proxies': ['10.0.0.0/24']}
+    compiled_calls = []
+    original_compile = auth_module._compile_whitelist
+
+    def _counting_compile(whitelist):
+        compiled_calls.append(list(whitelist))
+        return original_compile(whitelist)
+
+    monkeypatch.setattr(auth_module, 'load_config_cached', lambda: cfg)
+    monkeypatch.setattr(auth_module, '_compile_whitelist', _counting_compile)
+    monkeypatch.setattr(auth_module, '_CONFIG_WHITELIST_LAST', {})
+    app = Flask(__name__)
+
+    for _ in range(2):
+        with app.test_request_context(
+            '/', environ_base={'REMOTE_ADDR': '10.0.0.5'}, headers={'X-Forwarded-For': '198.51.100.1, 10.0.0.7'}
+        ):
+            assert auth_module.get_real_ip() == '198.51.100.1'
+
+    assert compiled_calls == [['127.0.0.1', '::1', '10.0.0.0/24']]
+
+
+def test_check_authentication_reads_config_once_per_request(monkeypatch):
+    app = _make_auth_app()
+    calls = []
+
+    def _counting_config():
+        calls.append(1)
+        return {'auth_username': 'admin', 'auth_password': 'secret', 'auth_trusted_ips': ['198.51.100.0/24']}
+
+    monkeypatch.delenv('STM_AUTH_USER', raising=False)
+    monkeypatch.delenv('STM_AUTH_PASS', raising=False)
+    monkeypatch.setattr(auth_module, 'load_config_cached', _counting_config)
+    client = app.test_client()
+
+    res = client.get('/api/ping', environ_base={'REMOTE_ADDR': '198.51.100.20'})
+    assert res.get_json() == {'success': True}
+    assert len(calls) == 1
+
+    res = client.get('/api/ping', environ_base={'REMOTE_ADDR': '203.0.113.20'})
+    assert res.status_code == 401
+    assert len(calls) == 2
+
+
+def test_compile_whitelist_folds_host_networks_and_collapses_ranges():
+    single_ips, networks_v4, networks_v6, domains = auth_module._compile_whitelist(
+        ['10.0.0.0/25', '10.0.0.128/25', '10.0.0.7/8', '198.51.100.4/32', 'fd00::/8', 'bad pattern!']
+    )
+
+    assert {str(ip) for ip in single_ips} == {'198.51.100.4'}
+    assert [str(net) for net in networks_v4] == ['10.0.0.0/8']
+    assert [str(net) for net in networks_v6] == ['fd00::/8']
+    assert domains == ()
+    assert auth_module.is_ip_in_whitelist('10.200.0.1', ['10.0.0.0/25', '10.0.0.7/8']) is True
+
+
+def test_rate_limit_sweep_runs_at_most_once_per_interval(monkeypatch):
+    monkeypatch.setattr(auth_module, '_FAILED_LOGINS', {'old': {'count': 1, 'first_ts': 0.0, 'last_ts': 0.0}})
+    monkeypatch.setattr(auth_module, '_LOCKED_UNTIL', {'locked': 50.0})
+    monkeypatch.setattr(auth_module, '_LAST_RATE_LIMIT_SWEEP_TS', 0.0)
+
+    auth_module._cleanup_rate_limit_state(30.0, 10)
+    assert 'old' in auth_module._FAILED_LOGINS
+
+    auth_module._cleanup_rate_limit_state(100.0, 10)
+    assert auth_module._FAILED_LOGINS == {}
+    assert auth_module._LOCKED_UNTIL == {}
+
+    auth_module._FAILED_LOGINS['newer'] = {'count': 1, 'first_ts': 100.0, 'last_ts': 100.0}
+    auth_module._cleanup_rate_limit_state(150.0, 10)
+    assert 'newer' in auth_module._FAILED_LOGINS
+    assert auth_module._check_lockout('newer', 150.0) == (False, 0)
+
+
+def test_check_auth_trusts_direct_loopback_without_reading_config(monkeypatch):
+    app = _make_auth_app()
+
+    def _unexpected():
+        raise AssertionError('config should not be read for direct loopback requests')
+
+    monkeypatch.setattr(auth_module, 'load_config_cached', _unexpected)
+    assert app.test_client().get('/api/ping').get_json() == {'success': True}
+    assert _remote_client(app, '::1').get('/api/ping').get_json() == {'success': True}
+
+
+def test_check_auth_loopback_fast_path_defers_to_full_check_for_proxied_requests(monkeypatch):
+    app = _make_auth_app()
+    monkeypatch.setattr(auth_module, 'is_auth_enabled', lambda: True)
+    monkeypatch.setattr(auth_module, 'load_config_cached', lambda: {})
+    client = app.test_client()
+
+    assert client.get('/api/ping', headers={'X-Forwarded-For': '203.0.113.7'}).status_code == 401
+    assert client.get('/api/ping', headers={'Host': 'manager.example.com'}).status_code == 401
+
+
+def test_check_authentication_exempts_custom_static_url_path(monkeypatch):
+    app = Flask(__name__, static_url_path='/assets')
+    app.secret_key = 'test-secret'
+    auth_module.init_auth(app)
+
+    def _unexpected():
+        raise AssertionError('check_auth should not run for static assets')
+
+    monkeypatch.setattr(auth_module, 'check_auth', _unexpected)
+
+    assert app.test_client().get('/assets/app.js').status_code == 404
+
+
+def test_get_auth_credentials_reuses_result_for_unchanged_config(monkeypatch):
+    cfg = {'auth_username': ' admin ', 'auth_password': 'secret '}
+    monkeypatch.delenv('STM_AUTH_USER', raising=False)
+    monkeypatch.delenv('STM_AUTH_PASS', raising=False)
+    monkeypatch.setattr(auth_module, 'load_config_cached', lambda: cfg)
+    monkeypatch.setattr(auth_module, '_CONFIG_CREDENTIALS_LAST', (None, None))
+
+    first = auth_module.get_auth_credentials()
+    assert first == ('admin', 'secret')
+    assert auth_module.get_auth_credentials() is first
+
+    monkeypatch.setenv('STM_AUTH_USER', 'env-user')
+    monkeypatch.setenv('STM_AUTH_PASS', 'env-pass')
+    assert auth_module.get_auth_credentials() == ('env-user', 'env-pass')
+
+    monkeypatch.delenv('STM_AUTH_USER')
+    cfg = {'auth_username': '', 'auth_password': ''}
+    assert auth_module.get_auth_credentials() == ('', '')
+    assert auth_module.is_auth_enabled() is False
+
+
+def test_get_client_ip_from_xff_walks_hops_right_to_left():
+    proxies = auth_module._compile_whitelist(['127.0.0.1', '::1', '10.0.0.0/24'])
+    pick = auth_module._get_client_ip_from_xff
+
+    assert pick('198.51.100.1, 10.0.0.2', proxies, '10.0.0.1') == '198.51.100.1'
+    assert pick('198.51.100.1, bad, 10.0.0.1', proxies, '10.0.0.1') == '198.51.100.1'
+    assert pick('198.51.100.1', proxies, '203.0.113.9') == '203.0.113.9'
+    assert pick('10.0.0.3, 10.0.0.2', proxies, '10.0.0.1') == '10.0.0.3'
+    assert pick('bad, ', proxies, '10.0.0.1') == '10.0.0.1'
+    assert pick('', proxies, '') == ''
+
+
+def test_login_page_renders_from_precompiled_template(monkeypatch):
+    app = _make_auth_app()
+    monkeypatch.setattr(auth_module, 'is_auth_enabled', lambda: True)
+    monkeypatch.setattr(auth_module, 'get_auth_credentials', lambda: ('admin', 'secret'))
+    monkeypatch.setattr(auth_module, 'load_config_cached', lambda: {})
+    monkeypatch.setattr(auth_module, '_FAILED_LOGINS', {})
+    monkeypatch.setattr(auth_module, '_LOCKED_UNTIL', {})
+    client = _remote_client(app)
+
+    page = client.get('/auth/login').get_data(as_text=True)
+    assert '203.0.113.50' in page
+    assert '<div class="error-msg">' not in page
+
+    failed = client.post('/auth/login', data={'username': 'admin', 'password': '<wrong>'}).get_data(as_text=True)
+    assert '用户名或密码错误' in failed
+    assert '<wrong>' not in failed
+
+
+def test_login_page_without_error_matches_jinja_render_and_escapes_client_ip(monkeypatch):
+    app = _make_auth_app()
+    monkeypatch.setattr(auth_module, 'is_auth_enabled', lambda: True)
+    monkeypatch.setattr(auth_module, 'is_trusted_request', lambda: False)
+    monkeypatch.setattr(auth_module, '_is_hard_locked', lambda: False)
+    template = app.jinja_env.from_string(auth_module.LOGIN_PAGE_TEMPLATE)
+
+    monkeypatch.setattr(auth_module, 'get_real_ip', lambda: '203.0.113.50')
+    page = app.test_client().get('/auth/login').get_data(as_text=True)
+    assert page == template.render(error=None, client_ip='203.0.113.50')
+
+    monkeypatch.setattr(auth_module, 'get_real_ip', lambda: '<b>&"')
+    page = app.test_client().get('/auth/login').get_data(as_text=True)
+    assert page == template.render(error=None, client_ip='<b>&"')
+    assert '<b>' not in page
+
+
+def test_strip_port_handles_ipv4_bracketed_ipv6_and_bare_ipv6():
+    strip = auth_module._strip_port
+
+    assert strip(' 1.2.3.4:5678 ') == '1.2.3.4'
+    assert strip('1.2.3.4') == '1.2.3.4'
+    assert strip('[::1]:8080') == '::1'
+    assert strip('[fd00::1]') == 'fd00::1'
+    assert strip('fd00::1') == 'fd00::1'
+    assert strip('::ffff:1.2.3.4') == '::ffff:1.2.3.4'
+    assert strip('') == ''
+
+
+class _ForbiddenLock:
+    def __enter__(self):
+        raise AssertionError('rate-limit lock should not be taken')
+
+    def __exit__(self, *_exc):
+        return False
+
+
+def test_login_rejects_locked_client_without_taking_rate_limit_lock(monkeypatch):
+    app = _make_auth_app()
+    monkeypatch.setattr(auth_module, 'is_auth_enabled', lambda: True)
+    monkeypatch.setattr(auth_module, 'load_config_cached', lambda: {})
+    monkeypatch.setattr(auth_module, '_LOCKED_UNTIL', {'203.0.113.50': auth_module.time.time() + 600})
+    monkeypatch.setattr(auth_module, '_LAST_RATE_LIMIT_SWEEP_TS', auth_module.time.time())
+    monkeypatch.setattr(auth_module, '_RATE_LIMIT_LOCK', _ForbiddenLock())
+    monkeypatch.setattr(auth_module, '_get_rate_limit_key', lambda: '203.0.113.50')
+
+    page = _remote_client(app).post('/auth/login', data={'username': 'x', 'password': 'y'}).get_data(as_text=True)
+
+    assert '登录失败次数过多' in page
+
+
+def test_login_failure_reaching_threshold_enters_hard_lock(monkeypatch):
+    app = _make_auth_app()
+    monkeypatch.setattr(auth_module, 'is_auth_enabled', lambda: True)
+    monkeypatch.setattr(auth_module, 'get_auth_credentials', lambda: ('admin', 'secret'))
+    monkeypatch.setattr(auth_module, 'load_config_cached', lambda: {'auth_hard_lock_threshold': 20})
+    monkeypatch.setattr(auth_module, '_FAILED_LOGINS', {})
+    monkeypatch.setattr(auth_module, '_LOCKED_UNTIL', {})
+    monkeypatch.setattr(auth_module, '_GLOBAL_FAIL_COUNT', 19)
+    monkeypatch.setattr(auth_module, '_HARD_LOCKED', False)
+    monkeypatch.setattr(auth_module, '_HARD_LOCKED_AT', 0.0)
+
+    page = _remote_client(app).post('/auth/login', data={'username': 'admin', 'password': 'nope'}).get_data(as_text=True)
+
+    assert '锁定模式' in page
+    assert auth_module._HARD_LOCKED is True
+
+
+class _CountingLock:
+    def __init__(self):
+        self.entries = 0
+
+    def __enter__(self):
+        self.entries += 1
+        return self
+
+    def __exit__(self, *_exc):
+        return False
+
+
+def test_failed_login_with_expired_lock_enters_rate_limit_lock_once(monkeypatch):
+    app = _make_auth_app()
+    lock = _CountingLock()
+    monkeypatch.setattr(auth_module, 'is_auth_enabled', lambda: True)
+    monkeypatch.setattr(auth_module, 'get_auth_credentials', lambda: ('admin', 'secret'))
+    monkeypatch.setattr(auth_module, 'load_config_cached', lambda: {})
+    monkeypatch.setattr(auth_module, '_FAILED_LOGINS', {})
+    monkeypatch.setattr(auth_module, '_LOCKED_UNTIL', {'203.0.113.50': auth_module.time.time() - 1})
+    monkeypatch.setattr(auth_module, '_LAST_RATE_LIMIT_SWEEP_TS', 0.0)
+    monkeypatch.setattr(auth_module, '_GLOBAL_FAIL_COUNT', 0)
+    monkeypatch.setattr(auth_module, '_RATE_LIMIT_LOCK', lock)
+    monkeypatch.setattr(auth_module, '_get_rate_limit_key', lambda: '203.0.113.50')
+
+    page = _remote_client(app).post('/auth/login', data={'username': 'admin', 'password': 'nope'}).get_data(as_text=True)
+
+    assert '用户名或密码错误' in page
+    assert lock.entries == 1
+    assert '203.0.113.50' not in auth_module._LOCKED_UNTIL
+    assert auth_module._FAILED_LOGINS['203.0.113.50']['count'] == 1
+
+
+def test_api_rejections_return_precomputed_json_bodies(monkeypatch):
+    app = _make_auth_app()
+    monkeypatch.setattr(auth_module, 'check_auth', lambda: False)
+    monkeypatch.setattr(auth_module, '_is_hard_locked', lambda: False)
+    client = _remote_client(app)
+
+    first = client.get('/api/ping')
+    second = client.get('/api/ping')
+
+    assert first.status_code == second.status_code == 401
+    assert first.mimetype == 'application/json'
+    assert first.get_json() == {'success': False, 'error': 'Unauthorized', 'message': '需要登录才能访问此接口'}
+    assert first.data == second.data
+
+    monkeypatch.setattr(auth_module, '_is_hard_locked', lambda: True)
+    locked = client.get('/api/ping')
+    assert locked.status_code == 503
+    assert locked.get_json()['error'] == 'Locked'
+
+
+def test_get_real_ip_skips_proxy_lookup_for_local_requests_without_forwarded_headers(monkeypatch):
+    app = Flask(__name__)
+
+    def _unexpected():
+        raise AssertionError('trusted proxies should not be consulted')
+
+    monkeypatch.setattr(auth_module, '_get_trusted_proxies_compiled', _unexpected)
+
+    with app.test_request_context('/', base_url='http://127.0.0.1:5000', environ_base={'REMOTE_ADDR': '127.0.0.1'}):
+        assert auth_module.get_real_ip() == '127.0.0.1'
+
+    monkeypatch.setattr(auth_module, '_get_trusted_proxies_compiled', lambda: auth_module._compile_whitelist(['127.0.0.1']))
+    with app.test_request_context('/', base_url='http://example.com', environ_base={'REMOTE_ADDR': '127.0.0.1'}):
+        assert auth_module.get_real_ip() == ''
+
+
+def test_compile_whitelist_orders_networks_broadest_first_per_family():
+    _single_ips, networks_v4, networks_v6, _domains = auth_module._compile_whitelist(
+        ['192.168.1.0/24', '2001:db8::/64', '172.16.0.0/12', '2001:db9::/32', '10.1.0.0/16']
+    )
+
+    assert [str(net) for net in networks_v4] == ['172.16.0.0/12', '10.1.0.0/16', '192.168.1.0/24']
+    assert [str(net) for net in networks_v6] == ['2001:db9::/32', '2001:db8::/64']
+    assert auth_module.is_ip_in_whitelist('2001:db8::5', ['172.16.0.0/12', '2001:db8::/64']) is True
+    assert auth_module.is_ip_in_whitelist('172.20.1.1', ['2001:db8::/64']) is False
+
+
+def test_normalize_ip_pattern_converts_only_four_part_wildcards():
+    assert auth_module.normalize_ip_pattern(' 192.168.*.* ') == '192.168.0.0/16'
+    assert auth_module.normalize_ip_pattern('10.0.0.*') == '10.0.0.0/24'
+    assert auth_module.normalize_ip_pattern('10.0.0.0/8') == '10.0.0.0/8'
+    assert auth_module.normalize_ip_pattern('*.example.com') == '*.example.com'
@@ -1,3 +1,4 @@
+import copy
 import sys
 import importlib
 from pathlib import Path
@@ -110,6 +111,253 @@ def test_automation_engine_contains_respects_case_when_case_sensitive_true():
     assert plan['actions'] == []
 
 
+def test_automation_engine_regex_condition_compiles_pattern_once_across_cards():
+    from core.automation import engine as engine_module
+
+    engine = AutomationEngine()
+    engine_module._compile_regex.cache_clear()
+
+    assert engine._check_condition('Alice Smith', 'regex', r'^alice\s', case_sensitive=False) is True
+    assert engine._check_condition('Bob', 'regex', r'^alice\s', case_sensitive=False) is False
+    assert engine._check_condition('alice x', 'regex', r'^Alice\s', case_sensitive=True) is False
+    assert engine._check_condition('x', 'regex', '(', case_sensitive=False) is False
+
+    info = engine_module._compile_regex.cache_info()
+    assert (info.hits, info.misses) == (1, 3)
+
+
+def test_automation_engine_literal_regex_skips_compile_and_matches_like_re(monkeypatch):
+    from core.automation import engine as engine_module
+
+    engine = AutomationEngine()
+
+    def _unexpected(*_args):
+        raise AssertionError('literal patterns should not be compiled')
+
+    monkeypatch.setattr(engine_module, '_compile_regex', _unexpected)
+    assert engine._check_condition('魔法少女', 'regex', '少女', case_sensitive=False) is True
+    assert engine._check_condition('Magic Girl', 'regex', 'magic', case_sensitive=False) is True
+    assert engine._check_condition('Magic Girl', 'regex', 'magic', case_sensitive=True) is False
+
+    monkeypatch.undo()
+    # 非 ASCII 文本的忽略大小写匹配仍交给正则引擎（如开尔文符号 K 与 k）
+    assert engine._check_condition('\u212a', 'regex', 'k', case_sensitive=False) is True
+
+
+def test_automation_engine_extracts_each_field_once_per_card(monkeypatch):
+    engine = AutomationEngine()
+    calls = []
+    original = engine._get_field_value
+
+    def _counting(card_data, field_key, specific_target=None, **kwargs):
+        calls.append((field_key, specific_target))
+        return original(card_data, field_key, specific_target=specific_target, **kwargs)
+
+    monkeypatch.setattr(engine, '_get_field_value', _counting)
+    ruleset = _make_ruleset('wi_name', 'Missing')
+    ruleset['rules'].append(_make_ruleset('wi_name', 'Only', action_value='second')['rules'][0])
+    card_data = {'character_book': {'entries': [{'comment': 'OnlyTitle'}]}}
+
+    plan = engine.evaluate(card_data, ruleset)
+    assert plan['actions'] == [{'type': 'add_tag', 'value': 'second'}]
+    assert len(calls) == 1
+
+    engine.evaluate({'character_book': {'entries': [{'comment': 'Other'}]}}, ruleset)
+    assert len(calls) == 2
+
+
+def test_automation_engine_dotted_field_lookup_stops_at_non_dict():
+    engine = AutomationEngine()
+    card_data = {'data': {'extensions': {'depth': {'level': 3}}, 'name': 'Alice'}}
+
+    assert engine._get_field_value(card_data, 'data.extensions.depth.level') == 3
+    assert engine._get_field_value(card_data, 'data.name.first') is None
+    assert engine._get_field_value(card_data, 'data.missing.level') is None
+
+
+def test_automation_engine_reuses_normalized_wi_entries_across_wi_fields():
+    engine = AutomationEngine()
+    card_data = {
+        'character_book': {
+            'entries': {
+                '0': {'comment': 'Castle', 'content': 'stone walls'},
+                '1': 'not-an-entry',
+            }
+        }
+    }
+    ruleset = _make_ruleset('wi_name', 'castle')
+    ruleset['rules'][0]['groups'][0]['conditions'].append(
+        {'field': 'wi_content', 'operator': 'contains', 'value': 'walls'}
+    )
+
+    plan = engine.evaluate(card_data, ruleset)
+
+    assert plan['actions'] == [{'type': 'add_tag', 'value': 'matched'}]
+    assert 'character_book_content' not in card_data
+
+    ruleset['rules'][0]['groups'][0]['conditions'].append(
+        {'field': 'character_book_content', 'operator': 'eq', 'value': 'stone walls castle'}
+    )
+    assert engine.evaluate(card_data, ruleset)['actions'] == [{'type': 'add_tag', 'value': 'matched'}]
+    assert 'character_book_content' not in card_data
+    assert engine._get_field_value(card_data, 'character_book') == ['stone walls', 'Castle']
+
+
+def test_automation_engine_character_book_content_is_derived_without_touching_card():
+    engine = AutomationEngine()
+    ruleset = _make_ruleset('character_book_content', 'gate')
+    with_book = {'character_book': {'entries': [{'content': 'iron gate', 'comment': 'Door'}]}}
+    snapshot = copy.deepcopy(with_book)
+
+    for _ in range(2):
+        assert engine.evaluate(with_book, ruleset)['actions'] == [{'type': 'add_tag', 'value': 'matched'}]
+    assert with_book == snapshot
+
+    # 没有世界书时仍按普通字段读取调用方自带的值
+    assert engine.evaluate({'character_book_content': 'gate'}, ruleset)['actions']
+    assert not engine.evaluate({}, ruleset)['actions']
+
+
+def test_automation_engine_multi_target_conditions_on_lists_and_strings():
+    engine = AutomationEngine()
+    tags = ['Fantasy', 'Magic']
+
+    assert engine._check_condition(tags, 'eq', 'scifi|magic, fantasy') is True
+    assert engine._check_condition(tags, 'eq', 'magic, fantasy', case_sensitive=True) is False
+    assert engine._check_condition(tags, 'contains', 'horror|agi') is True
+    assert engine._check_condition(tags, 'not_contains', 'horror|FANT') is False
+    assert engine._check_condition('Alice', 'neq', 'bob|carol') is True
+    assert engine._check_condition('Alice', 'neq', 'bob|ALICE') is False
+
+
+def test_automation_engine_stops_evaluating_group_once_result_is_decided(monkeypatch):
+    engine = AutomationEngine()
+    checked = []
+    original = engine._check_condition
+
+    def _recording(value, operator, target_value, case_sensitive=False):
+        checked.append(target_value)
+        return original(value, operator, target_value, case_sensitive)
+
+    monkeypatch.setattr(engine, '_check_condition', _recording)
+    ruleset = _make_ruleset('char_name', 'nobody')
+    conditions = ruleset['rules'][0]['groups'][0]['conditions']
+    conditions.append({'field': 'char_name', 'operator': 'regex', 'value': 'never-checked'})
+
+    assert engine.evaluate({'char_name': 'Alice'}, ruleset)['actions'] == []
+    assert checked == ['nobody']
+
+    checked.clear()
+    ruleset['rules'][0]['groups'][0]['logic'] = 'OR'
+    conditions[0]['value'] = 'ali'
+    assert engine.evaluate({'char_name': 'Alice'}, ruleset)['actions'] == [{'type': 'add_tag', 'value': 'matched'}]
+    assert checked == ['ali']
+
+
+def test_automation_engine_prepared_ruleset_matches_direct_evaluation():
+    engine = AutomationEngine()
+    ruleset = _make_ruleset('char_name', 'ali')
+    ruleset['rules'].append({
+        'name': 'legacy_flat',
+        'conditions': [{'field': 'tags', 'operator': 'contains', 'value': 'Magic'}],
+        'actions': [{'type': 'add_tag', 'value': 'legacy'}],
+    })
+    ruleset['rules'].append({'name': 'disabled', 'enabled': False, 'actions': [{'type': 'add_tag', 'value': 'off'}]})
+    ruleset['rules'].append({'name': 'no_conditions', 'actions': [{'type': 'add_tag', 'value': 'always'}]})
+    prepared = engine.prepare_ruleset(ruleset)
+
+    assert len(prepared) == 3
+    for card in ({'char_name': 'Alice', 'tags': ['magic']}, {'char_name': 'Bob', 'tags': []}):
+        for manual in (True, False):
+            direct = engine.evaluate(dict(card), ruleset, match_if_no_conditions=manual)
+            reused = engine.evaluate(dict(card), ruleset, match_if_no_conditions=manual, prepared=prepared)
+            assert reused == direct
+
+
+def test_automation_engine_prepares_multi_match_targets_once_per_condition():
+    from core.automation import engine as engine_module
+
+    engine = AutomationEngine()
+    engine_module._prepare_targets.cache_clear()
+
+    for name in ('Alice', 'Bob', 'Carol'):
+        engine._check_condition(name, 'contains', ' ALI | bo |', case_sensitive=False)
+
+    info = engine_module._prepare_targets.cache_info()
+    assert (info.hits, info.misses) == (2, 1)
+    assert engine_module._prepare_targets(' ALI | bo |', False) == ('ali', 'bo')
+    assert engine_module._prepare_targets(' ALI | bo |', True) == ('ALI', 'bo')
+    assert engine_module._prepare_targets('a|b', False, False) == ('a|b',)
+
+
+def test_automation_engine_list_eq_compares_as_multiset():
+    engine = AutomationEngine()
+
+    assert engine._check_condition(['b', 'a', 'a'], 'eq', 'a, a, b') is True
+    assert engine._check_condition(['b', 'a'], 'eq', 'a, a, b') is False
+    assert engine._check_condition(['A'], 'eq', 'a') is True
+    assert engine._check_condition([], 'eq', '') is False
+
+
+def test_automation_engine_exists_on_list_fields_skips_value_extraction(monkeypatch):
+    engine = AutomationEngine()
+
+    def _unexpected(*_args, **_kwargs):
+        raise AssertionError('list fields should not be materialized for exists checks')
+
+    monkeypatch.setattr(engine, '_get_field_value', _unexpected)
+    card_data = {
+        'extensions': {
+            'regex_scripts': ['not-a-script'],
+            'tavern_helper': [['scripts', [{'type': 'script', 'value': {'name': 'Helper'}}]]],
+        },
+        'character_book': {'entries': {}},
+    }
+
+    def _plan(field, operator):
+        ruleset = _make_ruleset(field, None)
+        ruleset['rules'][0]['groups'][0]['conditions'][0]['operator'] = operator
+        return engine.evaluate(card_data, ruleset)['actions']
+
+    assert _plan('regex_name', 'exists') == []
+    assert _plan('st_script_name', 'exists') == [{'type': 'add_tag', 'value': 'matched'}]
+    assert _plan('wi_content', 'not_exists') == [{'type': 'add_tag', 'value': 'matched'}]
+
+
+def test_automation_engine_numeric_and_regex_errors_do_not_match():
+    engine = AutomationEngine()
+
+    assert engine._check_condition(10 ** 400, 'gt', 1) is False
+    assert engine._check_condition('abc', 'lt', 5) is False
+    assert engine._check_condition('12', 'gt', '3.5') is True
+    assert engine._check_condition('text', 'regex', '[unclosed') is False
+
+
+def test_automation_engine_checks_cheaper_conditions_first_within_group(monkeypatch):
+    engine = AutomationEngine()
+    checked = []
+    original = engine._check_condition
+
+    def _recording(value, operator, target_value, case_sensitive=False):
+        checked.append(operator)
+        return original(value, operator, target_value, case_sensitive)
+
+    monkeypatch.setattr(engine, '_check_condition', _recording)
+    ruleset = _make_ruleset('char_name', 'ali')
+    ruleset['rules'][0]['groups'][0]['conditions'] = [
+        {'field': 'char_name', 'operator': 'regex', 'value': '^A.*e$'},
+        {'field': 'char_name', 'operator': 'contains', 'value': 'ali'},
+        {'field': 'creator', 'operator': 'exists'},
+    ]
+
+    assert engine.evaluate({'char_name': 'Alice'}, ruleset)['actions'] == []
+    assert checked == ['exists']
+    assert engine.evaluate({'char_name': 'Alice', 'creator': 'me'}, ruleset)['actions'] == [
+        {'type': 'add_tag', 'value': 'matched'}
+    ]
+    assert checked == ['exists', 'exists', 'contains', 'regex']
+
+
 def test_automation_engine_wi_name_matches_title_only_entries():
     engine = AutomationEngine()
     card_data = {
@@ -441,7 +689,7 @@ def test_auto_and_manual_paths_share_identical_snapshot_template_fields(monkeypa
     monkeypatch.setattr(automation_api.rule_manager, 'get_ruleset', lambda ruleset_id: {'rules': []})
     monkeypatch.setattr(automation_api.executor, 'apply_plan', lambda *args, **kwargs: {'moved_to': None, 'tags_added': [], 'tags_removed': [], 'final_id': card_id})
 
-    def _capture_manual(context_data, ruleset, match_if_no_conditions=True):
+    def _capture_manual(context_data, ruleset, match_if_no_conditions=True, prepared=None):
         captured_manual.update({
             'filename_stem': context_data.get('filename_stem'),
             'category': context_data.get('category'),
@@ -1998,7 +2246,7 @@ def test_manual_execute_reuses_shared_rule_context_builder(monkeypatch):
     monkeypatch.setattr(automation_service, '_build_rule_context', _fake_build_rule_context)
     monkeypatch.setattr(automation_service.os.path, 'getsize', lambda *args, **kwargs: (_ for _ in ()).throw(AssertionError('should not compute file_size inline')))
 
-    def _capture_manual(context_data, ruleset, match_if_no_conditions=True):
+    def _capture_manual(context_data, ruleset, match_if_no_conditions=True, prepared=None):
         captured['context_data'] = context_data
         return {'actions': []}
 
@@ -3491,6 +3739,299 @@ def test_global_metadata_cache_update_tags_update_rebuilds_global_tags_when_tags
     assert cache.global_tags == ['keep']
 
 
+def test_global_metadata_cache_tag_updates_maintain_sorted_pool_incrementally():
+    from core.data.cache import GlobalMetadataCache
+
+    cache = GlobalMetadataCache()
+    cache.id_map = {
+        'a.png': {'id': 'a.png', 'category': '', 'tags': ['shared', 'only-a']},
+        'b.png': {'id': 'b.png', 'category': '', 'tags': ['shared']},
+    }
+    cache.global_tags = ['only-a', 'shared']
+    before = cache.global_tags
+
+    cache.update_tags_update('a.png', ['shared', 'Zeta', 'alpha'])
+    assert cache.global_tags == ['Zeta', 'alpha', 'shared']
+    assert before == ['only-a', 'shared']
+
+    cache.update_card_data('b.png', {'tags': 'beta, alpha'})
+    assert cache.global_tags == ['Zeta', 'alpha', 'beta', 'shared']
+
+    cache.update_tags_update('a.png', [])
+    assert cache.global_tags == sorted({'alpha', 'beta'})
+    assert cache.global_tags == sorted({t for c in cache.id_map.values() for t in c['tags']})
+
+
+def test_cache_card_urls_match_plain_quote_of_full_id():
+    from urllib.parse import quote
+    from core.data import cache as cache_module
+
+    for card_id in ('top.png', '角色/子 目录/a b#1.png', 'a/b/c%d?.json', '/lead.png', 'dir/'):
+        assert cache_module._quote_card_id(card_id) == quote(card_id)
+
+    card = {}
+    cache_module._set_card_urls(card, '分类/卡 片.png', 12)
+    assert card == {
+        'image_url': f"/cards_file/{quote('分类/卡 片.png')}?t=12",
+        'thumb_url': f"/api/thumbnail/{quote('分类/卡 片.png')}?t=12",
+    }
+
+
+def test_global_metadata_cache_reload_reads_bundle_markers_from_folder_walk(monkeypatch, tmp_path):
+    import sqlite3
+    from core.data import cache as cache_module
+    from core.data import ui_store as ui_store_module
+
+    cards_dir = tmp_path / 'cards'
+    (cards_dir / 'solo').mkdir(parents=True)
+    (cards_dir / 'pack').mkdir()
+    (cards_dir / 'pack' / '.bundle').write_text('', encoding='utf-8')
+    db_path = tmp_path / 'cards.db'
+    with sqlite3.connect(db_path) as conn:
+        conn.execute(
+            'CREATE TABLE card_metadata (id TEXT, char_name TEXT, tags TEXT, category TEXT, creator TEXT, '
+            'char_version TEXT, last_modified REAL, file_hash TEXT, token_count INTEGER, is_favorite INTEGER)'
+        )
+        conn.executemany(
+            'INSERT INTO card_metadata VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?)',
+            [
+                ('solo/a.png', 'A', '["x"]', 'solo', '', '', 1.0, 'h1', 5, 1),
+                ('pack/v1.png', 'V1', 'not json', 'pack', '', '', 1.0, 'h2', 6, 0),
+                ('pack/v2.png', 'V2', '[]', 'pack', '', '', 2.0, 'h3', 7, 0),
+            ],
+        )
+    conn.close()
+    monkeypatch.setattr(cache_module, 'DEFAULT_DB_PATH', str(db_path))
+    monkeypatch.setattr(cache_module, 'CARDS_FOLDER', str(cards_dir))
+    monkeypatch.setattr(ui_store_module, 'UI_DATA_FILE', str(tmp_path / 'ui_data.json'))
+    real_exists = cache_module.os.path.exists
+    stat_calls = []
+
+    def _tracking_exists(path):
+        if str(path).endswith('.bundle'):
+            stat_calls.append(path)
+        return real_exists(path)
+
+    monkeypatch.setattr(cache_module.os.path, 'exists', _tracking_exists)
+
+    cache = cache_module.GlobalMetadataCache()
+    cache.reload_from_db()
+
+    assert stat_calls == []
+    assert cache.bundle_map == {'pack': 'pack/v2.png'}
+    assert sorted(c['id'] for c in cache.cards) == ['pack/v2.png', 'solo/a.png']
+    solo = cache.id_map['solo/a.png']
+    assert (solo['tags'], solo['token_count'], solo['is_favorite']) == (['x'], 5, True)
+    assert cache.id_map['pack/v2.png']['tags'] == []
+    assert cache.global_tags == ['x']
+    assert cache.category_counts == {'solo': 1, '': 1}
+    assert cache.visible_folders == ['solo']
+
+
+def test_global_metadata_cache_reload_reads_through_pooled_connection_without_leaking_row_factory(monkeypatch, tmp_path):
+    import sqlite3
+    from core.data import cache as cache_module
+    from core.data import db_session
+    from core.data import ui_store as ui_store_module
+
+    db_path = str(tmp_path / 'cards.db')
+    with db_session.get_pooled_conn(db_path) as conn:
+        conn.execute(
+            'CREATE TABLE card_metadata (id TEXT, char_name TEXT, tags TEXT, category TEXT, creator TEXT, '
+            'char_version TEXT, last_modified REAL, file_hash TEXT, token_count INTEGER, is_favorite INTEGER)'
+        )
+        conn.execute(
+            'INSERT INTO card_metadata VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?)',
+            ('a.png', 'A', '["x"]', '', '', '', 1.0, 'h1', 5, 0),
+        )
+        pooled = conn
+    monkeypatch.setattr(cache_module, 'DEFAULT_DB_PATH', db_path)
+    monkeypatch.setattr(cache_module, 'CARDS_FOLDER', str(tmp_path / 'cards'))
+    monkeypatch.setattr(ui_store_module, 'UI_DATA_FILE', str(tmp_path / 'ui_data.json'))
+
+    cache = cache_module.GlobalMetadataCache()
+    cache.reload_from_db()
+
+    assert [c['id'] for c in cache.cards] == ['a.png']
+    with db_session.get_pooled_conn(db_path) as conn:
+        assert conn is pooled
+        assert isinstance(conn.execute('SELECT id FROM card_metadata').fetchone(), sqlite3.Row)
+
+
+def test_global_metadata_cache_category_counts_walk_cached_parent_chain():
+    from core.data import cache as cache_module
+
+    assert cache_module._category_chain('a/b/c') == ('a', 'a/b', 'a/b/c')
+    cache = cache_module.GlobalMetadataCache()
+    cache.category_counts = {'a': 1}
+
+    cache._update_category_count('a/b/c', 2)
+    cache._update_category_count('a/b', -5)
+    cache._update_category_count('', 3)
+
+    assert cache.category_counts == {'a': 0, 'a/b': 0, 'a/b/c': 2}
+
+
+def test_global_metadata_cache_reload_retries_outside_lock_after_concurrent_update(monkeypatch, tmp_path):
+    from core.data import cache as cache_module
+    from core.data import ui_store as ui_store_module
+
+    (tmp_path / 'cards').mkdir()
+    monkeypatch.setattr(cache_module, 'CARDS_FOLDER', str(tmp_path / 'cards'))
+    monkeypatch.setattr(ui_store_module, 'UI_DATA_FILE', str(tmp_path / 'ui_data.json'))
+    cache = cache_module.GlobalMetadataCache()
+    cache.id_map = {'old.png': {'id': 'old.png', 'category': '', 'tags': []}}
+    fetches = []
+
+    def _fake_fetch(_fn, max_retries=5):
+        fetches.append(cache.lock.locked())
+        if len(fetches) == 1:
+            # 模拟重建期间另一个请求写入了增量更新
+            cache.toggle_favorite_update('old.png', True)
+        return [('new.png', 'New', '[]', '', '', '', 1.0, 'h', 0, len(fetches) - 1)]
+
+    monkeypatch.setattr(cache_module, 'execute_with_retry', _fake_fetch)
+
+    cache.reload_from_db()
+
+    assert fetches == [False, False]
+    assert cache.initialized is True
+    assert list(cache.id_map) == ['new.png']
+    assert cache.id_map['new.png']['is_favorite'] is True
+
+
+def test_global_metadata_cache_reload_keeps_live_cache_when_external_writes_never_settle(monkeypatch, tmp_path):
+    from core.data import cache as cache_module
+    from core.data import ui_store as ui_store_module
+
+    (tmp_path / 'cards').mkdir()
+    monkeypatch.setattr(cache_module, 'CARDS_FOLDER', str(tmp_path / 'cards'))
+    monkeypatch.setattr(ui_store_module, 'UI_DATA_FILE', str(tmp_path / 'ui_data.json'))
+    cache = cache_module.GlobalMetadataCache()
+    live = {'id': 'old.png', 'category': '', 'tags': []}
+    cache.cards = [live]
+    cache.id_map = {'old.png': live}
+    cache.initialized = True
+    fetches = []
+
+    def _fake_fetch(_fn, max_retries=5):
+        fetches.append(cache.lock.locked())
+        # 模拟接口在锁内直接改写缓存字段
+        with cache.mutating():
+            cache.id_map['old.png']['last_modified'] = len(fetches)
+        return [('new.png', 'New', '[]', '', '', '', 1.0, 'h', 0, 0)]
+
+    monkeypatch.setattr(cache_module, 'execute_with_retry', _fake_fetch)
+
+    cache.reload_from_db()
+
+    assert fetches == [False] * cache_module.RELOAD_MAX_ATTEMPTS
+    assert cache.id_map == {'old.png': live}
+    assert live['last_modified'] == cache_module.RELOAD_MAX_ATTEMPTS
+
+
+def test_cache_parse_tags_json_handles_bad_values_with_and_without_orjson(monkeypatch):
+    from core.data import cache as cache_module
+
+    for orjson_module in (cache_module.orjson, None):
+        monkeypatch.setattr(cache_module, 'orjson', orjson_module)
+        assert cache_module._parse_tags_json('["a", "标签"]') == ['a', '标签']
+        assert len(cache_module._parse_tags_json('[NaN]')) == 1
+        assert cache_module._parse_tags_json('not json') == []
+        assert cache_module._parse_tags_json(None) == []
+        assert cache_module._parse_tags_json('') == []
+
+
+def test_cache_scan_card_folders_matches_walk_rules(tmp_path):
+    import os
+    from core.data import cache as cache_module
+
+    (tmp_path / 'a' / 'b').mkdir(parents=True)
+    (tmp_path / 'a' / '.hidden' / 'x').mkdir(parents=True)
+    (tmp_path / 'pack').mkdir()
+    (tmp_path / 'pack' / '.bundle').write_text('', encoding='utf-8')
+    (tmp_path / 'a' / 'card.png').write_text('', encoding='utf-8')
+    os.symlink(tmp_path / 'a', tmp_path / 'link')
+
+    physical, walked, bundles = cache_module._scan_card_folders(str(tmp_path))
+
+    assert physical == {'a', 'a/b', 'pack', 'link'}
+    assert walked == {'a', 'a/b', 'pack'}
+    assert bundles == {'pack'}
+
+
+def test_global_metadata_cache_rename_folder_recounts_categories():
+    from core.data.cache import GlobalMetadataCache
+
+    cache = GlobalMetadataCache()
+    cards = [
+        {'id': 'old/a.png', 'category': 'old', 'tags': []},
+        {'id': 'old/sub/b.png', 'category': 'old/sub', 'tags': []},
+        {'id': 'old/sub/c.png', 'category': 'old/sub', 'tags': []},
+        {'id': 'root.png', 'category': '', 'tags': []},
+    ]
+    cache.cards = list(cards)
+    cache.id_map = {c['id']: c for c in cards}
+    cache.category_counts = {'old': 3, 'old/sub': 2, 'empty': 0}
+    cache.visible_folders = ['empty', 'old', 'old/sub']
+
+    cache.rename_folder_update('old', 'new')
+
+    assert cache.category_counts == {'new': 3, 'new/sub': 2}
+    assert cache.visible_folders == ['empty', 'new', 'new/sub']
+    assert sorted(cache.id_map) == ['new/a.png', 'new/sub/b.png', 'new/sub/c.png', 'root.png']
+
+
+def test_global_metadata_cache_delete_updates_keep_list_and_counts_consistent():
+    from core.data.cache import GlobalMetadataCache
+
+    cache = GlobalMetadataCache()
+    cards = [{'id': f'a/c{i}.png', 'category': 'a', 'tags': []} for i in range(5)]
+    bundle = {'id': 'b/pack/v2.png', 'category': 'b', 'tags': [], 'is_bundle': True, 'bundle_dir': 'b/pack'}
+    version = {'id': 'b/pack/v1.png', 'category': 'b', 'tags': []}
+    cache.cards = cards + [bundle]
+    cache.id_map = {c['id']: c for c in cards + [bundle, version]}
+    cache.bundle_map = {'b/pack': 'b/pack/v2.png'}
+    cache.category_counts = {'a': 5, 'b': 1}
+
+    cache.delete_card_update('a/c1.png')
+    cache.delete_card_update('a/c1.png')
+    # 外部直接替换列表后，位置索引需自动重建
+    cache.cards = list(cache.cards)
+    cache.delete_card_update('a/c4.png')
+    cache.delete_bundle_update('b/pack')
+    cache.add_card_update({'id': 'a/new.png', 'category': 'a', 'tags': ['x'], 'last_modified': 1})
+    cache.delete_card_update('a/c0.png')
+
+    # 删除后其余卡片保持原有顺序
+    assert [c['id'] for c in cache.cards] == ['a/c2.png', 'a/c3.png', 'a/new.png']
+    assert sorted(cache.id_map) == ['a/c2.png', 'a/c3.png', 'a/new.png']
+    assert cache.category_counts == {'a': 3, 'b': 0}
+    assert cache._listed_index_locked(cache.id_map['a/new.png']) == 2
+    assert cache.bundle_map == {}
+
+
+def test_global_metadata_cache_set_bundle_card_replaces_listed_leader():
+    from core.data.cache import GlobalMetadataCache
+
+    cache = GlobalMetadataCache()
+    plain = {'id': 'a/c.png', 'category': 'a', 'tags': []}
+    old_leader = {'id': 'b/pack/v1.png', 'category': 'b', 'is_bundle': True, 'bundle_dir': 'b/pack'}
+    new_leader = {'id': 'b/pack/v2.png', 'category': 'b', 'is_bundle': True, 'bundle_dir': 'b/pack'}
+    cache.cards = [plain, old_leader]
+    cache.id_map = {'a/c.png': plain, 'b/pack/v2.png': new_leader}
+    cache.category_counts = {'a': 1, 'b': 1}
+
+    with cache.lock:
+        cache.set_bundle_card_locked('b/pack', new_leader)
+        cache.set_bundle_card_locked('c/other', {'id': 'c/other/v.png', 'is_bundle': True, 'bundle_dir': 'c/other'})
+
+    assert [c['id'] for c in cache.cards] == ['c/other/v.png', 'a/c.png', 'b/pack/v2.png']
+    cache.delete_card_update('b/pack/v2.png')
+    assert [c['id'] for c in cache.cards] == ['c/other/v.png', 'a/c.png']
+    assert cache.category_counts['b'] == 0
+
+
 def test_modify_card_attributes_internal_enqueues_incremental_index_repair_after_delayed_tag_write(monkeypatch, tmp_path):
     from core.services import card_service
 
@@ -2331,6 +2331,9 @@ def test_update_card_rename_moves_embedded_worldinfo_note_key(monkeypatch, tmp_p
             self.bundle_map = {}
             self.lock = threading.Lock()
 
+        def mutating(self):
+            return self.lock
+
         def update_card_data(self, _card_id, payload):
             payload = dict(payload)
             payload['image_url'] = '/cards_file/group%2Fhero-renamed.json'
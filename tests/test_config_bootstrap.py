@@ -1,5 +1,6 @@
 import json
 import logging
+import os
 import sys
 from io import StringIO
 from argparse import Namespace
@@ -260,3 +261,110 @@ def test_ensure_startup_config_bootstraps_runtime_directories(monkeypatch):
 
     assert ('ensure_config_file', None) in calls
     assert ('ensure_runtime_dirs', {'cards_dir': 'cards'}) in calls
+
+
+def test_load_config_cached_reuses_parse_until_config_file_changes(tmp_path, monkeypatch):
+    target = tmp_path / 'config.json'
+    target.write_text(json.dumps({'auth_username': 'alice'}), encoding='utf-8')
+    monkeypatch.setattr(config_module, 'CONFIG_FILE', str(target))
+
+    first = config_module.load_config_cached()
+    assert first['auth_username'] == 'alice'
+    assert config_module.load_config_cached() is first
+
+    assert config_module.save_config({**first, 'auth_username': 'bob'}) is True
+    second = config_module.load_config_cached()
+    assert second is not first
+    assert second['auth_username'] == 'bob'
+
+
+def test_config_proxy_reads_through_cache_and_sees_saved_changes(tmp_path, monkeypatch):
+    target = tmp_path / 'config.json'
+    target.write_text(json.dumps({'default_sort': 'name_asc'}), encoding='utf-8')
+    monkeypatch.setattr(config_module, 'CONFIG_FILE', str(target))
+    proxy = config_module.ConfigProxy()
+    loads = []
+    original_load = config_module.load_config
+
+    def _counting_load():
+        loads.append(1)
+        return original_load()
+
+    monkeypatch.setattr(config_module, 'load_config', _counting_load)
+    config_module._invalidate_config_cache()
+
+    assert proxy.get('default_sort') == 'name_asc'
+    assert proxy['default_sort'] == 'name_asc'
+    assert 'default_sort' in proxy
+    assert len(loads) == 1
+
+    assert config_module.save_config({**proxy.to_dict(), 'default_sort': 'date_desc'}) is True
+    assert proxy.get('default_sort') == 'date_desc'
+
+    snapshot = proxy.to_dict()
+    snapshot['default_sort'] = 'mutated'
+    assert proxy.get('default_sort') == 'date_desc'
+
+
+def test_runtime_folder_getters_create_directory_only_when_missing(tmp_path, monkeypatch):
+    target = tmp_path / 'config.json'
+    target.write_text(json.dumps({'cards_dir': str(tmp_path / 'cards')}), encoding='utf-8')
+    monkeypatch.setattr(config_module, 'CONFIG_FILE', str(target))
+    config_module._invalidate_config_cache()
+    ensured = []
+    original_ensure = config_module._ensure_dir
+
+    def _recording_ensure(path):
+        ensured.append(path)
+        return original_ensure(path)
+
+    monkeypatch.setattr(config_module, '_ensure_dir', _recording_ensure)
+
+    assert config_module.get_cards_folder() == str(tmp_path / 'cards')
+    assert os.fspath(config_module.CARDS_FOLDER) == str(tmp_path / 'cards')
+    assert (tmp_path / 'cards').is_dir()
+    assert ensured == [str(tmp_path / 'cards')]
+
+    # 运行中被删除的目录在下次访问时重建
+    (tmp_path / 'cards').rmdir()
+    assert config_module.get_cards_folder() == str(tmp_path / 'cards')
+    assert (tmp_path / 'cards').is_dir()
+    assert ensured == [str(tmp_path / 'cards')] * 2
+
+    assert config_module.save_config({'cards_dir': str(tmp_path / 'moved')}) is True
+    assert config_module.get_cards_folder() == str(tmp_path / 'moved')
+    assert (tmp_path / 'moved').is_dir()
+
+
+def test_ensure_system_dirs_creates_leaf_dirs_once(tmp_path, monkeypatch):
+    for name in ('DB_FOLDER', 'THUMB_FOLDER', 'TRASH_FOLDER', 'TEMP_DIR'):
+        monkeypatch.setattr(config_module, name, str(tmp_path / 'data' / 'system' / name.lower()))
+    monkeypatch.setattr(config_module, '_SYSTEM_DIRS_READY', False)
+
+    config_module.ensure_system_dirs()
+    assert (tmp_path / 'data' / 'system' / 'db_folder').is_dir()
+    assert (tmp_path / 'data' / 'system' / 'temp_dir').is_dir()
+
+    monkeypatch.setattr(config_module.os, 'makedirs', lambda *args, **kwargs: (_ for _ in ()).throw(AssertionError('ran twice')))
+    config_module.ensure_system_dirs()
+
+
+def test_load_config_parses_with_and_without_orjson(tmp_path, monkeypatch):
+    target = tmp_path / 'config.json'
+    target.write_text(json.dumps({'port': 9001, 'host': '主机'}, ensure_ascii=False), encoding='utf-8')
+    monkeypatch.setattr(config_module, 'CONFIG_FILE', str(target))
+
+    fast = config_module.load_config()
+    monkeypatch.setattr(config_module, 'orjson', None)
+    plain = config_module.load_config()
+
+    assert fast == plain
+    assert (fast['port'], fast['host']) == (9001, '主机')
+
+
+def test_load_config_falls_back_to_stdlib_for_values_orjson_rejects(tmp_path, monkeypatch):
+    target = tmp_path / 'config.json'
+    target.write_text('{"port": 9002, "ratio": NaN}', encoding='utf-8')
+    monkeypatch.setattr(config_module, 'CONFIG_FILE', str(target))
+
+    assert config_module.load_config()['port'] == 9002
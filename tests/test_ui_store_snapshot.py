@@ -0,0 +1,51 @@
+import json
+import sys
+from pathlib import Path
+
+
+ROOT = Path(__file__).resolve().parents[1]
+if str(ROOT) not in sys.path:
+    sys.path.insert(0, str(ROOT))
+
+
+from core.data import ui_store as ui_store_module
+
+
+def test_load_ui_data_snapshot_reuses_parsed_data_until_file_changes(monkeypatch, tmp_path):
+    ui_path = tmp_path / 'ui_data.json'
+    ui_path.write_text(json.dumps({'cards/a.png': {'summary': 'first'}}, ensure_ascii=False), encoding='utf-8')
+    monkeypatch.setattr(ui_store_module, 'UI_DATA_FILE', str(ui_path))
+
+    load_calls = []
+    original_load = ui_store_module.load_ui_data
+
+    def _counting_load():
+        load_calls.append(1)
+        return original_load()
+
+    monkeypatch.setattr(ui_store_module, 'load_ui_data', _counting_load)
+
+    first = ui_store_module.load_ui_data_snapshot()
+    second = ui_store_module.load_ui_data_snapshot()
+
+    assert first is second
+    assert first['cards/a.png']['summary'] == 'first'
+    assert len(load_calls) == 1
+
+    ui_path.write_text(json.dumps({'cards/a.png': {'summary': 'second, longer'}}, ensure_ascii=False), encoding='utf-8')
+    third = ui_store_module.load_ui_data_snapshot()
+
+    assert third['cards/a.png']['summary'] == 'second, longer'
+    assert len(load_calls) == 2
+
+
+def test_save_ui_data_invalidates_snapshot(monkeypatch, tmp_path):
+    ui_path = tmp_path / 'ui_data.json'
+    ui_path.write_text(json.dumps({}, ensure_ascii=False), encoding='utf-8')
+    monkeypatch.setattr(ui_store_module, 'UI_DATA_FILE', str(ui_path))
+
+    assert ui_store_module.load_ui_data_snapshot() == {}
+
+    assert ui_store_module.save_ui_data({'cards/a.png': {'summary': 'saved'}}) is True
+
+    assert ui_store_module.load_ui_data_snapshot() == {'cards/a.png': {'summary': 'saved'}}
@@ -1,7 +1,9 @@
+import errno
 import json
 import sqlite3
 import sys
 import threading
+from collections import OrderedDict
 from io import BytesIO
 from pathlib import Path
 
@@ -211,6 +213,240 @@ def test_worldinfo_list_filters_by_display_category(monkeypatch, tmp_path):
     assert [item['name'] for item in payload['items']] == ['Dragon Lore']
 
 
+def test_worldinfo_list_search_is_case_insensitive_and_hides_private_search_keys(monkeypatch, tmp_path):
+    lorebooks_dir = tmp_path / 'lorebooks'
+    ui_path = tmp_path / 'ui_data.json'
+
+    _write_json(lorebooks_dir / 'dragon.json', {'name': 'Dragon Lore', 'entries': {}})
+    _write_json(lorebooks_dir / 'forest.json', {'name': 'Forest Lore', 'entries': {}})
+    ui_path.write_text(json.dumps({}, ensure_ascii=False), encoding='utf-8')
+
+    monkeypatch.setattr(world_info_api.ctx, 'cache', _FakeCache([]))
+    monkeypatch.setattr(ui_store_module, 'UI_DATA_FILE', str(ui_path))
+    monkeypatch.setattr(world_info_api, 'BASE_DIR', str(tmp_path))
+    monkeypatch.setattr(world_info_api, 'CARDS_FOLDER', str(tmp_path / 'cards'))
+    monkeypatch.setattr(world_info_api, 'load_config', lambda: {'world_info_dir': str(lorebooks_dir), 'resources_dir': str(tmp_path / 'resources')})
+    monkeypatch.setattr(world_info_api, 'get_db', lambda: _FakeConn())
+
+    client = _make_test_app().test_client()
+    for query in ('DRAGON', 'dragon'):
+        res = client.get(f'/api/world_info/list?type=global&search={query}')
+        payload = res.get_json()
+        assert [item['name'] for item in payload['items']] == ['Dragon Lore']
+        assert not any(key.startswith('_') for key in payload['items'][0])
+
+
+def test_worldinfo_global_list_skips_resource_lorebooks_nested_in_global_dir(monkeypatch, tmp_path):
+    lorebooks_dir = tmp_path / 'lorebooks'
+    resources_dir = lorebooks_dir / 'resources'
+    ui_path = tmp_path / 'ui_data.json'
+
+    _write_json(lorebooks_dir / '科幻' / 'dragon.json', {'name': 'Dragon Lore', 'entries': {}})
+    _write_json(resources_dir / 'lucy' / 'lorebooks' / 'companion.json', {'name': 'Companion Lore', 'entries': {}})
+    _write_json(resources_dir / 'lucy' / 'notes.json', {'name': 'Resource Notes', 'entries': {}})
+
+    ui_path.write_text(json.dumps({}, ensure_ascii=False), encoding='utf-8')
+
+    monkeypatch.setattr(world_info_api.ctx, 'cache', _FakeCache([]))
+    monkeypatch.setattr(ui_store_module, 'UI_DATA_FILE', str(ui_path))
+    monkeypatch.setattr(world_info_api, 'BASE_DIR', str(tmp_path))
+    monkeypatch.setattr(world_info_api, 'CARDS_FOLDER', str(tmp_path / 'cards'))
+    monkeypatch.setattr(world_info_api, 'load_config', lambda: {'world_info_dir': str(lorebooks_dir), 'resources_dir': str(resources_dir)})
+    monkeypatch.setattr(world_info_api, 'get_db', lambda: _FakeConn())
+
+    client = _make_test_app().test_client()
+    res = client.get('/api/world_info/list?type=global')
+
+    assert res.status_code == 200
+    payload = res.get_json()
+    assert [item['name'] for item in payload['items']] == ['Dragon Lore']
+    assert payload['items'][0]['id'] == 'global::科幻/dragon.json'
+
+
+def test_compute_wi_signature_ignores_entry_order_and_whitespace():
+    dict_book = {
+        'entries': {
+            '1': {'content': 'Dragons  breathe\nfire', 'comment': 'dragon', 'uid': 1},
+            '0': {'content': '  Knights ride ', 'comment': 'knight'},
+        }
+    }
+    list_book = [
+        {'content': 'Knights ride', 'comment': 'knight', 'keys': ['k']},
+        {'content': 'Dragons breathe fire', 'comment': ' dragon '},
+    ]
+
+    assert world_info_api._compute_wi_signature(dict_book) == world_info_api._compute_wi_signature(list_book)
+    assert world_info_api._compute_wi_signature(dict_book) != world_info_api._compute_wi_signature(
+        [{'content': 'Knights ride', 'comment': 'knight'}]
+    )
+    assert world_info_api._compute_wi_signature({'entries': {}}) is None
+    assert world_info_api._compute_wi_signature('not a book') is None
+
+
+def test_worldinfo_global_dedup_reuses_embedded_signature_until_card_changes(monkeypatch, tmp_path):
+    lorebooks_dir = tmp_path / 'lorebooks'
+    cards_dir = tmp_path / 'cards'
+    ui_path = tmp_path / 'ui_data.json'
+    card_file = cards_dir / 'lucy.png'
+
+    _write_json(lorebooks_dir / 'copy.json', {'name': 'Copied Book', 'entries': {'0': {'content': 'hello'}}})
+    _write_json(lorebooks_dir / 'other.json', {'name': 'Other Book', 'entries': {'0': {'content': 'bye'}}})
+    cards_dir.mkdir(parents=True)
+    card_file.write_bytes(b'png')
+    ui_path.write_text(json.dumps({}, ensure_ascii=False), encoding='utf-8')
+
+    extract_calls = []
+
+    def _fake_extract(path):
+        extract_calls.append(path)
+        return {'data': {'character_book': {'name': 'Embedded Book', 'entries': {'0': {'content': 'hello'}}}}}
+
+    cards = [_make_card('lucy.png', '科幻', has_character_book=True)]
+    monkeypatch.setattr(world_info_api.ctx, 'cache', _FakeCache(cards))
+    monkeypatch.setattr(world_info_api.ctx, 'wi_card_sig_cache', OrderedDict())
+    monkeypatch.setattr(ui_store_module, 'UI_DATA_FILE', str(ui_path))
+    monkeypatch.setattr(world_info_api, 'BASE_DIR', str(tmp_path))
+    monkeypatch.setattr(world_info_api, 'CARDS_FOLDER', str(cards_dir))
+    monkeypatch.setattr(world_info_api, 'load_config', lambda: {'world_info_dir': str(lorebooks_dir), 'resources_dir': str(tmp_path / 'resources')})
+    monkeypatch.setattr(world_info_api, 'get_db', lambda: _FakeConn())
+    monkeypatch.setattr(world_info_api, 'extract_card_info', _fake_extract)
+
+    client = _make_test_app().test_client()
+    for _ in range(2):
+        world_info_api.invalidate_wi_list_cache()
+        res = client.get('/api/world_info/list?type=global')
+        assert res.status_code == 200
+        assert [item['name'] for item in res.get_json()['items']] == ['Other Book']
+    assert len(extract_calls) == 1
+
+    card_file.write_bytes(b'png-updated')
+    world_info_api.invalidate_wi_list_cache()
+    client.get('/api/world_info/list?type=global')
+    assert len(extract_calls) == 2
+
+
+def test_worldinfo_all_list_reuses_global_scan_when_only_card_category_changes(monkeypatch, tmp_path):
+    lorebooks_dir = tmp_path / 'lorebooks'
+    resources_dir = tmp_path / 'resources'
+    ui_path = tmp_path / 'ui_data.json'
+
+    _write_json(lorebooks_dir / '奇幻' / 'dragon.json', {'name': 'Dragon Lore', 'entries': {}})
+    _write_json(resources_dir / 'lucy' / 'lorebooks' / 'companion.json', {'name': 'Companion Lore', 'entries': {}})
+    ui_path.write_text(json.dumps({'cards/lucy.png': {'resource_folder': 'lucy'}}, ensure_ascii=False), encoding='utf-8')
+
+    loaded_paths = []
+    original_loader = world_info_api._load_world_info_json
+
+    def _counting_loader(path):
+        loaded_paths.append(Path(path).name)
+        return original_loader(path)
+
+    cache = _FakeCache([_make_card('cards/lucy.png', '科幻')])
+    monkeypatch.setattr(world_info_api.ctx, 'cache', cache)
+    monkeypatch.setattr(ui_store_module, 'UI_DATA_FILE', str(ui_path))
+    monkeypatch.setattr(world_info_api, 'BASE_DIR', str(tmp_path))
+    monkeypatch.setattr(world_info_api, 'CARDS_FOLDER', str(tmp_path / 'cards'))
+    monkeypatch.setattr(world_info_api, 'load_config', lambda: {'world_info_dir': str(lorebooks_dir), 'resources_dir': str(resources_dir)})
+    monkeypatch.setattr(world_info_api, 'get_db', lambda: _FakeConn())
+    monkeypatch.setattr(world_info_api, '_load_world_info_json', _counting_loader)
+    world_info_api.invalidate_wi_list_cache()
+
+    client = _make_test_app().test_client()
+    first = client.get('/api/world_info/list?type=all').get_json()
+    assert sorted(loaded_paths) == ['companion.json', 'dragon.json']
+
+    cache.cards = [_make_card('cards/lucy.png', '日常')]
+    second = client.get('/api/world_info/list?type=all').get_json()
+
+    assert sorted(loaded_paths) == ['companion.json', 'companion.json', 'dragon.json']
+    first_items = {item['type']: item for item in first['items']}
+    second_items = {item['type']: item for item in second['items']}
+    assert first_items['resource']['display_category'] == '科幻'
+    assert second_items['resource']['display_category'] == '日常'
+    assert second_items['global']['display_category'] == '奇幻'
+
+
+def test_migrate_lorebooks_moves_only_worldinfo_json_into_lorebooks(monkeypatch, tmp_path):
+    resources_dir = tmp_path / 'resources'
+    ui_path = tmp_path / 'ui_data.json'
+
+    _write_json(resources_dir / 'lucy' / 'book.json', {'name': 'Lucy Lore', 'entries': {}})
+    _write_json(resources_dir / 'lucy' / 'settings.json', {'theme': 'dark'})
+    _write_json(resources_dir / 'mia' / 'notes.json', {'theme': 'light'})
+    (resources_dir / 'lucy' / 'nested.json').mkdir()
+    ui_path.write_text(json.dumps({}, ensure_ascii=False), encoding='utf-8')
+
+    monkeypatch.setattr(world_info_api.ctx, 'cache', _FakeCache([]))
+    monkeypatch.setattr(ui_store_module, 'UI_DATA_FILE', str(ui_path))
+    monkeypatch.setattr(world_info_api, 'BASE_DIR', str(tmp_path))
+    monkeypatch.setattr(world_info_api, 'load_config', lambda: {'resources_dir': str(resources_dir)})
+
+    client = _make_test_app().test_client()
+    res = client.post('/api/tools/migrate_lorebooks')
+
+    assert res.get_json() == {'success': True, 'count': 1}
+    assert (resources_dir / 'lucy' / 'lorebooks' / 'book.json').is_file()
+    assert not (resources_dir / 'lucy' / 'book.json').exists()
+    assert (resources_dir / 'lucy' / 'settings.json').is_file()
+    assert not (resources_dir / 'mia' / 'lorebooks').exists()
+
+
+def test_worldinfo_global_list_hides_books_named_like_embedded_books(monkeypatch, tmp_path):
+    lorebooks_dir = tmp_path / 'lorebooks'
+    ui_path = tmp_path / 'ui_data.json'
+
+    _write_json(lorebooks_dir / 'meta.json', {'name': ' embedded book ', 'entries': {}})
+    _write_json(lorebooks_dir / 'Embedded Book.json', {'entries': {}})
+    _write_json(lorebooks_dir / 'kept.json', {'name': 'Embedded Book.v2', 'entries': {}})
+    ui_path.write_text(json.dumps({}, ensure_ascii=False), encoding='utf-8')
+
+    monkeypatch.setattr(world_info_api.ctx, 'cache', _FakeCache([]))
+    monkeypatch.setattr(ui_store_module, 'UI_DATA_FILE', str(ui_path))
+    monkeypatch.setattr(world_info_api, 'BASE_DIR', str(tmp_path))
+    monkeypatch.setattr(world_info_api, 'CARDS_FOLDER', str(tmp_path / 'cards'))
+    monkeypatch.setattr(world_info_api, 'load_config', lambda: {'world_info_dir': str(lorebooks_dir), 'resources_dir': str(tmp_path / 'resources')})
+    monkeypatch.setattr(world_info_api, 'get_db', lambda: _FakeConn())
+    world_info_api.invalidate_wi_list_cache()
+
+    client = _make_test_app().test_client()
+    res = client.get('/api/world_info/list?type=global')
+
+    assert res.status_code == 200
+    assert [item['file_name'] for item in res.get_json()['items']] == ['kept.json']
+
+
+def test_migrate_lorebooks_falls_back_to_copy_move_across_devices(monkeypatch, tmp_path):
+    resources_dir = tmp_path / 'resources'
+    ui_path = tmp_path / 'ui_data.json'
+
+    _write_json(resources_dir / 'lucy' / 'book.json', {'name': 'Lucy Lore', 'entries': {}})
+    ui_path.write_text(json.dumps({}, ensure_ascii=False), encoding='utf-8')
+
+    moved = []
+
+    def _cross_device_replace(_src, _dst):
+        raise OSError(errno.EXDEV, 'Invalid cross-device link')
+
+    def _fake_move(src, dst):
+        moved.append((Path(src).name, Path(dst).parent.name))
+        Path(dst).write_bytes(Path(src).read_bytes())
+        Path(src).unlink()
+
+    monkeypatch.setattr(world_info_api.ctx, 'cache', _FakeCache([]))
+    monkeypatch.setattr(ui_store_module, 'UI_DATA_FILE', str(ui_path))
+    monkeypatch.setattr(world_info_api, 'BASE_DIR', str(tmp_path))
+    monkeypatch.setattr(world_info_api, 'load_config', lambda: {'resources_dir': str(resources_dir)})
+    monkeypatch.setattr(world_info_api.os, 'replace', _cross_device_replace)
+    monkeypatch.setattr(world_info_api.shutil, 'move', _fake_move)
+
+    client = _make_test_app().test_client()
+    res = client.post('/api/tools/migrate_lorebooks')
+
+    assert res.get_json() == {'success': True, 'count': 1}
+    assert moved == [('book.json', 'lorebooks')]
+    assert (resources_dir / 'lucy' / 'lorebooks' / 'book.json').is_file()
+
+
 def test_worldinfo_list_uses_override_category_for_resource_item(monkeypatch, tmp_path):
     resources_dir = tmp_path / 'resources'
     ui_path = tmp_path / 'ui_data.json'
@@ -349,6 +585,37 @@ def test_worldinfo_detail_supports_embedded_card_id(monkeypatch, tmp_path):
     assert payload['data']['name'] == 'Embedded Book'
 
 
+def test_worldinfo_detail_preview_truncates_large_global_file(monkeypatch, tmp_path):
+    lorebooks_dir = tmp_path / 'lorebooks'
+    ui_path = tmp_path / 'ui_data.json'
+    ui_path.write_text(json.dumps({}, ensure_ascii=False), encoding='utf-8')
+    book_path = lorebooks_dir / 'huge.json'
+    entries = {str(idx): {'content': f'entry {idx} ' + 'x' * 600, 'order': idx} for idx in reversed(range(500))}
+    _write_json(book_path, {'name': 'Huge Lore', 'entries': entries})
+    assert book_path.stat().st_size >= world_info_api.WI_PREVIEW_STREAM_MIN_BYTES
+
+    monkeypatch.setattr(ui_store_module, 'UI_DATA_FILE', str(ui_path))
+    monkeypatch.setattr(world_info_api, 'BASE_DIR', str(tmp_path))
+    monkeypatch.setattr(world_info_api, 'load_config', lambda: {'world_info_dir': str(lorebooks_dir), 'resources_dir': str(tmp_path / 'resources')})
+
+    client = _make_test_app().test_client()
+    res = client.post('/api/world_info/detail', json={
+        'id': 'global::huge.json',
+        'source_type': 'global',
+        'file_path': str(book_path),
+        'preview_limit': 3,
+    })
+
+    payload = res.get_json()
+    assert payload['success'] is True
+    assert payload['truncated'] is True
+    assert payload['total_entries'] == 500
+    assert payload['preview_limit'] == 3
+    assert payload['data']['name'] == 'Huge Lore'
+    assert list(payload['data']['entries'].keys()) == ['0', '1', '2']
+    assert payload['data']['entries']['2']['order'] == 2
+
+
 def test_worldinfo_export_returns_attachment_for_global_file(monkeypatch, tmp_path):
     lorebooks_dir = tmp_path / 'lorebooks'
     resources_dir = tmp_path / 'resources'
@@ -496,6 +763,51 @@ def test_worldinfo_export_returns_attachment_for_embedded_book(monkeypatch, tmp_
     assert payload['entries']['0']['disable'] is False
 
 
+def test_build_export_worldbook_payload_renames_entry_fields_in_stable_order():
+    book = {
+        'name': 'Lore',
+        'extensions': {'x': 1},
+        'entries': [
+            {'keys': ['a'], 'content': 'A', 'enabled': False, 'insertion_order': 5, 'uid': 99},
+            'skip-me',
+            {'key': ['b'], 'keysecondary': ['c'], 'disable': False, 'comment': 'B'},
+        ],
+    }
+
+    payload = world_info_api._build_export_worldbook_payload(book)
+
+    assert list(payload) == ['entries', 'name', 'extensions']
+    assert list(payload['entries']) == ['0', '2']
+    first = payload['entries']['0']
+    assert list(first) == ['content', 'uid', 'displayIndex', 'key', 'keysecondary', 'disable', 'order']
+    assert first == {'content': 'A', 'uid': 0, 'displayIndex': 0, 'key': ['a'], 'keysecondary': [], 'disable': True, 'order': 5}
+    assert payload['entries']['2'] == {
+        'key': ['b'], 'keysecondary': ['c'], 'disable': False, 'comment': 'B', 'uid': 2, 'displayIndex': 2,
+    }
+
+
+def test_build_export_worldbook_payload_handles_plain_and_list_books():
+    assert world_info_api._build_export_worldbook_payload({'name': 'Lore', 'entries': {}}) == {'entries': {}, 'name': 'Lore'}
+    assert world_info_api._build_export_worldbook_payload({'entries': [], 'scan_depth': 4}, 'Fallback') == {
+        'entries': {}, 'name': 'Fallback', 'scan_depth': 4,
+    }
+    assert world_info_api._build_export_worldbook_payload([{'content': 'A'}], 'Fallback')['name'] == 'Fallback'
+
+
+def test_send_worldbook_json_spools_large_payload_without_orjson(monkeypatch):
+    payload = {'entries': {str(i): {'content': '长文本' * 200, 'uid': i} for i in range(1000)}, 'name': 'Big'}
+    monkeypatch.setattr(world_info_api, 'orjson', None)
+
+    with _make_test_app().test_request_context():
+        res = world_info_api._send_worldbook_json(payload, 'big.json')
+        res.direct_passthrough = False
+        body = res.get_data()
+
+    assert len(body) > world_info_api.WI_EXPORT_SPOOL_BYTES
+    assert body == json.dumps(payload, ensure_ascii=False, indent=2).encode('utf-8')
+    assert 'attachment' in res.headers['Content-Disposition']
+
+
 def test_worldinfo_export_rejects_invalid_file_path(monkeypatch, tmp_path):
     lorebooks_dir = tmp_path / 'lorebooks'
     resources_dir = tmp_path / 'resources'
@@ -1422,6 +1734,7 @@ def test_update_card_bundle_ui_only_resource_folder_change_enqueues_world_owner_
         'id_map': {},
         'bundle_map': {},
         'lock': threading.Lock(),
+        'mutating': lambda self: self.lock,
     })())
 
     client = app.test_client()
@@ -2828,6 +3141,35 @@ def test_upload_worldinfo_uses_target_category_subfolder(monkeypatch, tmp_path):
     assert (lorebooks_dir / '科幻' / '赛博朋克' / 'dragon.json').exists()
 
 
+def test_upload_worldinfo_rejects_invalid_json_without_leaving_partial_file(monkeypatch, tmp_path):
+    lorebooks_dir = tmp_path / 'lorebooks'
+    resources_dir = tmp_path / 'resources'
+    monkeypatch.setattr(world_info_api.ctx, 'cache', _FakeCache([]))
+    monkeypatch.setattr(world_info_api, 'BASE_DIR', str(tmp_path))
+    monkeypatch.setattr(world_info_api, 'load_config', lambda: {'world_info_dir': str(lorebooks_dir), 'resources_dir': str(resources_dir)})
+    monkeypatch.setattr(world_info_api, 'suppress_fs_events', lambda *_args, **_kwargs: None)
+
+    good_payload = json.dumps({'name': 'Dragon Lore', 'entries': {'0': {'content': '龙' * 1000}}}, ensure_ascii=False).encode('utf-8')
+    client = _make_test_app().test_client()
+    res = client.post(
+        '/api/upload_world_info',
+        data={
+            'files': [
+                (BytesIO(good_payload), 'dragon.json'),
+                (BytesIO(b'{"name": "Broken", "entries": {'), 'broken.json'),
+            ],
+        },
+        content_type='multipart/form-data',
+    )
+
+    payload = res.get_json()
+    assert payload['success'] is True
+    assert payload['count'] == 1
+    assert 'broken.json' in payload['msg']
+    assert (lorebooks_dir / 'dragon.json').read_bytes() == good_payload
+    assert not (lorebooks_dir / 'broken.json').exists()
+
+
 def test_upload_worldinfo_enqueues_refresh_for_each_saved_file(monkeypatch, tmp_path):
     lorebooks_dir = tmp_path / 'lorebooks'
     resources_dir = tmp_path / 'resources'
@@ -3027,3 +3369,40 @@ def test_worldinfo_resource_override_rejects_non_resource_path_even_with_resourc
     reset_payload = reset_res.get_json()
     assert reset_payload['success'] is False
     assert '非法路径' in reset_payload['msg'] or '资源' in reset_payload['msg']
+
+
+def test_stream_world_info_preview_matches_full_load_including_nested_top_level_keys(monkeypatch, tmp_path):
+    import pytest
+
+    pytest.importorskip('ijson')
+    monkeypatch.setattr(world_info_api, 'WI_PREVIEW_STREAM_MIN_BYTES', 0)
+    cfg = {'wi_preview_limit': 2, 'wi_preview_entry_max_chars': 0}
+    books = {
+        'map_entries.json': {
+            'name': 'Dragon Lore',
+            'extensions': {'depth': 4, 'tags': ['a', {'nested': [1, 2.5, None]}]},
+            'entries': {'10': {'content': 'c'}, '2': {'content': 'b'}, '1': {'content': 'a'}},
+            'originalData': [{'k': 'v'}, []],
+            'flag': True,
+        },
+        'list_entries.json': {
+            'meta': {'x': {}},
+            'entries': [{'content': 'a'}, {'content': 'b'}, {'content': 'c'}],
+        },
+        'root_list.json': [{'content': 'a'}, {'content': 'b'}, {'content': 'c'}],
+    }
+    for filename, book in books.items():
+        book_path = tmp_path / filename
+        _write_json(book_path, book)
+
+        streamed = world_info_api._stream_world_info_preview_source(str(book_path), 2)
+        assert streamed is not None
+        data, total = streamed
+        full = world_info_api._load_world_info_json(str(book_path))
+
+        assert total == 3
+        if isinstance(full, dict):
+            assert list(data) == list(full)
+        assert world_info_api._apply_world_info_preview(data, cfg, known_total=total) == (
+            world_info_api._apply_world_info_preview(full, cfg)
+        )
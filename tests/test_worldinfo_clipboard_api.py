@@ -0,0 +1,195 @@
+import sqlite3
+import sys
+from pathlib import Path
+
+from flask import Flask
+
+
+ROOT = Path(__file__).resolve().parents[1]
+if str(ROOT) not in sys.path:
+    sys.path.insert(0, str(ROOT))
+
+from core.api.v1 import world_info as world_info_api
+from core.data import db_session
+
+
+def _make_client(monkeypatch, tmp_path):
+    db_path = tmp_path / 'cards_metadata.db'
+    with sqlite3.connect(db_path) as conn:
+        conn.execute(
+            '''
+            CREATE TABLE wi_clipboard (
+                id INTEGER PRIMARY KEY AUTOINCREMENT,
+                content_json TEXT,
+                sort_order INTEGER,
+                created_at REAL
+            )
+            '''
+        )
+    conn.close()
+    monkeypatch.setattr(world_info_api, 'DEFAULT_DB_PATH', str(db_path))
+
+    app = Flask(__name__)
+    app.register_blueprint(world_info_api.bp)
+    return app.test_client(), str(db_path)
+
+
+def _list_contents(client):
+    payload = client.get('/api/wi/clipboard/list').get_json()
+    assert payload['success'] is True
+    return [item['content']['comment'] for item in payload['items']], [item['db_id'] for item in payload['items']]
+
+
+def test_wi_clipboard_add_reorder_delete_and_clear_round_trip(monkeypatch, tmp_path):
+    client, _db_path = _make_client(monkeypatch, tmp_path)
+
+    for comment in ('alpha', 'beta', 'gamma'):
+        res = client.post('/api/wi/clipboard/add', json={'entry': {'comment': comment}})
+        assert res.get_json() == {'success': True}
+
+    comments, ids = _list_contents(client)
+    assert comments == ['alpha', 'beta', 'gamma']
+
+    res = client.post('/api/wi/clipboard/reorder', json={'order_map': list(reversed(ids))})
+    assert res.get_json() == {'success': True}
+    assert _list_contents(client)[0] == ['gamma', 'beta', 'alpha']
+
+    res = client.post('/api/wi/clipboard/add', json={'entry': {'comment': 'beta-2'}, 'overwrite_id': ids[1]})
+    assert res.get_json()['success'] is True
+    res = client.post('/api/wi/clipboard/delete', json={'db_id': ids[2]})
+    assert res.get_json() == {'success': True}
+    assert _list_contents(client)[0] == ['beta-2', 'alpha']
+
+    res = client.post('/api/wi/clipboard/clear')
+    assert res.get_json() == {'success': True}
+    assert _list_contents(client)[0] == []
+
+
+def test_pooled_connection_is_reused_and_left_without_open_transaction(tmp_path):
+    db_path = str(tmp_path / 'pool.db')
+
+    with db_session.get_pooled_conn(db_path) as conn:
+        conn.execute('CREATE TABLE t (v INTEGER)')
+        conn.execute('BEGIN')
+        conn.execute('INSERT INTO t (v) VALUES (1)')
+        first = conn
+
+    with db_session.get_pooled_conn(db_path) as conn:
+        assert conn is first
+        assert conn.in_transaction is False
+        assert conn.execute('SELECT COUNT(*) FROM t').fetchone()[0] == 0
+
+
+def test_pooled_connection_is_dropped_after_db_file_is_replaced(tmp_path):
+    import os
+
+    db_path = str(tmp_path / 'pool.db')
+    with db_session.get_pooled_conn(db_path) as conn:
+        conn.execute('CREATE TABLE t (v INTEGER)')
+        conn.execute('INSERT INTO t (v) VALUES (1)')
+        # 文件级还原前须先把 WAL 落盘，否则残留的 -wal 会被套到新文件上
+        conn.execute('PRAGMA wal_checkpoint(TRUNCATE)')
+        first = conn
+
+    restored = str(tmp_path / 'restored.db')
+    with sqlite3.connect(restored) as other:
+        other.execute('CREATE TABLE t (v INTEGER)')
+        other.execute('INSERT INTO t (v) VALUES (7)')
+    other.close()
+    os.replace(restored, db_path)
+
+    with db_session.get_pooled_conn(db_path) as conn:
+        assert conn is not first
+        assert conn.execute('SELECT v FROM t').fetchone()[0] == 7
+
+
+def test_wi_clipboard_reorder_rolls_back_whole_batch_on_failure(monkeypatch, tmp_path):
+    client, db_path = _make_client(monkeypatch, tmp_path)
+    for comment in ('alpha', 'beta'):
+        client.post('/api/wi/clipboard/add', json={'entry': {'comment': comment}})
+    _comments, ids = _list_contents(client)
+
+    with sqlite3.connect(db_path) as conn:
+        conn.execute(
+            '''
+            CREATE TRIGGER reject_second BEFORE UPDATE ON wi_clipboard
+            WHEN NEW.id = %d BEGIN SELECT RAISE(ABORT, 'rejected'); END
+            ''' % ids[0]
+        )
+    conn.close()
+
+    res = client.post('/api/wi/clipboard/reorder', json={'order_map': list(reversed(ids))})
+
+    assert res.get_json()['success'] is False
+    with sqlite3.connect(db_path) as conn:
+        orders = dict(conn.execute('SELECT id, sort_order FROM wi_clipboard').fetchall())
+    conn.close()
+    assert orders == {ids[0]: 1, ids[1]: 2}
+
+
+def test_wi_clipboard_add_rejects_entries_beyond_limit_without_leaving_transaction_open(monkeypatch, tmp_path):
+    client, db_path = _make_client(monkeypatch, tmp_path)
+    with sqlite3.connect(db_path) as conn:
+        conn.executemany(
+            'INSERT INTO wi_clipboard (content_json, sort_order, created_at) VALUES (?, ?, ?)',
+            [('{"comment": "x"}', idx, 0.0) for idx in range(50)],
+        )
+    conn.close()
+
+    res = client.post('/api/wi/clipboard/add', json={'entry': {'comment': 'overflow'}})
+    assert res.get_json()['code'] == 'FULL'
+
+    client.post('/api/wi/clipboard/clear')
+    res = client.post('/api/wi/clipboard/add', json={'entry': {'comment': 'first'}})
+    assert res.get_json() == {'success': True}
+    assert _list_contents(client)[0] == ['first']
+
+
+def test_wi_clipboard_list_splices_stored_json_verbatim(monkeypatch, tmp_path):
+    client, db_path = _make_client(monkeypatch, tmp_path)
+    client.post('/api/wi/clipboard/add', json={'entry': {'comment': '世界书', 'keys': ['a', 'b']}})
+    with sqlite3.connect(db_path) as conn:
+        conn.execute(
+            'INSERT INTO wi_clipboard (content_json, sort_order, created_at) VALUES (?, ?, ?)',
+            ('{"comment":  "raw" , "z": 1}', 5, 0.0),
+        )
+    conn.close()
+
+    res = client.get('/api/wi/clipboard/list')
+
+    assert res.mimetype == 'application/json'
+    assert b'{"comment":  "raw" , "z": 1}' in res.data
+    payload = res.get_json()
+    assert payload['success'] is True
+    assert [item['content'] for item in payload['items']] == [
+        {'comment': '世界书', 'keys': ['a', 'b']},
+        {'comment': 'raw', 'z': 1},
+    ]
+    assert [item['sort_order'] for item in payload['items']] == [1, 5]
+
+
+def test_wi_clipboard_list_skips_corrupt_rows_and_stays_valid_json(monkeypatch, tmp_path):
+    import json
+
+    client, db_path = _make_client(monkeypatch, tmp_path)
+    client.post('/api/wi/clipboard/add', json={'entry': {'comment': 'ok', 'big': 2 ** 70}})
+    with sqlite3.connect(db_path) as conn:
+        conn.executemany(
+            'INSERT INTO wi_clipboard (content_json, sort_order, created_at) VALUES (?, ?, ?)',
+            [('{"comment": "trunc', 2, 0.0), ('{"comment": NaN}', 3, 0.0), ('', 4, 0.0)],
+        )
+    conn.close()
+
+    res = client.get('/api/wi/clipboard/list')
+
+    payload = json.loads(res.data)
+    assert payload['success'] is True
+    assert [item['content'] for item in payload['items']] == [{'comment': 'ok', 'big': 2 ** 70}]
+
+
+def test_dumps_clipboard_entry_falls_back_to_stdlib_for_unsupported_values(monkeypatch):
+    entry = {'comment': '世界书', 'big': 2 ** 70}
+
+    assert world_info_api.json.loads(world_info_api._dumps_clipboard_entry(entry)) == entry
+    monkeypatch.setattr(world_info_api, 'orjson', None)
+    assert world_info_api._dumps_clipboard_entry({'comment': '世界书'}) == '{"comment": "\\u4e16\\u754c\\u4e66"}'
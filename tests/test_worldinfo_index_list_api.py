@@ -128,7 +128,7 @@ def test_indexed_worldinfo_list_folder_metadata_uses_full_source_set(monkeypatch
         'world_info_dir': str(lorebooks_dir),
         'resources_dir': str(tmp_path / 'resources'),
     })
-    monkeypatch.setattr(world_info_api, 'load_ui_data', lambda: {})
+    monkeypatch.setattr(world_info_api, 'load_ui_data_snapshot', lambda: {})
     monkeypatch.setattr(world_info_api.ctx, 'cache', _FakeCache([]))
 
     with sqlite3.connect(db_path) as conn:
@@ -171,7 +171,7 @@ def test_indexed_worldinfo_list_fallback_folder_metadata_finds_empty_root_child_
         'world_info_dir': str(lorebooks_dir),
         'resources_dir': str(tmp_path / 'resources'),
     })
-    monkeypatch.setattr(world_info_api, 'load_ui_data', lambda: {})
+    monkeypatch.setattr(world_info_api, 'load_ui_data_snapshot', lambda: {})
     monkeypatch.setattr(world_info_api.ctx, 'cache', _FakeCache([]))
 
     with sqlite3.connect(db_path) as conn:
@@ -204,7 +204,7 @@ def test_indexed_worldinfo_resource_preserves_legacy_owner_fields_and_search(mon
         'world_info_dir': str(tmp_path / 'lorebooks'),
         'resources_dir': str(tmp_path / 'resources'),
     })
-    monkeypatch.setattr(world_info_api, 'load_ui_data', lambda: {
+    monkeypatch.setattr(world_info_api, 'load_ui_data_snapshot', lambda: {
         '_worldinfo_notes_v1': {
             f"resource::{str(resource_file).replace('\\', '/').lower()}": {'summary': 'resource note'}
         },
@@ -255,7 +255,7 @@ def test_indexed_worldinfo_search_preserves_name_substring_matching(monkeypatch,
 
     monkeypatch.setattr(world_info_api, 'DEFAULT_DB_PATH', str(db_path))
     monkeypatch.setattr(world_info_api, 'load_config', lambda: {'worldinfo_list_use_index': True})
-    monkeypatch.setattr(world_info_api, 'load_ui_data', lambda: {})
+    monkeypatch.setattr(world_info_api, 'load_ui_data_snapshot', lambda: {})
     monkeypatch.setattr(world_info_api.ctx, 'cache', _FakeCache([]))
 
     with sqlite3.connect(db_path) as conn:
@@ -284,7 +284,7 @@ def test_indexed_worldinfo_fast_search_preserves_name_substring_matching(monkeyp
 
     monkeypatch.setattr(world_info_api, 'DEFAULT_DB_PATH', str(db_path))
     monkeypatch.setattr(world_info_api, 'load_config', lambda: {'worldinfo_list_use_index': True})
-    monkeypatch.setattr(world_info_api, 'load_ui_data', lambda: {})
+    monkeypatch.setattr(world_info_api, 'load_ui_data_snapshot', lambda: {})
     monkeypatch.setattr(world_info_api.ctx, 'cache', _FakeCache([]))
 
     with sqlite3.connect(db_path) as conn:
@@ -313,7 +313,7 @@ def test_indexed_worldinfo_fulltext_search_uses_match_semantics(monkeypatch, tmp
 
     monkeypatch.setattr(world_info_api, 'DEFAULT_DB_PATH', str(db_path))
     monkeypatch.setattr(world_info_api, 'load_config', lambda: {'worldinfo_list_use_index': True})
-    monkeypatch.setattr(world_info_api, 'load_ui_data', lambda: {})
+    monkeypatch.setattr(world_info_api, 'load_ui_data_snapshot', lambda: {})
     monkeypatch.setattr(world_info_api.ctx, 'cache', _FakeCache([]))
 
     with sqlite3.connect(db_path) as conn:
@@ -346,7 +346,7 @@ def test_indexed_worldinfo_name_source_stays_meta_when_explicit_name_equals_file
 
     monkeypatch.setattr(world_info_api, 'DEFAULT_DB_PATH', str(db_path))
     monkeypatch.setattr(world_info_api, 'load_config', lambda: {'worldinfo_list_use_index': True})
-    monkeypatch.setattr(world_info_api, 'load_ui_data', lambda: {})
+    monkeypatch.setattr(world_info_api, 'load_ui_data_snapshot', lambda: {})
     monkeypatch.setattr(world_info_api.ctx, 'cache', _FakeCache([]))
 
     with sqlite3.connect(db_path) as conn:
@@ -380,7 +380,7 @@ def test_indexed_worldinfo_name_source_detects_filename_fallback_from_source_jso
         'world_info_dir': str(lorebooks_dir),
         'resources_dir': str(tmp_path / 'resources'),
     })
-    monkeypatch.setattr(world_info_api, 'load_ui_data', lambda: {})
+    monkeypatch.setattr(world_info_api, 'load_ui_data_snapshot', lambda: {})
     monkeypatch.setattr(world_info_api.ctx, 'cache', _FakeCache([]))
 
     with sqlite3.connect(db_path) as conn:
@@ -406,7 +406,7 @@ def test_indexed_worldinfo_list_delegates_query_and_folder_metadata_to_index_hel
 
     monkeypatch.setattr(world_info_api, 'DEFAULT_DB_PATH', str(db_path))
     monkeypatch.setattr(world_info_api, 'load_config', lambda: {'worldinfo_list_use_index': True})
-    monkeypatch.setattr(world_info_api, 'load_ui_data', lambda: {})
+    monkeypatch.setattr(world_info_api, 'load_ui_data_snapshot', lambda: {})
     monkeypatch.setattr(world_info_api.ctx, 'cache', _FakeCache([]))
 
     seen_filters = []
@@ -536,7 +536,7 @@ def test_worldinfo_list_falls_back_when_index_query_reports_not_ready(monkeypatc
         'world_info_dir': str(lorebooks_dir),
         'resources_dir': str(tmp_path / 'resources'),
     })
-    monkeypatch.setattr(world_info_api, 'load_ui_data', lambda: {})
+    monkeypatch.setattr(world_info_api, 'load_ui_data_snapshot', lambda: {})
     monkeypatch.setattr(world_info_api.ctx, 'cache', _FakeCache([]))
     monkeypatch.setattr(
         world_info_api,
@@ -564,7 +564,7 @@ def test_indexed_worldinfo_route_uses_subtree_counts_for_nested_categories(monke
 
     monkeypatch.setattr(world_info_api, 'DEFAULT_DB_PATH', str(db_path))
     monkeypatch.setattr(world_info_api, 'load_config', lambda: {'worldinfo_list_use_index': True})
-    monkeypatch.setattr(world_info_api, 'load_ui_data', lambda: {})
+    monkeypatch.setattr(world_info_api, 'load_ui_data_snapshot', lambda: {})
     monkeypatch.setattr(world_info_api.ctx, 'cache', _FakeCache([]))
 
     with sqlite3.connect(db_path) as conn:
@@ -598,7 +598,7 @@ def test_indexed_worldinfo_route_keeps_virtual_folder_capabilities_for_resource_
 
     monkeypatch.setattr(world_info_api, 'DEFAULT_DB_PATH', str(db_path))
     monkeypatch.setattr(world_info_api, 'load_config', lambda: {'worldinfo_list_use_index': True})
-    monkeypatch.setattr(world_info_api, 'load_ui_data', lambda: {})
+    monkeypatch.setattr(world_info_api, 'load_ui_data_snapshot', lambda: {})
     monkeypatch.setattr(world_info_api.ctx, 'cache', _FakeCache([_make_card('cards/lucy.png', '科幻', char_name='Lucy')]))
 
     with sqlite3.connect(db_path) as conn:
@@ -634,7 +634,7 @@ def test_indexed_worldinfo_type_all_keeps_virtual_folder_capabilities_for_virtua
 
     monkeypatch.setattr(world_info_api, 'DEFAULT_DB_PATH', str(db_path))
     monkeypatch.setattr(world_info_api, 'load_config', lambda: {'worldinfo_list_use_index': True})
-    monkeypatch.setattr(world_info_api, 'load_ui_data', lambda: {})
+    monkeypatch.setattr(world_info_api, 'load_ui_data_snapshot', lambda: {})
     monkeypatch.setattr(world_info_api.ctx, 'cache', _FakeCache([_make_card('cards/lucy.png', '科幻', char_name='Lucy')]))
 
     with sqlite3.connect(db_path) as conn:
@@ -678,7 +678,7 @@ def test_indexed_worldinfo_route_malformed_search_preserves_literal_name_matchin
 
     monkeypatch.setattr(world_info_api, 'DEFAULT_DB_PATH', str(db_path))
     monkeypatch.setattr(world_info_api, 'load_config', lambda: {'worldinfo_list_use_index': True})
-    monkeypatch.setattr(world_info_api, 'load_ui_data', lambda: {})
+    monkeypatch.setattr(world_info_api, 'load_ui_data_snapshot', lambda: {})
     monkeypatch.setattr(world_info_api.ctx, 'cache', _FakeCache([]))
 
     with sqlite3.connect(db_path) as conn: